@@ -1,14 +1,181 @@
-import secrets, time
-_HANDOFF = {}  # code -> (refresh_token, exp_ts)
+import heapq
+import logging
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
 
-def make_code(refresh_token: str, ttl_seconds: int = 120) -> str:
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+
+from app.database import async_session
+from app.models.oauth_handoff import OAuthHandoff
+
+logger = logging.getLogger(__name__)
+
+HANDOFF_TTL_SECONDS = 120
+HANDOFF_CAPACITY = int(os.getenv("HANDOFF_CAPACITY", 10000))
+HANDOFF_BACKEND = os.getenv("HANDOFF_STORE", "memory").lower()
+
+
+class HandoffCapacityError(RuntimeError):
+    pass
+
+
+class MemoryHandoffStore:
+    """
+    Per-process store: code -> (refresh_token, exp_ts) plus a min-heap of expiries.
+    Every call sweeps whatever has expired from the top of the heap, so
+    abandoned codes never outlive their TTL by more than one request.
+    Only correct with a single worker process.
+    """
+
+    def __init__(self, capacity: int = HANDOFF_CAPACITY):
+        self.capacity = capacity
+        self._codes: dict[str, tuple[str, float]] = {}
+        self._expiries: list[tuple[float, str]] = []
+        self.counters = {"issued": 0, "redeemed": 0, "expired": 0, "evicted": 0}
+
+    def _sweep(self, now: float) -> int:
+        swept = 0
+        while self._expiries and self._expiries[0][0] <= now:
+            exp, code = heapq.heappop(self._expiries)
+            item = self._codes.get(code)
+            # heap entries for codes that were already redeemed are skipped
+            if item is not None and item[1] == exp:
+                del self._codes[code]
+                swept += 1
+        self.counters["expired"] += swept
+        # redeemed codes leave stale heap entries behind; rebuild if they dominate
+        if len(self._expiries) > 2 * len(self._codes) + 64:
+            self._expiries = [(exp, c) for c, (_, exp) in self._codes.items()]
+            heapq.heapify(self._expiries)
+        return swept
+
+    async def put(self, code: str, refresh_token: str, ttl_seconds: int) -> None:
+        now = time.time()
+        self._sweep(now)
+        if len(self._codes) >= self.capacity:
+            # evict the code closest to expiry rather than refuse a login
+            while self._expiries and len(self._codes) >= self.capacity:
+                exp, victim = heapq.heappop(self._expiries)
+                item = self._codes.get(victim)
+                if item is not None and item[1] == exp:
+                    del self._codes[victim]
+                    self.counters["evicted"] += 1
+        exp = now + ttl_seconds
+        self._codes[code] = (refresh_token, exp)
+        heapq.heappush(self._expiries, (exp, code))
+        self.counters["issued"] += 1
+
+    async def pop(self, code: str) -> str | None:
+        now = time.time()
+        self._sweep(now)
+        item = self._codes.pop(code, None)
+        if not item:
+            return None
+        refresh, exp = item
+        if now > exp:
+            self.counters["expired"] += 1
+            return None
+        self.counters["redeemed"] += 1
+        return refresh
+
+    async def sweep(self) -> int:
+        return self._sweep(time.time())
+
+    async def outstanding(self) -> int:
+        return len(self._codes)
+
+    async def metrics(self) -> dict:
+        return {"outstanding": await self.outstanding(), **self.counters}
+
+
+class DatabaseHandoffStore:
+    """
+    Shared store in the oauth_handoff table, so the OAuth callback and the
+    /auth/handoff exchange may be served by different worker processes.
+    Redemption is a single DELETE ... RETURNING, so a code is usable once.
+    """
+
+    def __init__(self, session_factory=async_session, capacity: int = HANDOFF_CAPACITY):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.counters = {"issued": 0, "redeemed": 0, "expired": 0, "evicted": 0}
+
+    async def put(self, code: str, refresh_token: str, ttl_seconds: int) -> None:
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(OAuthHandoff).where(OAuthHandoff.expires_at <= now)
+            )
+            self.counters["expired"] += result.rowcount or 0
+            count = await db.execute(select(func.count()).select_from(OAuthHandoff))
+            if count.scalar() >= self.capacity:
+                await db.commit()
+                raise HandoffCapacityError("Too many outstanding OAuth handoff codes.")
+            db.add(
+                OAuthHandoff(
+                    code=code,
+                    refresh_token=refresh_token,
+                    expires_at=now + timedelta(seconds=ttl_seconds),
+                )
+            )
+            await db.commit()
+        self.counters["issued"] += 1
+
+    async def pop(self, code: str) -> str | None:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(OAuthHandoff)
+                .where(OAuthHandoff.code == code)
+                .returning(OAuthHandoff.refresh_token, OAuthHandoff.expires_at)
+            )
+            row = result.first()
+            await db.commit()
+        if row is None:
+            return None
+        if datetime.utcnow() > row.expires_at:
+            self.counters["expired"] += 1
+            return None
+        self.counters["redeemed"] += 1
+        return row.refresh_token
+
+    async def sweep(self) -> int:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(OAuthHandoff).where(OAuthHandoff.expires_at <= datetime.utcnow())
+            )
+            await db.commit()
+        swept = result.rowcount or 0
+        self.counters["expired"] += swept
+        return swept
+
+    async def outstanding(self) -> int:
+        async with self.session_factory() as db:
+            result = await db.execute(select(func.count()).select_from(OAuthHandoff))
+            return result.scalar()
+
+    async def metrics(self) -> dict:
+        return {"outstanding": await self.outstanding(), **self.counters}
+
+
+def create_store(backend: str = HANDOFF_BACKEND):
+    if backend == "db":
+        return DatabaseHandoffStore()
+    if backend != "memory":
+        logger.warning("Unknown HANDOFF_STORE %r; using in-memory store", backend)
+    return MemoryHandoffStore()
+
+
+store = create_store()
+
+
+async def make_code(refresh_token: str, ttl_seconds: int = HANDOFF_TTL_SECONDS) -> str:
     code = secrets.token_urlsafe(24)
-    _HANDOFF[code] = (refresh_token, time.time() + ttl_seconds)
+    await store.put(code, refresh_token, ttl_seconds)
     return code
 
-def pop_refresh(code: str) -> str | None:
-    item = _HANDOFF.pop(code, None)
-    if not item:
-        return None
-    refresh, exp = item
-    return refresh if time.time() <= exp else None
+
+async def pop_refresh(code: str) -> str | None:
+    return await store.pop(code)
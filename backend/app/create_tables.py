@@ -1,8 +1,5 @@
-from sqlalchemy.ext.asyncio import create_async_engine
-from app.database import DATABASE_URL, Base
-from models import *
-
-engine = create_async_engine(DATABASE_URL, echo=True)
+from app.database import engine, Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
 
 
 async def create_all_tables():
@@ -10,6 +7,7 @@ async def create_all_tables():
         print("Generating tables...")
         await conn.run_sync(Base.metadata.create_all)
         print("Tables created successfully!")
+    await engine.dispose()
 
 
 if __name__ == "__main__":
@@ -1,20 +1,139 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+import logging
 import os
 
-if os.getenv("RENDER") is None:
-    load_dotenv()
+from app.utils.env import load_env
+from app.utils.read_routing import ReadRouter
+
+load_env()
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional streaming replica for read-only routes; reads go to the primary if unset.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in {"1", "true", "yes"}
+
+
+DEBUG = _env_bool("DEBUG")
+
+# Pool / driver settings. Only the pool options apply to SQLite.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 30 * 60))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# asyncpg prepared statement LRU per connection; set to 0 behind pgbouncer
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+SQL_ECHO = _env_bool("SQL_ECHO", DEBUG)
+
+
+def engine_options(url: str) -> dict:
+    """
+    Keyword arguments for create_async_engine, driven by the DB_* settings.
+    """
+    backend = make_url(url).get_backend_name()
+    options = {"echo": SQL_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if backend == "postgresql":
+        connect_args = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+        if DB_STATEMENT_CACHE_SIZE == 0:
+            connect_args["statement_cache_size"] = 0
+        if DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)
+            }
+        options["connect_args"] = connect_args
+    return options
+
+
+def create_engine(url: str | None = None, **overrides) -> AsyncEngine:
+    """
+    The one place engines are built; scripts should use this too.
+    """
+    url = url or DATABASE_URL
+    options = engine_options(url)
+    options.update(overrides)
+    return create_async_engine(url, **options)
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+def describe_pool(engine: AsyncEngine) -> str:
+    options = engine_options(str(engine.url))
+    parts = [
+        f"backend={engine.dialect.name}",
+        f"pool={engine.pool.__class__.__name__}",
+    ]
+    for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+        if key in options:
+            parts.append(f"{key}={options[key]}")
+    parts.append(f"pre_ping={options['pool_pre_ping']}")
+    connect_args = options.get("connect_args", {})
+    if "prepared_statement_cache_size" in connect_args:
+        parts.append(
+            f"statement_cache={connect_args['prepared_statement_cache_size']}"
+        )
+    if "server_settings" in connect_args:
+        parts.append(
+            f"statement_timeout_ms={connect_args['server_settings']['statement_timeout']}"
+        )
+    parts.append(f"echo={options['echo']}")
+    return " ".join(parts)
+
+
+def log_pool_configuration() -> None:
+    logger.info("Database engine: %s", describe_pool(engine))
+    if read_engine is not engine:
+        logger.info("Read replica engine: %s", describe_pool(read_engine))
+
+
+engine = create_engine()
 
 async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = create_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else engine
+
+async_read_session = (
+    sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+    if DATABASE_REPLICA_URL
+    else async_session
+)
+
+read_router = ReadRouter(async_session, async_read_session)
+
 Base = declarative_base()
 
 
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only routes: the replica, unless this client wrote
+    recently and must still see its own writes on the primary.
+    """
+    async with read_router.session_factory(request)() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
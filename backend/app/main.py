@@ -1,19 +1,90 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from dotenv import load_dotenv
 import os
+import logging
 
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
-from app.routers import users, auth, dictionary, admin, achievements
+from app.routers import users, auth, dictionary, admin, achievements, metrics
+from app.database import (
+    DEBUG,
+    dispose_engines,
+    engine,
+    log_pool_configuration,
+    read_engine,
+)
+from app.services.compression import CompressionMiddleware
+from app.services.invalidation import bus as invalidation_bus
+from app.services.job_queue import JOB_WORKER, job_worker
+from app.services.mailer import outbox_worker
+from app.services.scheduled_jobs import scheduler
+from app.services.scheduler import SCHEDULER_ENABLED
+from app.services.storage import storage
+from app.services.metrics import MetricsMiddleware, registry as metrics_registry
+from app.services.warmup import STARTUP_WARMUP, warm_up
+from app.services.rate_limit import FORWARDED_ALLOW_IPS, RateLimitMiddleware
+from app.utils.env import validate_env_variables
+from app.utils.read_routing import ReadYourWritesMiddleware
+from app.utils.slow_query_log import install_slow_query_log
+from app.utils.sql_instrumentation import SQLStatsMiddleware, install_sql_instrumentation
+
+# ----- Lifespan -----
+RUN_OUTBOX_WORKER = os.getenv("EMAIL_OUTBOX_WORKER", "true").lower() == "true"
+REFRESH_OAUTH_METADATA = os.getenv("OAUTH_METADATA_REFRESH", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_env_variables()
+    log_pool_configuration()
+    logging.info("Trusting X-Forwarded-For from %s", FORWARDED_ALLOW_IPS)
+    google_metadata = auth.get_google_metadata()
+    if google_metadata.load_snapshot():
+        logging.info("Loaded Google OAuth metadata from snapshot")
+    if STARTUP_WARMUP:
+        await warm_up(app, google_metadata if REFRESH_OAUTH_METADATA else None)
+
+    invalidation_bus.start()
+    if RUN_OUTBOX_WORKER:
+        outbox_worker.start()
+    if JOB_WORKER:
+        job_worker.start()
+    if REFRESH_OAUTH_METADATA:
+        google_metadata.start()
+    metrics_registry.start()
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        await scheduler.stop()
+        await metrics_registry.stop()
+        await invalidation_bus.stop()
+        await outbox_worker.stop()
+        await job_worker.stop()
+        await google_metadata.stop()
+        storage.close()
+        await dispose_engines()
 
-load_dotenv()
 
-app = FastAPI()
+# orjson renders responses; typed response models keep it to one pass
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.state.ready = False
 
+install_sql_instrumentation()
+install_slow_query_log(engine, read_engine)
+app.add_middleware(SQLStatsMiddleware, expose_headers=DEBUG)
 
-app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
+app.add_middleware(ReadYourWritesMiddleware)
+# Added before ProxyHeadersMiddleware so it runs inside it and sees the real client IP.
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=FORWARDED_ALLOW_IPS)
 
 # ----- CORS -----
 FRONTEND_ORIGINS = [
@@ -41,12 +112,19 @@ app.add_middleware(
     https_only=True if IS_PROD else False,
 )
 
+# Outside everything that renders a body; precompressed snapshots pass through.
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency and in-flight counts cover the whole stack.
+app.add_middleware(MetricsMiddleware)
+
 # ----- Routers -----
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(admin.router)
 app.include_router(dictionary.router)
 app.include_router(achievements.router)
+app.include_router(metrics.router)
 
 # ----- Static /media -----
 media_directory = "media"
@@ -57,3 +135,16 @@ app.mount("/media", StaticFiles(directory=media_directory), name="media")
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Sign Language Application!"}
+
+
+@app.get("/health/live", include_in_schema=False)
+def liveness():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+def readiness(request: Request):
+    """Ready once the lifespan warm-up has finished, until shutdown starts."""
+    if not request.app.state.ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready"}
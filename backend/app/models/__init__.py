@@ -12,3 +12,12 @@ from .dictionary_category import DictionaryCategory
 from .dictionary_usage import DictionaryUsage
 from .user_activity_log import UserActivityLog
 from .video_reference import VideoReference
+from .language import Language
+from .task_video import TaskVideo
+from .email_outbox import EmailOutbox
+from .oauth_handoff import OAuthHandoff
+from .rate_limit_bucket import RateLimitBucket
+from .cache_entry import CacheEntry
+from .cache_invalidation import CacheInvalidation
+from .queued_job import QueuedJob
+from .avatar_blob import AvatarBlob
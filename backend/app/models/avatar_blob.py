@@ -0,0 +1,12 @@
+from app.database import Base
+
+from sqlalchemy import Boolean, Column, Float, Integer, String
+
+
+class AvatarBlob(Base):
+    __tablename__ = "avatar_blob"
+
+    digest = Column(String(64), primary_key=True)  # sha256 of the uploaded bytes
+    refcount = Column(Integer, nullable=False, default=0)  # users pointing at it
+    stored = Column(Boolean, nullable=False, default=False)  # variants are in storage
+    unreferenced_since = Column(Float, nullable=True, index=True)  # epoch seconds
@@ -0,0 +1,13 @@
+from app.database import Base
+
+from sqlalchemy import Column, String, Float, LargeBinary, Text
+
+
+class CacheEntry(Base):
+    __tablename__ = "cache_entry"
+
+    cache_key = Column(String(500), primary_key=True)  # "<cache name>:<json key>"
+    value = Column(LargeBinary, nullable=False)  # JSON
+    tags = Column(Text, nullable=False, default="||")  # "|tag1|tag2|"
+    fresh_until = Column(Float, nullable=False)  # epoch seconds
+    expires_at = Column(Float, nullable=False, index=True)  # epoch seconds, incl. stale window
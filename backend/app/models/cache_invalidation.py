@@ -0,0 +1,13 @@
+from app.database import Base
+
+from sqlalchemy import Column, Integer, Float, Text
+
+
+class CacheInvalidation(Base):
+    """Invalidation messages for workers polling instead of LISTENing."""
+
+    __tablename__ = "cache_invalidation"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    payload = Column(Text, nullable=False)  # {"origin": ..., "tags": [...]}
+    created_at = Column(Float, nullable=False, index=True)  # epoch seconds
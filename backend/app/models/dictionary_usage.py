@@ -1,6 +1,6 @@
 from app.database import Base
 
-from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey, Index
 
 
 class DictionaryUsage(Base):
@@ -10,3 +10,5 @@ class DictionaryUsage(Base):
     accessed_at = Column(TIMESTAMP, nullable=False)
     user_id = Column(Integer, ForeignKey("user.user_id"), nullable=False)
     sign_id = Column(Integer, ForeignKey("dictionary.sign_id"), nullable=False)
+
+    __table_args__ = (Index("ix_dictionary_usage_user_id_accessed_at", "user_id", "accessed_at"),)
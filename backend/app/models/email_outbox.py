@@ -0,0 +1,26 @@
+from app.database import Base
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    email_id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(254), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String(10), nullable=False, default="html")
+    # pending -> sending -> sent, or dead after too many failed attempts
+    status = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
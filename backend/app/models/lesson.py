@@ -9,7 +9,9 @@ class Lesson(Base):
     lesson_id = Column(Integer, primary_key=True, index=True)
     title = Column(String(50), nullable=False)
     description = Column(String(2000))
-    module_id = Column(Integer, ForeignKey("module.module_id"), nullable=False)
+    module_id = Column(
+        Integer, ForeignKey("module.module_id"), nullable=False, index=True
+    )
     version = Column(Integer, nullable=False)
     duration = Column(Integer, nullable=True)
     difficulty = Column(String(20), nullable=True)
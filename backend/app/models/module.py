@@ -1,5 +1,5 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 
 
 class Module(Base):
@@ -8,10 +8,16 @@ class Module(Base):
     module_id = Column(Integer, primary_key=True, index=True)
     title = Column(String(50), nullable=False)
     description = Column(String(2000))
-    created_by = Column(Integer, ForeignKey("user.user_id"), nullable=False)
+    created_by = Column(
+        Integer, ForeignKey("user.user_id"), nullable=False, index=True
+    )
     modified_by = Column(Integer, ForeignKey("user.user_id"), nullable=True)
     version = Column(Integer, nullable=False)
     prerequisite_mod = Column(Integer, ForeignKey("module.module_id"))
     language_id = Column(
         Integer, ForeignKey("languages.id", ondelete="CASCADE"), nullable=False
     )
+
+    __table_args__ = (
+        Index("ix_module_language_id_module_id", "language_id", "module_id"),
+    )
@@ -0,0 +1,11 @@
+from app.database import Base
+
+from sqlalchemy import Column, String, Text, DateTime
+
+
+class OAuthHandoff(Base):
+    __tablename__ = "oauth_handoff"
+
+    code = Column(String(64), primary_key=True)
+    refresh_token = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
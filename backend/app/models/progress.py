@@ -1,5 +1,13 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, Boolean, TIMESTAMP, ForeignKey, UniqueConstraint
+from sqlalchemy import (
+    Column,
+    Integer,
+    Boolean,
+    TIMESTAMP,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
 
 
 class Progress(Base):
@@ -16,4 +24,7 @@ class Progress(Base):
     attempts = Column(Integer, default=1)
 
     # Add a unique constraint to enforce uniqueness on user_id and lesson_id
-    __table_args__ = (UniqueConstraint("user_id", "lesson_id", name="uq_user_lesson"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "lesson_id", name="uq_user_lesson"),
+        Index("ix_progress_user_id_is_completed", "user_id", "is_completed"),
+    )
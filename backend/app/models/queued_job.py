@@ -0,0 +1,26 @@
+from app.database import Base
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Index
+
+
+class QueuedJob(Base):
+    __tablename__ = "job_queue"
+
+    job_id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String(50), nullable=False, default="default")
+    kind = Column(String(100), nullable=False)  # registered handler name
+    payload = Column(JSON, nullable=False)
+    # pending -> running -> done, or dead after too many failed attempts
+    status = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # when a pending job may run; for a running job, when its lease runs out
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_queue_queue_status_run_at", "queue", "status", "run_at"),
+    )
@@ -0,0 +1,12 @@
+from app.database import Base
+
+from sqlalchemy import Column, String, Float, Boolean
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_bucket"
+
+    bucket_key = Column(String(300), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # epoch seconds of last refill
+    allowed = Column(Boolean, nullable=False, default=True)
@@ -10,7 +10,9 @@ class Task(Base):
     task_type = Column(String(50), nullable=False)
     content = Column(JSON, nullable=False)
     correct_answer = Column(JSON, nullable=False)
-    lesson_id = Column(Integer, ForeignKey("lesson.lesson_id"), nullable=False)
+    lesson_id = Column(
+        Integer, ForeignKey("lesson.lesson_id"), nullable=False, index=True
+    )
     version = Column(Integer, nullable=False)
     points = Column(Integer, nullable=False)
 
@@ -12,4 +12,5 @@ class TaskVideo(Base):
         String,
         ForeignKey("video_reference.video_id", ondelete="CASCADE"),
         primary_key=True,
+        index=True,
     )
@@ -7,7 +7,9 @@ class UserAchievement(Base):
     __tablename__ = "user_achievement"
 
     user_achievement_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("user.user_id"), nullable=False)
+    user_id = Column(
+        Integer, ForeignKey("user.user_id"), nullable=False, index=True
+    )
     achievement_id = Column(
         Integer, ForeignKey("achievement.achievement_id"), nullable=False
     )
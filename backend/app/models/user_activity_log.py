@@ -1,6 +1,6 @@
 from app.database import Base
 
-from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, Index
 
 
 class UserActivityLog(Base):
@@ -12,3 +12,5 @@ class UserActivityLog(Base):
     user_id = Column(Integer, ForeignKey("user.user_id"), nullable=False)
     duration = Column(Integer, nullable=True)
     activity_type = Column(String(20), nullable=True)
+
+    __table_args__ = (Index("ix_user_activity_log_user_id_timestamp", "user_id", "timestamp"),)
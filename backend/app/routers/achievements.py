@@ -2,17 +2,21 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from datetime import datetime
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user_achievement import UserAchievement
 from app.models.achievement import Achievement
 from app.models.user import User
+from app.schemas.achievement import (
+    AchievementHolderResponse,
+    UserAchievementResponse,
+)
 
 router = APIRouter(prefix="/user-achievements", tags=["User Achievements"])
 
 
 # Fetch all achievements for a specific user
-@router.get("/{user_id}", response_model=list[dict])
-async def get_user_achievements(user_id: int, db: AsyncSession = Depends(get_db)):
+@router.get("/{user_id}", response_model=list[UserAchievementResponse])
+async def get_user_achievements(user_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Fetch all achievements for a specific user.
     """
@@ -93,9 +97,11 @@ async def assign_achievement_to_user(
 
 
 # Fetch all users who have a specific achievement
-@router.get("/achievement/{achievement_id}", response_model=list[dict])
+@router.get(
+    "/achievement/{achievement_id}", response_model=list[AchievementHolderResponse]
+)
 async def get_users_with_achievement(
-    achievement_id: int, db: AsyncSession = Depends(get_db)
+    achievement_id: int, db: AsyncSession = Depends(get_read_db)
 ):
     """
     Fetch all users who have been awarded a specific achievement.
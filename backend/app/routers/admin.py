@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import delete
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import joinedload
 from typing import Optional, List
 import logging
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import Response, status
 from sqlalchemy import select, update
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.services import content_cache
+from app.services.task_payload import load_tasks, video_payload
+from app.services.url_signing import url_signer
 from app.models.user import User
 from app.models.module import Module
 from app.models.language import Language
@@ -75,6 +79,7 @@ async def create_module(
         )
         db.add(new_module)
         await db.commit()
+        await content_cache.invalidate(f"language:{new_module.language_id}")
         await db.refresh(new_module)
         return new_module
     except Exception as e:
@@ -85,7 +90,7 @@ async def create_module(
 @router.get("/modules", response_model=List[ModuleResponse])
 async def get_modules(
     language_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: User = Depends(require_admin),
 ):
     """
@@ -139,6 +144,7 @@ async def delete_module(
 
         await db.execute(delete(Module).where(Module.module_id == module_id))
         await db.commit()
+        await content_cache.invalidate("catalog", "lessons")
 
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except Exception as e:
@@ -187,6 +193,7 @@ async def update_module(
         module.version += 1
 
         await db.commit()
+        await content_cache.invalidate("catalog")
         await db.refresh(module)
 
         logging.info(f"Module {module_id} updated successfully.")
@@ -197,7 +204,7 @@ async def update_module(
 
 
 @router.get("/languages", response_model=List[LanguageResponse])
-async def get_languages(db: AsyncSession = Depends(get_db)):
+async def get_languages(db: AsyncSession = Depends(get_read_db)):
     """
     Fetch all available languages
     """
@@ -226,6 +233,7 @@ async def add_language(language: LanguageCreate, db: AsyncSession = Depends(get_
         new_language = Language(code=language.code, name=language.name)
         db.add(new_language)
         await db.commit()
+        await content_cache.invalidate("languages", "dictionary")
         await db.refresh(new_language)
         logging.info(f"Language {language.code} added successfully.")
         return new_language
@@ -265,6 +273,7 @@ async def create_lesson(
     try:
         db.add(new_lesson)
         await db.commit()
+        await content_cache.invalidate(f"language:{module.language_id}")
         await db.refresh(new_lesson)
         logging.info(f"Lesson {lesson.title} created successfully.")
         return new_lesson
@@ -279,7 +288,7 @@ async def get_lessons(
     module_id: int,
     limit: int = 10,
     offset: int = 0,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: User = Depends(require_admin),
 ):
     """
@@ -341,6 +350,7 @@ async def update_lesson(
         lesson.version += 1
 
         await db.commit()
+        await content_cache.invalidate("catalog", f"lesson:{lesson_id}")
         await db.refresh(lesson)
         logging.info(f"Lesson {lesson_id} updated successfully.")
         return lesson
@@ -369,6 +379,7 @@ async def delete_lesson(
 
         await db.execute(delete(Lesson).where(Lesson.lesson_id == lesson_id))
         await db.commit()
+        await content_cache.invalidate("catalog", f"lesson:{lesson_id}")
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except Exception:
         await db.rollback()
@@ -418,17 +429,12 @@ async def create_task(
             db.add(task_video)
 
         await db.commit()
-        await db.refresh(new_task)
+        await content_cache.invalidate("catalog", f"lesson:{task.lesson_id}")
 
-        task_with_videos = await db.execute(
-            select(Task)
-            .options(selectinload(Task.videos))
-            .where(Task.task_id == new_task.task_id)
-        )
-        task_with_videos = task_with_videos.scalar()
+        (payload,) = await load_tasks(db, Task.task_id == new_task.task_id)
 
         logging.info(f"Task {new_task.task_id} created successfully.")
-        return task_with_videos
+        return ORJSONResponse(payload)
     except Exception as e:
         logging.error(f"Error creating task: {e}")
         raise HTTPException(status_code=500, detail="Failed to create task")
@@ -437,51 +443,18 @@ async def create_task(
 @router.get("/tasks", response_model=List[TaskResponse])
 async def get_tasks(
     lesson_id: int,
-    db: AsyncSession = Depends(get_db),
+    include_metadata: bool = Query(False, description="Include video_metadata"),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: User = Depends(require_admin),
 ):
     """
     Fetch all tasks for a specific lesson, including all linked videos.
     """
     try:
-        result = await db.execute(
-            select(Task, VideoReference)
-            .join(TaskVideo, Task.task_id == TaskVideo.task_id, isouter=True)
-            .join(
-                VideoReference,
-                TaskVideo.video_id == VideoReference.video_id,
-                isouter=True,
-            )
-            .where(Task.lesson_id == lesson_id)
+        tasks = await load_tasks(
+            db, Task.lesson_id == lesson_id, include_metadata=include_metadata
         )
-
-        tasks = {}
-        for task, video in result:
-            if task.task_id not in tasks:
-                # Initialize task details
-                tasks[task.task_id] = {
-                    "task_id": task.task_id,
-                    "task_type": task.task_type,
-                    "content": task.content,
-                    "correct_answer": task.correct_answer,
-                    "lesson_id": task.lesson_id,
-                    "version": task.version,
-                    "points": task.points,
-                    "videos": [],
-                }
-
-            if video:
-                tasks[task.task_id]["videos"].append(
-                    {
-                        "video_id": video.video_id,
-                        "video_url": video.video_url,
-                        "gloss": video.gloss,
-                    }
-                )
-
-        logging.debug(f"Serialized tasks: {list(tasks.values())}")
-
-        return list(tasks.values())
+        return ORJSONResponse(tasks)
 
     except Exception as e:
         logging.error(f"Error fetching tasks: {e}")
@@ -532,9 +505,10 @@ async def update_task(
                 db.add(task_video)
 
         await db.commit()
-        await db.refresh(task)
+        await content_cache.invalidate("catalog", f"lesson:{task.lesson_id}")
 
-        return task
+        (payload,) = await load_tasks(db, Task.task_id == task_id)
+        return ORJSONResponse(payload)
     except SQLAlchemyError as e:
         logging.error(f"Database error while updating task: {e}")
         raise HTTPException(status_code=500, detail="Database error occurred.")
@@ -558,6 +532,7 @@ async def delete_task(
         await db.execute(delete(TaskVideo).where(TaskVideo.task_id == task_id))
         await db.execute(delete(Task).where(Task.task_id == task_id))
         await db.commit()
+        await content_cache.invalidate("catalog", f"lesson:{task.lesson_id}")
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except Exception:
         await db.rollback()
@@ -568,21 +543,20 @@ async def delete_task(
 @router.get("/tasks/video/{video_id}", response_model=List[TaskResponse])
 async def get_tasks_by_video(
     video_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: User = Depends(require_admin),
 ):
     """
     Fetch all tasks linked to a specific video.
     """
     try:
-        result = await db.execute(
-            select(Task)
-            .join(Task.videos)
-            .where(VideoReference.video_id == video_id)
-            .options(joinedload(Task.videos))
+        tasks = await load_tasks(
+            db,
+            Task.task_id.in_(
+                select(TaskVideo.task_id).where(TaskVideo.video_id == video_id)
+            ),
         )
-        tasks = result.scalars().unique().all()
-        return tasks
+        return ORJSONResponse(tasks)
     except Exception as e:
         logging.error(f"Error fetching tasks by video: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch tasks by video")
@@ -592,7 +566,7 @@ async def get_tasks_by_video(
 async def search_videos(
     query: Optional[str] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: User = Depends(require_admin),
 ):
     term = (query or search or "").strip()
@@ -602,7 +576,9 @@ async def search_videos(
     result = await db.execute(
         select(VideoReference).where(VideoReference.gloss.ilike(f"%{term}%"))
     )
-    return result.scalars().all()
+    videos = result.scalars().all()
+    signed = url_signer.sign_many(video.video_url for video in videos if video.video_url)
+    return ORJSONResponse([video_payload(video, True, signed) for video in videos])
 
 
 @router.get("/settings", response_model=UserResponse)
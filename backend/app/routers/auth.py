@@ -3,7 +3,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from fastapi.responses import HTMLResponse, RedirectResponse
 from app.models.user import User
-from dotenv import load_dotenv
 from fastapi import Response
 import os
 from jose import jwt, JWTError
@@ -25,7 +24,6 @@ from fastapi import Cookie
 from fastapi import Header
 from sqlalchemy.future import select
 from app.schemas.auth import EmailValidationRequest
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired
 from authlib.integrations.starlette_client import OAuth
 import logging
@@ -37,9 +35,12 @@ import asyncio
 import random
 from app.schemas.HandoffRequest import HandoffRequest
 from app.auth_handoff import make_code, pop_refresh 
+from app.utils.email_validation import classify_locally, VALID, INVALID
+from app.services.mailer import enqueue_email, outbox_worker
+from app.services.oauth_metadata import ProviderMetadataCache, OAUTH_SNAPSHOT_DIR
+from app.services.rate_limit import limiter, LOGIN_ACCOUNT_RULE, FORGOT_ACCOUNT_RULE
 from urllib.parse import quote
-
-load_dotenv()
+from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO)
 logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING) 
@@ -64,45 +65,6 @@ GENERIC_MSG = {"message": "If the email exists, we sent a reset link."}
 
 
 
-def validate_env_variables():
-    required_vars = [
-        "MAIL_USERNAME",
-        "MAIL_PASSWORD",
-        "MAIL_FROM",
-        "MAIL_PORT",
-        "MAIL_SERVER",
-        "SECRET_KEY",
-        "GOOGLE_CLIENT_ID",
-        "GOOGLE_CLIENT_SECRET",
-        "GOOGLE_REDIRECT_URI",
-        "FRONTEND_URL",
-    ]
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
-    if missing_vars:
-        logging.error(
-            f"Missing required environment variables: {', '.join(missing_vars)}"
-        )
-        raise RuntimeError(
-            "Critical environment variables are missing. Check your .env file."
-        )
-
-
-validate_env_variables()
-
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "SignLearn"),
-    MAIL_STARTTLS=os.getenv("MAIL_STARTTLS", "True").lower() == "true",
-    MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "False").lower() == "true",
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
-
 serializer = URLSafeTimedSerializer(os.getenv("SECRET_KEY", "default_secret_key"))
 
 
@@ -151,29 +113,45 @@ def _clear_cookie(response: Response, key: str, *, path: str = "/", partitioned:
 
 
 
-oauth = OAuth()
-oauth.register(
-    name="google",
-    client_id=os.getenv("GOOGLE_CLIENT_ID"),
-    client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    client_kwargs={"scope": "openid email profile"},
+GOOGLE_DISCOVERY_URL = os.getenv(
+    "GOOGLE_DISCOVERY_URL", "https://accounts.google.com/.well-known/openid-configuration"
 )
 
-oauth.register(
-    name="facebook",
-    client_id=os.getenv("FACEBOOK_CLIENT_ID"),
-    client_secret=os.getenv("FACEBOOK_CLIENT_SECRET"),
-    authorize_url="https://www.facebook.com/v16.0/dialog/oauth",
-    access_token_url="https://graph.facebook.com/v16.0/oauth/access_token",
-    userinfo_endpoint="https://graph.facebook.com/me",
-    redirect_uri=os.getenv("FACEBOOK_REDIRECT_URI"),
-    client_kwargs={"scope": "email public_profile"},
-)
+@lru_cache(maxsize=1)
+def get_oauth() -> OAuth:
+    """OAuth registry with the Google and Facebook clients, built on first use."""
+    oauth = OAuth()
+    oauth.register(
+        name="google",
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        server_metadata_url=GOOGLE_DISCOVERY_URL,
+        client_kwargs={"scope": "openid email profile"},
+    )
+    oauth.register(
+        name="facebook",
+        client_id=os.getenv("FACEBOOK_CLIENT_ID"),
+        client_secret=os.getenv("FACEBOOK_CLIENT_SECRET"),
+        authorize_url="https://www.facebook.com/v16.0/dialog/oauth",
+        access_token_url="https://graph.facebook.com/v16.0/oauth/access_token",
+        userinfo_endpoint="https://graph.facebook.com/me",
+        redirect_uri=os.getenv("FACEBOOK_REDIRECT_URI"),
+        client_kwargs={"scope": "email public_profile"},
+    )
+    return oauth
+
+
+@lru_cache(maxsize=1)
+def get_google_metadata() -> ProviderMetadataCache:
+    return ProviderMetadataCache(
+        get_oauth().google,
+        GOOGLE_DISCOVERY_URL,
+        snapshot_path=os.path.join(OAUTH_SNAPSHOT_DIR, "signlearn-oauth-google.json"),
+    )
 
 @router.get("/facebook/login")
 async def facebook_login(request: Request):
-    return await oauth.facebook.authorize_redirect(
+    return await get_oauth().facebook.authorize_redirect(
         request,
         redirect_uri=os.getenv("FACEBOOK_REDIRECT_URI"),
     )
@@ -188,10 +166,10 @@ async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)
             logging.warning("Facebook OAuth error; keys=%s; reason=%s", list(qp.keys()), bool(reason))
             return RedirectResponse(url=f"{FRONTEND_URL.rstrip('/')}/", status_code=302)
 
-        token = await oauth.facebook.authorize_access_token(request)
+        token = await get_oauth().facebook.authorize_access_token(request)
         access_token_fb = token["access_token"]
 
-        user_info_response = await oauth.facebook.get(
+        user_info_response = await get_oauth().facebook.get(
             "https://graph.facebook.com/me?fields=id,name,email",
             token={"access_token": access_token_fb},
         )
@@ -214,7 +192,7 @@ async def facebook_callback(request: Request, db: AsyncSession = Depends(get_db)
         is_admin = bool(getattr(user, "is_admin", False) or getattr(user, "is_super_admin", False))
 
         refresh_token = create_refresh_token({"sub": email, "is_admin": is_admin})
-        code = make_code(refresh_token)
+        code = await make_code(refresh_token)
 
         return RedirectResponse(
             url=f"{FRONTEND_URL.rstrip('/')}/post-auth#hc={quote(code)}",
@@ -233,7 +211,7 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", "https://signlearn-2nxt.onrender.com")
 
 @router.get("/google/login")
 async def google_login(request: Request):
-    return await oauth.google.authorize_redirect(
+    return await get_oauth().google.authorize_redirect(
         request,
         redirect_uri=GOOGLE_REDIRECT_URI,
         prompt="consent",
@@ -243,13 +221,13 @@ async def google_login(request: Request):
 @router.get("/google/callback")
 async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     try:
-        token = await oauth.google.authorize_access_token(request)
+        token = await get_oauth().google.authorize_access_token(request)
 
         try:
-            userinfo = await oauth.google.parse_id_token(request, token)
+            userinfo = await get_oauth().google.parse_id_token(request, token)
         except Exception as e:
             logging.warning("parse_id_token failed: %s; falling back to userinfo", e)
-            resp_u = await oauth.google.get(
+            resp_u = await get_oauth().google.get(
                 "https://openidconnect.googleapis.com/v1/userinfo", token=token
             )
             userinfo = resp_u.json()
@@ -270,7 +248,7 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
         is_admin = bool(getattr(user, "is_admin", False) or getattr(user, "is_super_admin", False))
 
         refresh_token = create_refresh_token({"sub": email, "is_admin": is_admin})
-        code = make_code(refresh_token)
+        code = await make_code(refresh_token)
 
         return RedirectResponse(
             url=f"{FRONTEND_URL.rstrip('/')}/post-auth#hc={quote(code)}",
@@ -290,9 +268,13 @@ async def login(
     request: LoginRequest, response: Response, db: AsyncSession = Depends(get_db)
 ):
     try:
+        account = request.email.strip().lower()
+        await limiter.enforce(LOGIN_ACCOUNT_RULE, account, charge=False)
+
         result = await db.execute(select(User).where(User.email == request.email))
         user: User | None = result.scalar_one_or_none()
         if not user:
+            await limiter.check(LOGIN_ACCOUNT_RULE, account)
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         if not user.password:
@@ -302,6 +284,7 @@ async def login(
             )
 
         if not verify_password(request.password, user.password):
+            await limiter.check(LOGIN_ACCOUNT_RULE, account)
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         is_admin = bool(user.is_admin or getattr(user, "is_super_admin", False))
@@ -349,16 +332,16 @@ async def create_user(user_data: SignupRequest, db: AsyncSession = Depends(get_d
             is_verified=False,
         )
         db.add(new_user)
-        await db.commit()
 
         token = serializer.dumps(user_data.email, salt="email-verification")
         frontend_url = os.getenv("FRONTEND_URL", "http://127.0.0.1:3000").rstrip("/")
         verification_link = f"{frontend_url}/verify-email?token={token}"
 
-        message = MessageSchema(
-            subject="Verify your email",
-            recipients=[user_data.email],
-            body=f"""
+        enqueue_email(
+            db,
+            user_data.email,
+            "Verify your email",
+            f"""
                 <html>
                     <body>
                         <p>Hi {user_data.username},</p>
@@ -368,10 +351,9 @@ async def create_user(user_data: SignupRequest, db: AsyncSession = Depends(get_d
                     </body>
                 </html>
             """,
-            subtype="html",
         )
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        await db.commit()
+        outbox_worker.wake()
 
         return {"message": "Account created! Please verify your email."}
     except HTTPException as e:
@@ -406,6 +388,11 @@ async def forgot_password(
         result = await db.execute(select(User).where(User.email == request.email))
         user = result.scalar_one_or_none()
 
+        # over the per-account limit: answer as usual but don't send another mail
+        if user and await limiter.check(FORGOT_ACCOUNT_RULE, user.email.lower()):
+            logging.warning("[forgot-password] per-account limit reached")
+            user = None
+
         if user:
             token = serializer.dumps({"email": user.email}, salt="password-reset")
             frontend_url = os.getenv("FRONTEND_URL", "http://127.0.0.1:3000").rstrip(
@@ -413,10 +400,11 @@ async def forgot_password(
             )
             reset_link = f"{frontend_url}/reset-password?token={token}"
 
-            message = MessageSchema(
-                subject="Password Reset Request",
-                recipients=[request.email],
-                body=f"""
+            enqueue_email(
+                db,
+                request.email,
+                "Password Reset Request",
+                f"""
                     <html><body>
                         <p>Hi {user.username or "User"},</p>
                         <p>We received a request to reset your password.</p>
@@ -425,15 +413,10 @@ async def forgot_password(
                         <p>This link will expire in 1 hour.</p>
                     </body></html>
                 """,
-                subtype="html",
             )
-            try:
-                await FastMail(conf).send_message(message)
-                logging.info("[forgot-password] sent")
-            except Exception as e:
-                logging.exception(
-                    "[forgot-password] mail send failed"
-                )
+            await db.commit()
+            outbox_worker.wake()
+            logging.info("[forgot-password] queued")
 
         return GENERIC_MSG
 
@@ -525,13 +508,24 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
 @router.post("/validate-email")
 async def validate_email(request: EmailValidationRequest):
     """
-    Validate email with MailboxLayer, but NEVER block signup:
+    Validate email locally first, then with MailboxLayer, but NEVER block signup:
+    - syntax, disposable domains and MX are answered offline; likely typos
+      only add a did_you_mean hint
+    - MailboxLayer is only asked about addresses the local tier can't classify
     - short timeout
     - treat provider failures as 'unknown' (do not hard-fail)
     - return useful flags for the UI
     """
     try:
         email = request.email
+
+        local = await classify_locally(email)
+        status = local.pop("status")
+        if status == INVALID:
+            return {"valid": False, "source": "local", **local}
+        if status == VALID:
+            return {"valid": True, "source": "local", **local}
+
         base = os.getenv(
             "MAILBOXLAYER_BASE_URL", "https://apilayer.net/api"
         )  # use HTTPS
@@ -744,7 +738,7 @@ async def handoff_exchange(payload: HandoffRequest, response: Response):
     if not code:
         raise HTTPException(status_code=400, detail="Missing code")
 
-    refresh = pop_refresh(code)
+    refresh = await pop_refresh(code)
     if not refresh:
         raise HTTPException(status_code=400, detail="Invalid or expired code")
 
@@ -1,49 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.sql.expression import func
-from app.database import get_db
-from app.models.language import Language
-from app.models.video_reference import VideoReference
-from pydantic import BaseModel
+from app.database import get_read_db
+from app.services import content_cache
+from app.schemas.dictionary import DictionaryItem
 
 router = APIRouter(prefix="/dictionary", tags=["Dictionary"])
 
 
-class DictionaryItem(BaseModel):
-    gloss: str
-    video_url: str
-
-
 @router.get("/", response_model=list[DictionaryItem])
-async def get_dictionary(language: str, db: AsyncSession = Depends(get_db)):
+async def get_dictionary(
+    language: str, request: Request, db: AsyncSession = Depends(get_read_db)
+):
     """
     Fetch one video per gloss in alphabetical order for the selected language.
     """
     try:
-        result = await db.execute(
-            select(
-                VideoReference.gloss,
-                func.min(VideoReference.video_url).label("video_url"),
-            )
-            .join(Language, VideoReference.language_id == Language.id)
-            .where(Language.name == language)
-            .group_by(VideoReference.gloss)
-            .order_by(VideoReference.gloss.asc())
-        )
-        items = result.fetchall()
-
-        if not items:
-            return []
-
-        dictionary = []
-        for item in items:
-            corrected_url = item.video_url.replace(
-                "singlearnavatarstorage", "asl-video-dataset"
-            )
-            dictionary.append({"gloss": item.gloss, "video_url": corrected_url})
-
-        return dictionary
+        # rendered and compressed once per cache fill, served as bytes
+        snapshot = await content_cache.dictionary_snapshot(db, language)
+        return snapshot.response(request.headers.get("accept-encoding", ""))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch dictionary: {str(e)}"
@@ -51,14 +25,13 @@ async def get_dictionary(language: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/languages", response_model=list[str])
-async def get_languages(db: AsyncSession = Depends(get_db)):
+async def get_languages(db: AsyncSession = Depends(get_read_db)):
     """
     Fetch the list of all available languages.
     """
     try:
-        result = await db.execute(select(Language.name).order_by(Language.name.asc()))
-        languages = [row[0] for row in result.fetchall()]
-        return languages
+        languages = await content_cache.languages(db)
+        return sorted(language["name"] for language in languages)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch languages: {str(e)}"
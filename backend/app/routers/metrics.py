@@ -0,0 +1,78 @@
+import os
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app import auth_handoff
+from app.database import engine, read_engine, read_router
+from app.services.mailer import outbox_worker
+from app.services.metrics import CONTENT_TYPE, registry
+from app.services.rate_limit import limiter
+
+# Bearer token for scrapers. Without one /metrics is only served outside
+# production (RENDER unset): it names routes and shows auth counters.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_REQUIRE_TOKEN = os.getenv("RENDER") is not None
+
+router = APIRouter(tags=["Metrics"])
+
+DB_POOL_CHECKED_OUT = registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.", ("pool",)
+)
+DB_POOL_OVERFLOW = registry.gauge(
+    "db_pool_overflow", "Connections opened beyond pool_size.", ("pool",)
+)
+DB_POOL_SIZE = registry.gauge("db_pool_size", "Configured pool size.", ("pool",))
+DB_READS = registry.counter(
+    "db_routed_reads_total", "Read-only sessions handed out, by target.", ("target",)
+)
+HANDOFF_CODES = registry.counter(
+    "oauth_handoff_codes_total", "OAuth handoff codes by outcome.", ("event",)
+)
+RATE_LIMITED = registry.counter(
+    "rate_limit_rejected_total", "Requests rejected by the rate limiter."
+)
+OUTBOX_EMAILS = registry.counter(
+    "email_outbox_emails_total", "Outbox deliveries by result.", ("result",)
+)
+
+
+def collect_app_metrics() -> None:
+    pools = {"primary": engine}
+    if read_engine is not engine:
+        pools["replica"] = read_engine
+    for name, eng in pools.items():
+        pool = eng.pool
+        # SQLite's pools do not track checkouts
+        if not hasattr(pool, "checkedout"):
+            continue
+        DB_POOL_CHECKED_OUT.set(name, value=pool.checkedout())
+        DB_POOL_OVERFLOW.set(name, value=max(pool.overflow(), 0))
+        DB_POOL_SIZE.set(name, value=pool.size())
+
+    DB_READS.set("primary", value=read_router.primary_reads)
+    DB_READS.set("replica", value=read_router.replica_reads)
+    for event, n in auth_handoff.store.counters.items():
+        HANDOFF_CODES.set(event, value=n)
+    RATE_LIMITED.set(value=limiter.rejected)
+    for result, n in outbox_worker.stats.items():
+        OUTBOX_EMAILS.set(result, value=n)
+
+
+registry.add_collector(collect_app_metrics)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Prometheus text exposition of this worker, or of all workers when
+    METRICS_MULTIPROC_DIR is set.
+    """
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not secrets.compare_digest(supplied, METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+    elif METRICS_REQUIRE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(await registry.render(), media_type=CONTENT_TYPE)
@@ -1,30 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, status
+from fastapi import APIRouter, HTTPException, Depends, Response, UploadFile, File, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Query
 from sqlalchemy.future import select
 from typing import List
-from sqlalchemy.orm import selectinload
 from fastapi import Body
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from app.models.task import Task
 from sqlalchemy.sql import text
 from app.schemas.user import TaskCompletionRequest
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.task import TaskResponse
-from app.models.language import Language
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, UserUpdate, PointsUpdateRequest
+from app.schemas.user import (
+    UserCreate,
+    UserResponse,
+    UserUpdate,
+    PointsUpdateRequest,
+    PointsResponse,
+    TopUserResponse,
+)
+from app.schemas.language import LanguageResponse
+from app.schemas.module import UserModuleResponse
 from app.utils.auth import (
     verify_email_verification_token,
     create_email_verification_token,
     hash_password,
     get_current_user_cookie,
 )
-from app.utils.aws_s3 import s3_client, AWS_BUCKET_NAME, AWS_REGION
-from app.utils.email_utils import send_verification_email
+from app.utils.email_utils import queue_verification_email
+from app.services import avatars, content_cache, leaderboard
+from app.services.job_queue import job_worker
+from app.services.task_payload import load_tasks
+from app.services.mailer import outbox_worker
 from app.models.module import Module
 from app.models.lesson import Lesson
-from botocore.exceptions import NoCredentialsError
-import uuid
 import re
 import logging
 
@@ -61,7 +70,7 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/id/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(User).where(User.user_id == user_id))
     user = result.scalar()
     if not user:
@@ -94,6 +103,7 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    await avatars.release(db, user.avatar)
     await db.delete(user)
     await db.commit()
 
@@ -103,47 +113,57 @@ async def get_profile(current_user: User = Depends(get_current_user_cookie)):
     return current_user
 
 
-@router.put("/update-avatar", status_code=200, response_model=dict)
+@router.put("/update-avatar", status_code=202, response_model=dict)
 async def update_avatar(
+    response: Response,
     avatar: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user_cookie),
 ):
-    if avatar.content_type not in ["image/jpeg", "image/png"]:
+    """
+    Accept an avatar for processing. Its resized variants are stored by a
+    media worker, which then points the user's avatar at them; the URL it
+    will have is returned straight away. An image that is already stored
+    is used at once (200).
+    """
+    if avatar.content_type not in ["image/jpeg", "image/png", "image/webp"]:
         raise HTTPException(
-            status_code=400, detail="Only JPEG or PNG files are allowed."
+            status_code=400, detail="Only JPEG, PNG or WebP files are allowed."
         )
 
-    unique_filename = f"{current_user.user_id}_{uuid.uuid4().hex}_{avatar.filename}"
-
+    data = await avatar.read(avatars.AVATAR_MAX_BYTES + 1)
     try:
-        s3_client.upload_fileobj(
-            avatar.file,
-            AWS_BUCKET_NAME,
-            unique_filename,
-            ExtraArgs={"ContentType": avatar.content_type},  # Set content type
-        )
-
-        avatar_url = (
-            f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{unique_filename}"
-        )
+        avatars.probe(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        current_user.avatar = avatar_url
-        await db.commit()
-        await db.refresh(current_user)
-
-        return {"avatar": avatar_url}
-
-    except NoCredentialsError:
-        raise HTTPException(status_code=500, detail="AWS credentials not found.")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading avatar: {str(e)}")
+    avatar_url, processing = await avatars.submit(db, current_user, data)
+    await db.commit()
+    if not processing:
+        response.status_code = status.HTTP_200_OK
+        return {"avatar": avatar_url, "status": "ready"}
+    job_worker.wake("media")
+    return {"avatar": avatar_url, "status": "processing"}
+
+
+@router.get("/{user_id}/avatar", include_in_schema=False)
+async def get_avatar(
+    user_id: int,
+    size: int = Query(avatars.AVATAR_DEFAULT_SIZE, ge=1, le=1024),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Redirect to a user's avatar at the requested size."""
+    result = await db.execute(select(User.avatar).where(User.user_id == user_id))
+    url = avatars.avatar_url(result.scalar(), size)
+    if url is None:
+        raise HTTPException(status_code=404, detail="No avatar")
+    return RedirectResponse(url, headers={"Cache-Control": "public, max-age=300"})
 
 
 @router.get("/dashboard", status_code=status.HTTP_200_OK)
 async def get_dashboard(
     current_user: User = Depends(get_current_user_cookie),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     if current_user.is_admin:
         modules_created_query = await db.execute(
@@ -229,13 +249,7 @@ async def update_profile(
         if existing_email.scalar():
             raise HTTPException(status_code=400, detail="Email is already registered.")
         verification_token = create_email_verification_token(user_update.email)
-        try:
-            await send_verification_email(user_update.email, verification_token)
-        except Exception as e:
-            logger.error(f"Failed to send verification email: {str(e)}")
-            raise HTTPException(
-                status_code=500, detail="Failed to send verification email."
-            )
+        queue_verification_email(db, user_update.email, verification_token)
         user.temp_email = user_update.email
 
     if user_update.password:
@@ -265,6 +279,7 @@ async def update_profile(
         user.password = hash_password(user_update.password)
 
     await db.commit()
+    outbox_worker.wake()
     await db.refresh(user)
     return user
 
@@ -324,102 +339,69 @@ async def update_user_settings(
     return user
 
 
-@router.get("/modules", response_model=list[dict])
+@router.get("/modules", response_model=list[UserModuleResponse])
 async def get_user_modules(
     language_id: int = Query(..., description="Language ID for filtering modules"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user_cookie),
 ):
     """
     Get modules for the current user filtered by language and with status, including lessons.
     """
     try:
-        modules_query = await db.execute(
-            select(Module)
-            .where(Module.language_id == language_id)
-            .order_by(Module.module_id)
-        )
-        all_modules = modules_query.scalars().all()
-
-        user_progress_query = text("""
-            SELECT lesson.module_id, lesson.lesson_id, COUNT(progress.lesson_id) AS lessons_completed
-            FROM lesson
-            LEFT JOIN progress ON progress.lesson_id = lesson.lesson_id
-            AND progress.user_id = :user_id AND progress.is_completed = TRUE
-            GROUP BY lesson.module_id, lesson.lesson_id
-        """)
-        user_progress_result = await db.execute(
-            user_progress_query, {"user_id": current_user.user_id}
-        )
+        modules = await content_cache.catalog(db, language_id)
 
-        user_progress = {
-            row.lesson_id: row.lessons_completed
-            for row in user_progress_result.mappings()
+        progress_result = await db.execute(
+            text(
+                "SELECT lesson_id, is_completed, COALESCE(score, 0) AS score "
+                "FROM progress WHERE user_id = :user_id"
+            ),
+            {"user_id": current_user.user_id},
+        )
+        completed = set()
+        earned = {}
+        for row in progress_result.mappings():
+            earned[row["lesson_id"]] = row["score"]
+            if row["is_completed"]:
+                completed.add(row["lesson_id"])
+
+        lesson_ids_by_module = {
+            module["id"]: [lesson["id"] for lesson in module["lessons"]]
+            for module in modules
         }
 
         response = []
-        for module in all_modules:
-            lessons_query = await db.execute(
-                select(Lesson).where(Lesson.module_id == module.module_id)
-            )
-            lessons = lessons_query.scalars().all()
-
-            lessons_response = []
-            for lesson in lessons:
-                # Fetch total points for the lesson
-                total_points_query = await db.execute(
-                    text(
-                        "SELECT COALESCE(SUM(points), 0) FROM task WHERE lesson_id = :lesson_id"
-                    ),
-                    {"lesson_id": lesson.lesson_id},
-                )
-                total_points = total_points_query.scalar()
-
-                earned_points_query = await db.execute(
-                    text(
-                        "SELECT COALESCE(score, 0) FROM progress WHERE user_id = :user_id AND lesson_id = :lesson_id"
-                    ),
-                    {"user_id": current_user.user_id, "lesson_id": lesson.lesson_id},
-                )
-                earned_points = earned_points_query.scalar()
-
-                lesson_status = (
-                    "completed"
-                    if user_progress.get(lesson.lesson_id)
-                    else "in-progress"
-                )
-                lessons_response.append(
-                    {
-                        "id": lesson.lesson_id,
-                        "title": lesson.title,
-                        "status": lesson_status,
-                        "earned_points": earned_points,
-                        "total_points": total_points,
-                    }
-                )
+        for module in modules:
+            lessons_response = [
+                {
+                    "id": lesson["id"],
+                    "title": lesson["title"],
+                    "status": "completed"
+                    if lesson["id"] in completed
+                    else "in-progress",
+                    "earned_points": earned.get(lesson["id"]),
+                    "total_points": lesson["total_points"],
+                }
+                for lesson in module["lessons"]
+            ]
 
             completed_lessons = sum(
                 1 for lesson in lessons_response if lesson["status"] == "completed"
             )
-            is_completed = completed_lessons == len(lessons)
+            is_completed = completed_lessons == len(lessons_response)
 
             is_unlocked = True
-            if module.prerequisite_mod:
-                prerequisite_module_query = await db.execute(
-                    select(Module).where(Module.module_id == module.prerequisite_mod)
-                )
-                prerequisite_module = prerequisite_module_query.scalar()
-                if prerequisite_module:
-                    prereq_lessons_query = await db.execute(
-                        select(Lesson).where(
-                            Lesson.module_id == prerequisite_module.module_id
-                        )
+            prerequisite = module["prerequisite_mod"]
+            if prerequisite:
+                prereq_lessons = lesson_ids_by_module.get(prerequisite)
+                if prereq_lessons is None:
+                    # prerequisite in another language; rare, not cached
+                    prereq_lessons = await content_cache.module_lesson_ids(
+                        db, prerequisite
                     )
-                    prereq_lessons = prereq_lessons_query.scalars().all()
-                    prereq_completed = all(
-                        user_progress.get(lesson.lesson_id) for lesson in prereq_lessons
-                    )
-                    is_unlocked = prereq_completed
+                is_unlocked = all(
+                    lesson_id in completed for lesson_id in prereq_lessons
+                )
 
             module_status = (
                 "locked"
@@ -431,11 +413,11 @@ async def get_user_modules(
 
             response.append(
                 {
-                    "id": module.module_id,
-                    "title": module.title,
-                    "description": module.description,
+                    "id": module["id"],
+                    "title": module["title"],
+                    "description": module["description"],
                     "lessons_completed": completed_lessons,
-                    "total_lessons": len(lessons),
+                    "total_lessons": len(lessons_response),
                     "status": module_status,
                     "lessons": lessons_response,
                 }
@@ -449,19 +431,12 @@ async def get_user_modules(
         )
 
 
-@router.get("/languages", response_model=list[dict])
-async def get_languages(db: AsyncSession = Depends(get_db)):
+@router.get("/languages", response_model=list[LanguageResponse])
+async def get_languages(db: AsyncSession = Depends(get_read_db)):
     """
     Get all available languages.
     """
-    languages_query = await db.execute(select(Language).order_by(Language.id))
-    languages = languages_query.scalars().all()
-
-    response = [
-        {"id": language.id, "name": language.name, "code": language.code}
-        for language in languages
-    ]
-    return response
+    return await content_cache.languages(db)
 
 
 from sqlalchemy import select
@@ -470,7 +445,8 @@ from sqlalchemy import select
 @router.get("/lessons/{lesson_id}/tasks", response_model=List[TaskResponse])
 async def get_tasks_for_lesson(
     lesson_id: int,
-    db: AsyncSession = Depends(get_db),
+    include_metadata: bool = Query(False, description="Include video_metadata"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user_cookie),
 ):
     """
@@ -480,42 +456,9 @@ async def get_tasks_for_lesson(
     logger.info("Fetching tasks for lesson ID: %s", lesson_id)
 
     try:
-        result = await db.execute(
-            select(Task)
-            .where(Task.lesson_id == lesson_id)
-            .options(selectinload(Task.videos))
-            .order_by(Task.task_id)
-        )
-        tasks = result.scalars().all()
-
-        if not tasks:
-            return []
-
-        task_responses: List[TaskResponse] = []
-        for t in tasks:
-            content = dict(t.content or {})
-            videos = list(t.videos or [])
-
-            if t.task_type == "sign_presentation" and videos:
-                content["video_id"] = videos[0].video_id
-                videos = []
-
-            task_responses.append(
-                TaskResponse(
-                    task_id=t.task_id,
-                    task_type=t.task_type,
-                    content=content,
-                    correct_answer=t.correct_answer,
-                    version=t.version,
-                    points=t.points,
-                    videos=videos,
-                )
-            )
+        tasks = await content_cache.lesson_tasks(db, lesson_id, include_metadata)
+        return ORJSONResponse(tasks)
 
-        return task_responses
-
-    except HTTPException:
-        raise
     except Exception:
         logger.exception("Error fetching tasks for lesson %s", lesson_id)
         raise HTTPException(status_code=500, detail="Failed to fetch tasks")
@@ -524,7 +467,8 @@ async def get_tasks_for_lesson(
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
 async def get_task_by_id(
     task_id: int,
-    db: AsyncSession = Depends(get_db),
+    include_metadata: bool = Query(False, description="Include video_metadata"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user_cookie),
 ):
     """
@@ -532,32 +476,22 @@ async def get_task_by_id(
     """
     logger.info(f"Fetching task ID: {task_id}")
     try:
-        # Fetch task and join related videos
-        task_query = await db.execute(
-            select(Task)
-            .where(Task.task_id == task_id)
-            .options(selectinload(Task.videos))
+        tasks = await load_tasks(
+            db, Task.task_id == task_id, include_metadata=include_metadata
         )
-        task = task_query.scalar()
-
-        if not task:
-            logger.warning(f"Task ID {task_id} not found")
-            raise HTTPException(
-                status_code=404, detail=f"Task with ID {task_id} not found"
-            )
-
-        logger.info(f"Task found: {task}")
-        logger.info(f"Videos associated: {task.videos}")
-
-        return task
     except Exception as e:
         logger.error(f"Error fetching task ID {task_id}: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch the task: {str(e)}"
         )
 
+    if not tasks:
+        logger.warning(f"Task ID {task_id} not found")
+        raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found")
+    return ORJSONResponse(tasks[0])
 
-@router.get("/points", response_model=dict)
+
+@router.get("/points", response_model=PointsResponse)
 async def get_user_points(current_user: User = Depends(get_current_user_cookie)):
     """
     Fetch the current user's points.
@@ -700,33 +634,18 @@ async def complete_task(
         )
 
 
-@router.get("/top-users", response_model=List[dict])
-async def get_top_users(db: AsyncSession = Depends(get_db)):
+@router.get("/top-users", response_model=List[TopUserResponse])
+async def get_top_users(db: AsyncSession = Depends(get_read_db)):
     """
     Get the top 5 users with the highest points, excluding superadmin users, and include their avatars.
     """
     try:
-        result = await db.execute(
-            select(User.username, User.points, User.avatar)
-            .where(User.is_admin == False)
-            .order_by(User.points.desc())
-            .limit(5)
-        )
-        top_users = result.all()
-
-        if not top_users:
-            raise HTTPException(status_code=404, detail="No users found.")
-
-        return [
-            {
-                "username": user.username,
-                "points": user.points,
-                "avatar": f"{user.avatar}" if user.avatar else None,
-            }
-            for user in top_users
-        ]
-
+        top_users = await leaderboard.top_users(db)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch top users: {str(e)}"
         )
+
+    if not top_users:
+        raise HTTPException(status_code=404, detail="No users found.")
+    return top_users
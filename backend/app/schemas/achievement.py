@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class UserAchievementResponse(BaseModel):
+    name: str
+    description: Optional[str]
+    awarded_at: datetime
+
+
+class AchievementHolderResponse(BaseModel):
+    user_id: int
+    username: str
+    awarded_at: datetime
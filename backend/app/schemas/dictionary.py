@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class DictionaryItem(BaseModel):
+    gloss: str
+    video_url: str
@@ -21,3 +21,21 @@ class ModuleResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class LessonProgress(BaseModel):
+    id: int
+    title: str
+    status: str
+    earned_points: Optional[int]
+    total_points: int
+
+
+class UserModuleResponse(BaseModel):
+    id: int
+    title: str
+    description: Optional[str]
+    lessons_completed: int
+    total_lessons: int
+    status: str
+    lessons: list[LessonProgress]
@@ -33,3 +33,13 @@ class PointsUpdateRequest(BaseModel):
 
 class TaskCompletionRequest(BaseModel):
     points_earned: int
+
+
+class PointsResponse(BaseModel):
+    points: Optional[int]
+
+
+class TopUserResponse(BaseModel):
+    username: str
+    points: Optional[int]
+    avatar: Optional[str]
@@ -0,0 +1,362 @@
+"""
+Avatar uploads: the route hands the original image to the job queue, and a
+media worker re-encodes it into square variants and stores them.
+
+Variants live under content-addressed keys, avatars/<sha256 of the
+upload>/<size>.<ext>, so they are cached forever and a user's avatar URL
+can be switched to any configured size. The avatar_blob table counts the
+users pointing at each upload: identical bytes are stored once, and
+variants nobody has used for AVATAR_GC_GRACE are deleted by
+collect_garbage().
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+
+from PIL import Image, ImageOps
+from pydantic import Base64Bytes, BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import text
+
+from app.database import async_session
+from app.models.avatar_blob import AvatarBlob
+from app.models.user import User
+from app.services import storage as storage_service
+from app.services.job_queue import enqueue, job_handler
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZES = tuple(sorted(int(s) for s in os.getenv("AVATAR_SIZES", "64,128,256").split(",")))
+# The size stored on the user; other sizes are derived from it.
+AVATAR_DEFAULT_SIZE = int(os.getenv("AVATAR_DEFAULT_SIZE", 128))
+# "webp" or "jpeg"
+AVATAR_FORMAT = os.getenv("AVATAR_FORMAT", "webp").lower()
+AVATAR_QUALITY = int(os.getenv("AVATAR_QUALITY", 80))
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", 10 * 1024 * 1024))
+AVATAR_MAX_PIXELS = int(os.getenv("AVATAR_MAX_PIXELS", 40_000_000))
+# Unreferenced variants are kept this long: cached pages may still show them.
+AVATAR_GC_GRACE = float(os.getenv("AVATAR_GC_GRACE", 24 * 60 * 60))
+AVATAR_GC_BATCH = int(os.getenv("AVATAR_GC_BATCH", 200))
+AVATAR_UPLOAD_TIMEOUT = 120  # seconds for a media worker to store one upload
+
+ACCEPTED_FORMATS = {"JPEG", "PNG", "WEBP"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_VARIANT_PATH = re.compile(r"(/avatars/([0-9a-f]{64})/)\d+(\.\w+)$")
+
+UPLOADS = registry.counter(
+    "avatar_uploads_total", "Avatar uploads by result: queued, deduplicated or unchanged.", ("result",)
+)
+COLLECTED = registry.counter("avatar_gc_collected_total", "Unreferenced avatar uploads deleted.")
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def variant_key(source_digest: str, size: int, fmt: str = AVATAR_FORMAT) -> str:
+    return f"avatars/{source_digest}/{size}.{EXTENSIONS[fmt]}"
+
+
+def nearest_size(size: int) -> int:
+    """The smallest configured size at least as large as `size`."""
+    return next((s for s in AVATAR_SIZES if s >= size), AVATAR_SIZES[-1])
+
+
+def variant_url(source_digest: str, size: int = AVATAR_DEFAULT_SIZE, storage=None) -> str:
+    storage = storage or storage_service.storage
+    return storage.url(variant_key(source_digest, nearest_size(size)))
+
+
+def avatar_url(avatar: str | None, size: int = AVATAR_DEFAULT_SIZE) -> str | None:
+    """
+    A stored avatar URL switched to another size. Avatars uploaded before
+    variants existed are returned unchanged.
+    """
+    if not avatar:
+        return None
+    return _VARIANT_PATH.sub(rf"\g<1>{nearest_size(size)}\g<3>", avatar)
+
+
+def source_digest(avatar: str | None) -> str | None:
+    """The upload digest in a stored avatar URL, or None for other URLs."""
+    match = _VARIANT_PATH.search(avatar or "")
+    return match.group(2) if match else None
+
+
+def probe(data: bytes) -> None:
+    """Cheap header check for the upload route; raises ValueError."""
+    if len(data) > AVATAR_MAX_BYTES:
+        raise ValueError(f"Avatars are limited to {AVATAR_MAX_BYTES // (1024 * 1024)} MB.")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            format, (width, height) = image.format, image.size
+    except Exception:
+        raise ValueError("The file is not a readable image.")
+    if format not in ACCEPTED_FORMATS:
+        raise ValueError("Only JPEG, PNG or WebP images are allowed.")
+    if width * height > AVATAR_MAX_PIXELS:
+        raise ValueError("The image has too many pixels.")
+
+
+def render_variants(
+    data: bytes, sizes=AVATAR_SIZES, fmt: str = AVATAR_FORMAT
+) -> dict[int, bytes]:
+    """
+    Square, centre-cropped re-encodings of an image at each size. EXIF
+    orientation is applied; EXIF, ICC and other metadata are not copied.
+    CPU-bound: run it in a thread.
+    """
+    probe(data)
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs can be decoded at a fraction of their size, which is most
+        # of the cost for camera photos
+        image.draft("RGB", (max(sizes) * 2, max(sizes) * 2))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha and fmt == "webp" else "RGB")
+
+    side = min(image.size)
+    left, top = (image.width - side) // 2, (image.height - side) // 2
+    square = image.crop((left, top, left + side, top + side))
+
+    variants = {}
+    for size in sorted(sizes, reverse=True):
+        variant = square.resize((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        out = io.BytesIO()
+        if fmt == "webp":
+            variant.save(out, "WEBP", quality=AVATAR_QUALITY, method=4)
+        else:
+            variant.save(out, "JPEG", quality=AVATAR_QUALITY, optimize=True, progressive=True)
+        variants[size] = out.getvalue()
+    return variants
+
+
+async def store_variants(data: bytes, storage=None) -> dict[int, str]:
+    """Render and upload every variant; returns size -> URL."""
+    storage = storage or storage_service.storage
+    source_digest = digest(data)
+    variants = await asyncio.to_thread(render_variants, data)
+    keys = {size: variant_key(source_digest, size) for size in variants}
+    await asyncio.gather(
+        *(
+            storage.put(keys[size], body, CONTENT_TYPES[AVATAR_FORMAT])
+            for size, body in variants.items()
+        )
+    )
+    return {size: storage.url(key) for size, key in keys.items()}
+
+
+async def _retain_stored(db: AsyncSession, source: str) -> bool:
+    """
+    Reference an upload only if its variants are stored, in one statement,
+    so collect_garbage() cannot take them away in between.
+    """
+    result = await db.execute(
+        text(
+            """
+            UPDATE avatar_blob SET refcount = refcount + 1, unreferenced_since = NULL
+            WHERE digest = :digest AND stored
+            """
+        ),
+        {"digest": source},
+    )
+    return result.rowcount == 1
+
+
+async def _claim_upload(db: AsyncSession, source: str) -> bool:
+    """
+    Reference an upload that has no row yet, to store its variants; while
+    they are stored, unreferenced_since holds when they were claimed. False
+    if collect_garbage() is still deleting them (refcount 0) or another job
+    is storing them; a claim older than the job timeout is taken over.
+    """
+    now = time.time()
+    result = await db.execute(
+        text(
+            """
+            INSERT INTO avatar_blob (digest, refcount, stored, unreferenced_since)
+            VALUES (:digest, 1, :stored, :now)
+            ON CONFLICT (digest) DO UPDATE SET unreferenced_since = excluded.unreferenced_since
+            WHERE NOT avatar_blob.stored
+                AND avatar_blob.refcount > 0
+                AND avatar_blob.unreferenced_since < :stale
+            """
+        ),
+        {"digest": source, "stored": False, "now": now, "stale": now - AVATAR_UPLOAD_TIMEOUT},
+    )
+    return result.rowcount == 1
+
+
+async def release(db: AsyncSession, avatar: str | None) -> None:
+    """Drop one reference to a stored avatar, on the caller's session."""
+    source = source_digest(avatar)
+    if source is None:
+        return
+    await db.execute(
+        text(
+            """
+            UPDATE avatar_blob SET
+                refcount = refcount - 1,
+                unreferenced_since = CASE WHEN refcount = 1 THEN :now ELSE unreferenced_since END
+            WHERE digest = :digest AND refcount > 0
+            """
+        ),
+        {"digest": source, "now": time.time()},
+    )
+
+
+async def set_avatar(db: AsyncSession, user_id: int, url: str, previous: str | None) -> bool:
+    """
+    Point a user at `url`, whose upload the caller has referenced, if their
+    avatar is still `previous`, and release that one. If it changed
+    meanwhile the new reference is dropped instead and False returned. The
+    caller commits.
+    """
+    current = User.avatar.is_(None) if previous is None else User.avatar == previous
+    result = await db.execute(
+        update(User).where(User.user_id == user_id, current).values(avatar=url)
+    )
+    if result.rowcount != 1:
+        await release(db, url)
+        return False
+    await release(db, previous)
+    return True
+
+
+class AvatarUpload(BaseModel):
+    user_id: int
+    data: Base64Bytes
+    previous: str | None = None  # the avatar being replaced
+
+
+async def submit(db: AsyncSession, user: User, data: bytes) -> tuple[str, bool]:
+    """
+    Make `data` the user's avatar, on the caller's session. Returns its
+    URL and whether it still has to be processed; bytes already stored
+    are only referenced again.
+    """
+    source = digest(data)
+    url = variant_url(source)
+    if user.avatar == url:
+        UPLOADS.inc("unchanged")
+        return url, False
+    if await _retain_stored(db, source):
+        await set_avatar(db, user.user_id, url, user.avatar)
+        UPLOADS.inc("deduplicated")
+        return url, False
+    enqueue(
+        db,
+        "avatar_upload",
+        {"user_id": user.user_id, "data": base64.b64encode(data).decode(), "previous": user.avatar},
+    )
+    UPLOADS.inc("queued")
+    return url, True
+
+
+@job_handler(
+    "avatar_upload", payload=AvatarUpload, queue="media", max_attempts=3, timeout=AVATAR_UPLOAD_TIMEOUT
+)
+async def process_upload(payload: AvatarUpload) -> None:
+    source = digest(payload.data)
+    url = variant_url(source)
+    async with async_session() as db:
+        if await _retain_stored(db, source):
+            applied = await set_avatar(db, payload.user_id, url, payload.previous)
+            await db.commit()
+            _log_superseded(payload, applied)
+            return
+        claimed = await _claim_upload(db, source)
+        await db.commit()
+    if not claimed:
+        # retried with backoff, by when the other side is done
+        raise RuntimeError(f"upload {source} is being collected or stored by another job")
+
+    try:
+        await store_variants(payload.data)
+    except BaseException:
+        async with async_session() as db:
+            await asyncio.shield(_drop_claim(db, source))
+        raise
+    async with async_session() as db:
+        await db.execute(
+            update(AvatarBlob)
+            .where(AvatarBlob.digest == source)
+            .values(stored=True, unreferenced_since=None)
+        )
+        applied = await set_avatar(db, payload.user_id, url, payload.previous)
+        await db.commit()
+    _log_superseded(payload, applied)
+
+
+async def _drop_claim(db: AsyncSession, source: str) -> None:
+    await db.execute(
+        delete(AvatarBlob).where(AvatarBlob.digest == source, AvatarBlob.stored == False)
+    )
+    await db.commit()
+
+
+def _log_superseded(payload: AvatarUpload, applied: bool) -> None:
+    if not applied:
+        # a later upload won; these variants are collected unless reused
+        logger.info("[avatars] upload for user %s was superseded", payload.user_id)
+
+
+async def collect_garbage(storage=None, batch_size: int = AVATAR_GC_BATCH) -> int:
+    """
+    Delete the variants of uploads nobody has referenced for
+    AVATAR_GC_GRACE, a batch at a time; returns how many uploads.
+
+    A batch is first marked as not stored, so new uploads of the same
+    bytes are not referenced, and their jobs wait until the row is gone
+    before storing the variants again.
+    """
+    storage = storage or storage_service.storage
+    total = 0
+    while True:
+        cutoff = time.time() - AVATAR_GC_GRACE
+        async with async_session() as db:
+            batch = (
+                await db.execute(
+                    select(AvatarBlob.digest)
+                    .where(AvatarBlob.refcount == 0, AvatarBlob.unreferenced_since < cutoff)
+                    .order_by(AvatarBlob.unreferenced_since)
+                    .limit(batch_size)
+                )
+            ).scalars().all()
+            if not batch:
+                break
+            await db.execute(
+                update(AvatarBlob)
+                .where(AvatarBlob.digest.in_(batch), AvatarBlob.refcount == 0)
+                .values(stored=False)
+            )
+            await db.commit()
+
+        await storage.delete(
+            [variant_key(source, size, fmt) for source in batch for size in AVATAR_SIZES for fmt in EXTENSIONS]
+        )
+        async with async_session() as db:
+            await db.execute(
+                delete(AvatarBlob).where(
+                    AvatarBlob.digest.in_(batch),
+                    AvatarBlob.refcount == 0,
+                    AvatarBlob.stored == False,
+                )
+            )
+            await db.commit()
+        total += len(batch)
+        COLLECTED.inc(amount=len(batch))
+        if len(batch) < batch_size:
+            break
+    return total
@@ -0,0 +1,395 @@
+import functools
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import orjson
+from sqlalchemy.sql import text
+
+from app.database import async_session
+from app.services.metrics import registry
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# "db" shares JSON-serializable entries between workers via cache_entry.
+CACHE_SHARED_TIER = os.getenv("CACHE_SHARED_TIER", "none").lower()
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total",
+    "Cache lookups by result: hit, stale, shared_hit or miss.",
+    ("cache", "result"),
+)
+CACHE_EVICTIONS = registry.counter(
+    "cache_evictions_total", "Entries evicted to stay within size limits.", ("cache",)
+)
+CACHE_BYTES = registry.gauge(
+    "cache_bytes", "Approximate size of the in-process tier.", ("cache",)
+)
+CACHE_ENTRIES = registry.gauge("cache_entries", "Entries in the in-process tier.", ("cache",))
+
+
+def sizeof(value) -> int:
+    """Approximate memory cost of a value: its `nbytes`, or its JSON size."""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(orjson.dumps(value))
+    except TypeError:
+        return sys.getsizeof(value)
+
+
+@dataclass
+class Entry:
+    value: object
+    fresh_until: float  # monotonic
+    stale_until: float  # monotonic; served while revalidating until then
+    tags: tuple
+    size: int
+
+
+class MemoryTier:
+    """
+    LRU of key -> Entry, bounded by entry count and approximate bytes, with
+    a tag -> keys index for invalidation.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict[tuple, Entry] = OrderedDict()
+        self._tags: dict[str, set] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: tuple, entry: Entry) -> None:
+        self.delete(key)
+        self._entries[key] = entry
+        self.nbytes += entry.size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            self.delete(next(iter(self._entries)))
+            CACHE_EVICTIONS.inc(self.name)
+        self._update_gauges()
+
+    def delete(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.nbytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        self._update_gauges()
+
+    def invalidate_tags(self, tags) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= self._tags.get(tag, set())
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self.nbytes = 0
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        CACHE_BYTES.set(self.name, value=self.nbytes)
+        CACHE_ENTRIES.set(self.name, value=len(self._entries))
+
+
+class DatabaseTier:
+    """
+    Entries in the cache_entry table, shared by all worker processes.
+    Values are stored as JSON, so only JSON-serializable values belong here.
+    Expiry uses wall-clock time, which every worker agrees on.
+    """
+
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+
+    async def get(self, key: str):
+        async with self.session_factory() as db:
+            row = (
+                await db.execute(
+                    text(
+                        "SELECT value, tags, fresh_until, expires_at FROM cache_entry"
+                        " WHERE cache_key = :key AND expires_at > :now"
+                    ),
+                    {"key": key, "now": time.time()},
+                )
+            ).first()
+        if row is None:
+            return None
+        return orjson.loads(row.value), row.tags.strip("|").split("|"), row.fresh_until, row.expires_at
+
+    async def set(self, key: str, value, tags, fresh_until: float, expires_at: float) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                text(
+                    """
+                    INSERT INTO cache_entry (cache_key, value, tags, fresh_until, expires_at)
+                    VALUES (:key, :value, :tags, :fresh_until, :expires_at)
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        value = excluded.value,
+                        tags = excluded.tags,
+                        fresh_until = excluded.fresh_until,
+                        expires_at = excluded.expires_at
+                    """
+                ),
+                {
+                    "key": key,
+                    "value": orjson.dumps(value),
+                    "tags": "|" + "|".join(tags) + "|",
+                    "fresh_until": fresh_until,
+                    "expires_at": expires_at,
+                },
+            )
+            await db.commit()
+
+    async def invalidate_tags(self, prefix: str, tags) -> None:
+        clauses = " OR ".join(f"tags LIKE :tag{i}" for i in range(len(tags)))
+        params = {f"tag{i}": f"%|{tag}|%" for i, tag in enumerate(tags)}
+        async with self.session_factory() as db:
+            await db.execute(
+                text(f"DELETE FROM cache_entry WHERE cache_key LIKE :prefix AND ({clauses})"),
+                {"prefix": prefix + "%", **params},
+            )
+            await db.commit()
+
+    async def clear(self, prefix: str) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                text("DELETE FROM cache_entry WHERE cache_key LIKE :prefix"),
+                {"prefix": prefix + "%"},
+            )
+            await db.commit()
+
+    async def sweep(self) -> int:
+        """Delete expired rows; returns how many."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                text("DELETE FROM cache_entry WHERE expires_at <= :now"), {"now": time.time()}
+            )
+            await db.commit()
+        return result.rowcount
+
+
+def create_shared_tier(backend: str = CACHE_SHARED_TIER) -> DatabaseTier | None:
+    if backend == "db":
+        return DatabaseTier()
+    if backend != "none":
+        logger.warning("Unknown CACHE_SHARED_TIER %r; caching in-process only", backend)
+    return None
+
+
+class Cache:
+    """
+    Two tiers: a bounded in-process LRU, then an optional shared tier.
+
+    Entries are fresh for `ttl` seconds, then served stale for up to
+    `stale_ttl` more while one background refresh replaces them. Misses
+    are filled once per key however many callers are waiting (single-
+    flight), and a fill that started before an invalidation is returned
+    to its callers but not stored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        shared: DatabaseTier | None = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.memory = MemoryTier(name, max_entries, max_bytes)
+        self.shared = shared
+        self.flight = SingleFlight(name)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def _shared_key(self, key: tuple) -> str:
+        return f"{self.name}:{orjson.dumps(key).decode()}"
+
+    async def _lookup(self, key: tuple) -> Entry | None:
+        entry = self.memory.get(key)
+        if entry is not None or self.shared is None:
+            return entry
+        try:
+            found = await self.shared.get(self._shared_key(key))
+        except Exception:
+            logger.exception("[cache] shared tier read failed for %s", self.name)
+            return None
+        if found is None:
+            return None
+        value, tags, fresh_until, expires_at = found
+        # wall-clock deadlines from the shared tier, as monotonic ones here
+        offset = time.monotonic() - time.time()
+        entry = Entry(value, fresh_until + offset, expires_at + offset, tuple(tags), sizeof(value))
+        self.memory.set(key, entry)
+        CACHE_REQUESTS.inc(self.name, "shared_hit")
+        return entry
+
+    async def get(self, key: tuple):
+        """The cached value, fresh or stale, or None."""
+        entry = await self._lookup(key)
+        return None if entry is None else entry.value
+
+    async def set(self, key: tuple, value, tags=(), ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        tags = tuple(tags)
+        self.memory.set(
+            key, Entry(value, now + ttl, now + ttl + self.stale_ttl, tags, sizeof(value))
+        )
+        if self.shared is not None:
+            wall = time.time()
+            try:
+                await self.shared.set(
+                    self._shared_key(key), value, tags, wall + ttl, wall + ttl + self.stale_ttl
+                )
+            except Exception:
+                logger.exception("[cache] shared tier write failed for %s", self.name)
+
+    async def get_or_load(self, key: tuple, load, tags=(), revalidate=None):
+        """
+        The cached value for `key`, else `await load()` stored under `tags`.
+        A stale value is returned as is when `revalidate` (a coroutine
+        function independent of the caller's request) can refresh it in
+        the background.
+        """
+        entry = await self._lookup(key)
+        if entry is not None:
+            if entry.fresh_until > time.monotonic():
+                self.hits += 1
+                CACHE_REQUESTS.inc(self.name, "hit")
+                return entry.value
+            if revalidate is not None:
+                self.hits += 1
+                CACHE_REQUESTS.inc(self.name, "stale")
+                generation = self.generation
+                self.flight.start(
+                    (generation, *key), lambda: self._refresh(key, revalidate, tags, generation)
+                )
+                return entry.value
+
+        self.misses += 1
+        CACHE_REQUESTS.inc(self.name, "miss")
+        generation = self.generation
+        return await self.flight.do(
+            (generation, *key), lambda: self._fill(key, load, tags, generation)
+        )
+
+    async def _fill(self, key: tuple, load, tags, generation: int):
+        value = await load()
+        if self.generation == generation:
+            await self.set(key, value, tags)
+        return value
+
+    async def _refresh(self, key: tuple, load, tags, generation: int) -> None:
+        try:
+            await self._fill(key, load, tags, generation)
+        except Exception:
+            # the stale entry keeps being served until it expires
+            logger.exception("[cache] background refresh failed for %s %s", self.name, key)
+
+    def evict_local(self, *tags: str) -> None:
+        """Drop in-process entries carrying any of `tags`, or all of them."""
+        self.generation += 1
+        if tags:
+            self.memory.invalidate_tags(tags)
+        else:
+            self.memory.clear()
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        self.evict_local(*tags)
+        if self.shared is not None and tags:
+            try:
+                await self.shared.invalidate_tags(f"{self.name}:", tags)
+            except Exception:
+                logger.exception("[cache] shared tier invalidation failed for %s", self.name)
+
+    async def clear(self) -> None:
+        self.evict_local()
+        if self.shared is not None:
+            try:
+                await self.shared.clear(f"{self.name}:")
+            except Exception:
+                logger.exception("[cache] shared tier clear failed for %s", self.name)
+
+
+def cached(cache: Cache, key, tags=None, session_factory=None):
+    """
+    Cache an async `fn(db, *args)` in `cache` under `key(*args)`, tagged
+    with `tags(*args)`.
+
+    With a `session_factory`, misses and background refreshes run `fn` on
+    a session of their own, and stale entries are served while a refresh
+    runs. A fill is shared by every caller waiting on the key and outlives
+    the request that started it, so it must not use that request's
+    session, which is closed if the request is cancelled. Without a
+    factory the first caller's `db` is used. The factory is read from
+    `wrapper.session_factory` on each call, so it can be swapped.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(db, *args):
+            async def own_session():
+                async with wrapper.session_factory() as own_db:
+                    return await fn(own_db, *args)
+
+            if wrapper.session_factory is None:
+                load, revalidate = (lambda: fn(db, *args)), None
+            else:
+                load = revalidate = own_session
+            return await cache.get_or_load(
+                key(*args),
+                load,
+                tags=tags(*args) if tags else (),
+                revalidate=revalidate,
+            )
+
+        wrapper.cache = cache
+        wrapper.session_factory = session_factory
+        return wrapper
+
+    return decorator
@@ -0,0 +1,181 @@
+import gzip
+import os
+import zlib
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+from app.services.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+# Per-request compression trades ratio for CPU; snapshots are compressed
+# once per cache fill, so they use the slowest, smallest settings.
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+SNAPSHOT_GZIP_LEVEL = int(os.getenv("SNAPSHOT_GZIP_LEVEL", 9))
+SNAPSHOT_BROTLI_QUALITY = int(os.getenv("SNAPSHOT_BROTLI_QUALITY", 11))
+
+# Preferred first when the client weights them equally.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+COMPRESSED_RESPONSES = registry.counter(
+    "http_compressed_responses_total",
+    "Compressed responses by encoding; snapshot means served precompressed.",
+    ("encoding", "mode"),
+)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """The best encoding we support from an Accept-Encoding header, or None."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int | None = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def _compressor(encoding: str):
+    """(compress_chunk, finish) for a streamed body."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        return (lambda chunk: c.process(chunk) + c.flush()), c.finish
+    c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (lambda chunk: c.compress(chunk) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+class Snapshot:
+    """
+    A JSON body rendered once, with every supported encoding compressed
+    up front, so serving it costs no serialization or compression.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.variants = {}
+        if len(body) >= COMPRESS_MIN_SIZE:
+            for encoding in ENCODINGS:
+                level = SNAPSHOT_BROTLI_QUALITY if encoding == "br" else SNAPSHOT_GZIP_LEVEL
+                self.variants[encoding] = compress(body, encoding, level)
+        self.nbytes = len(body) + sum(len(v) for v in self.variants.values())
+
+    @classmethod
+    def of(cls, data) -> "Snapshot":
+        return cls(orjson.dumps(data))
+
+    def response(self, accept_encoding: str) -> Response:
+        encoding = negotiate(accept_encoding) if self.variants else None
+        if encoding is None:
+            return Response(self.body, media_type=self.media_type)
+        COMPRESSED_RESPONSES.inc(encoding, "snapshot")
+        return Response(
+            self.variants[encoding],
+            media_type=self.media_type,
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+
+class CompressionMiddleware:
+    """
+    Compresses compressible responses of at least `minimum_size` bytes with
+    the client's preferred encoding. Responses that already carry a
+    Content-Encoding (snapshots) pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+        compress_chunk = finish = None
+
+        async def send_compressed(message):
+            nonlocal start, passthrough, compress_chunk, finish
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = "content-encoding" in headers or not content_type.startswith(
+                    COMPRESSIBLE_TYPES
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compress_chunk is not None:
+                chunk = compress_chunk(body) if more_body else compress_chunk(body) + finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body and len(body) < self.minimum_size:
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            COMPRESSED_RESPONSES.inc(encoding, "dynamic")
+            if more_body:
+                del headers["Content-Length"]
+                compress_chunk, finish = _compressor(encoding)
+                body = compress_chunk(body)
+            else:
+                body = compress(body, encoding)
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
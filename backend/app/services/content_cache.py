@@ -0,0 +1,203 @@
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.language import Language
+from app.models.lesson import Lesson
+from app.models.module import Module
+from app.models.task import Task
+from app.models.video_reference import VideoReference
+from app.services.cache import Cache, cached, create_shared_tier
+from app.services.compression import Snapshot
+from app.services.invalidation import bus
+from app.services.task_payload import load_tasks
+from app.services.url_signing import url_signer
+
+# Languages, the module/lesson catalog, lesson tasks and the dictionary
+# change only through the admin routes, which invalidate by tag in every
+# worker over the invalidation bus; the TTL only backs up a lost message.
+# Fills read the primary: the first request after an admin write refills
+# at once, when a replica may not have that write yet, and whatever it
+# reads is kept for the whole TTL.
+CONTENT_CACHE_TTL = float(os.getenv("CONTENT_CACHE_TTL", 60 * 60))
+CONTENT_CACHE_STALE_TTL = float(os.getenv("CONTENT_CACHE_STALE_TTL", 60))
+
+cache = Cache(
+    "content", CONTENT_CACHE_TTL, CONTENT_CACHE_STALE_TTL, shared=create_shared_tier()
+)
+# Rendered bytes are not JSON, so they stay in-process.
+snapshots = Cache("snapshots", CONTENT_CACHE_TTL, CONTENT_CACHE_STALE_TTL)
+
+
+@cached(
+    cache,
+    key=lambda: ("languages",),
+    tags=lambda: ("languages",),
+    session_factory=async_session,
+)
+async def languages(db: AsyncSession) -> list[dict]:
+    """All languages ordered by id, as {id, name, code}."""
+    result = await db.execute(select(Language).order_by(Language.id))
+    return [
+        {"id": language.id, "name": language.name, "code": language.code}
+        for language in result.scalars()
+    ]
+
+
+@cached(
+    cache,
+    key=lambda language: ("dictionary", language),
+    tags=lambda language: ("dictionary",),
+    session_factory=async_session,
+)
+async def dictionary(db: AsyncSession, language: str) -> list[dict]:
+    """One video per gloss in alphabetical order, for a language name."""
+    result = await db.execute(
+        select(
+            VideoReference.gloss,
+            func.min(VideoReference.video_url).label("video_url"),
+        )
+        .join(Language, VideoReference.language_id == Language.id)
+        .where(Language.name == language)
+        .group_by(VideoReference.gloss)
+        .order_by(VideoReference.gloss.asc())
+    )
+    return [
+        {
+            "gloss": row.gloss,
+            "video_url": row.video_url.replace(
+                "singlearnavatarstorage", "asl-video-dataset"
+            ),
+        }
+        for row in result
+    ]
+
+
+# Entries holding presigned URLs are keyed by the signing window, so none
+# is served after its window (and its URLs' reuse period) has ended.
+@cached(
+    snapshots,
+    key=lambda language: ("dictionary", language, url_signer.window_start()),
+    tags=lambda language: ("dictionary",),
+    session_factory=async_session,
+)
+async def dictionary_snapshot(db: AsyncSession, language: str) -> Snapshot:
+    """The dictionary with signed URLs, rendered and precompressed."""
+    return Snapshot.of(url_signer.sign_rows(await dictionary(db, language)))
+
+
+@cached(
+    cache,
+    key=lambda language_id: ("catalog", language_id),
+    tags=lambda language_id: ("catalog", f"language:{language_id}"),
+    session_factory=async_session,
+)
+async def catalog(db: AsyncSession, language_id: int) -> list[dict]:
+    """
+    Modules of a language (ordered by id) with their lessons and each
+    lesson's total task points, in three queries.
+    """
+    modules = (
+        await db.execute(
+            select(Module)
+            .where(Module.language_id == language_id)
+            .order_by(Module.module_id)
+        )
+    ).scalars().all()
+    module_ids = [module.module_id for module in modules]
+
+    lessons = (
+        await db.execute(
+            select(Lesson.lesson_id, Lesson.title, Lesson.module_id)
+            .where(Lesson.module_id.in_(module_ids))
+            .order_by(Lesson.lesson_id)
+        )
+    ).all()
+    points = dict(
+        (
+            await db.execute(
+                select(Task.lesson_id, func.coalesce(func.sum(Task.points), 0))
+                .where(Task.lesson_id.in_([lesson.lesson_id for lesson in lessons]))
+                .group_by(Task.lesson_id)
+            )
+        ).all()
+    )
+
+    by_module: dict[int, list[dict]] = {module_id: [] for module_id in module_ids}
+    for lesson in lessons:
+        by_module[lesson.module_id].append(
+            {
+                "id": lesson.lesson_id,
+                "title": lesson.title,
+                "total_points": points.get(lesson.lesson_id, 0),
+            }
+        )
+
+    return [
+        {
+            "id": module.module_id,
+            "title": module.title,
+            "description": module.description,
+            "prerequisite_mod": module.prerequisite_mod,
+            "lessons": by_module[module.module_id],
+        }
+        for module in modules
+    ]
+
+
+@cached(
+    cache,
+    key=lambda lesson_id, include_metadata: (
+        "lesson_tasks", lesson_id, include_metadata, url_signer.window_start()
+    ),
+    tags=lambda lesson_id, include_metadata: ("lessons", f"lesson:{lesson_id}"),
+    session_factory=async_session,
+)
+async def lesson_tasks(
+    db: AsyncSession, lesson_id: int, include_metadata: bool
+) -> list[dict]:
+    """Task payloads of a lesson as learners see them."""
+    return await load_tasks(
+        db,
+        Task.lesson_id == lesson_id,
+        include_metadata=include_metadata,
+        inline_presentation_video=True,
+    )
+
+
+async def module_lesson_ids(db: AsyncSession, module_id: int) -> list[int]:
+    result = await db.execute(
+        select(Lesson.lesson_id).where(Lesson.module_id == module_id)
+    )
+    return list(result.scalars())
+
+
+async def prime(db: AsyncSession) -> int:
+    """Fill the cache for every language; returns the number of entries."""
+    for language in await languages(db):
+        await catalog(db, language["id"])
+        await dictionary_snapshot(db, language["name"])
+    return len(cache) + len(snapshots)
+
+
+async def invalidate(*tags: str) -> None:
+    """
+    Drop entries carrying any of `tags`, or everything without tags, here
+    and in the shared tier, then tell the other workers.
+    """
+    for c in (cache, snapshots):
+        if tags:
+            await c.invalidate_tags(*tags)
+        else:
+            await c.clear()
+    await bus.publish(*tags)
+
+
+def evict_local(tags: tuple) -> None:
+    for c in (cache, snapshots):
+        c.evict_local(*tags)
+
+
+bus.subscribe(evict_local)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+import orjson
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql import text
+
+from app.database import async_session, create_engine, engine
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "true").lower() == "true"
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+# Polling fallback (SQLite, local dev): how often to look for new rows and
+# how long rows are kept for workers that are slow to catch up.
+INVALIDATION_POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", 2))
+INVALIDATION_RETENTION = float(os.getenv("INVALIDATION_RETENTION", 60 * 60))
+# LISTEN connection liveness check.
+INVALIDATION_PING_INTERVAL = float(os.getenv("INVALIDATION_PING_INTERVAL", 30))
+
+INVALIDATIONS = registry.counter(
+    "cache_invalidations_total",
+    "Cross-worker invalidation messages, sent or received.",
+    ("direction",),
+)
+
+
+class InvalidationBus:
+    """
+    Broadcasts cache tags to every worker. On Postgres a message is a
+    NOTIFY on INVALIDATION_CHANNEL, received over a dedicated LISTEN
+    connection; elsewhere it is a cache_invalidation row that workers poll.
+
+    A worker ignores its own messages (it has already evicted locally).
+    An empty tag list means "drop everything"; it is also what a worker
+    applies to itself after its LISTEN connection was lost, since
+    messages sent meanwhile are gone.
+    """
+
+    def __init__(
+        self, engine=engine, session_factory=async_session, enabled: bool = INVALIDATION_BUS
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.origin = uuid.uuid4().hex
+        self.sent = 0
+        self.received = 0
+        self._handlers = []
+        self._last_id = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def uses_notify(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    def subscribe(self, handler) -> None:
+        """`handler(tags)` runs for every message from another worker."""
+        self._handlers.append(handler)
+
+    async def publish(self, *tags: str) -> None:
+        if not self.enabled:
+            return
+        payload = orjson.dumps({"origin": self.origin, "tags": tags}).decode()
+        try:
+            async with self.session_factory() as db:
+                if self.uses_notify:
+                    await db.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        {"channel": INVALIDATION_CHANNEL, "payload": payload},
+                    )
+                else:
+                    await db.execute(
+                        text(
+                            "INSERT INTO cache_invalidation (payload, created_at)"
+                            " VALUES (:payload, :now)"
+                        ),
+                        {"payload": payload, "now": time.time()},
+                    )
+                await db.commit()
+        except Exception:
+            # other workers catch up when their entries expire
+            logger.exception("[invalidation] publish failed for %s", tags)
+            return
+        self.sent += 1
+        INVALIDATIONS.inc("sent")
+
+    def _deliver(self, payload: str) -> None:
+        message = orjson.loads(payload)
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        INVALIDATIONS.inc("received")
+        self._apply(tuple(message.get("tags", ())))
+
+    def _apply(self, tags: tuple) -> None:
+        for handler in self._handlers:
+            try:
+                handler(tags)
+            except Exception:
+                logger.exception("[invalidation] handler failed for %s", tags)
+
+    async def _listen(self) -> None:
+        # its own engine without a pool, so LISTEN never holds a pool slot
+        listen_engine = create_engine(
+            self.engine.url.render_as_string(hide_password=False), poolclass=NullPool
+        )
+        connected_before = False
+        try:
+            while True:
+                try:
+                    async with listen_engine.connect() as conn:
+                        raw = await conn.get_raw_connection()
+                        pg = raw.driver_connection
+                        await pg.add_listener(
+                            INVALIDATION_CHANNEL, lambda *args: self._deliver(args[-1])
+                        )
+                        if connected_before:
+                            self._apply(())
+                        connected_before = True
+                        while True:
+                            await asyncio.sleep(INVALIDATION_PING_INTERVAL)
+                            await pg.execute("SELECT 1")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("[invalidation] LISTEN connection lost: %s", e)
+                    await asyncio.sleep(min(INVALIDATION_PING_INTERVAL, 5))
+        finally:
+            await listen_engine.dispose()
+
+    async def poll_once(self) -> int:
+        """Deliver rows newer than the last one seen; returns how many."""
+        async with self.session_factory() as db:
+            if self._last_id is None:
+                self._last_id = (
+                    await db.execute(text("SELECT COALESCE(MAX(id), 0) FROM cache_invalidation"))
+                ).scalar()
+                return 0
+            rows = (
+                await db.execute(
+                    text(
+                        "SELECT id, payload FROM cache_invalidation"
+                        " WHERE id > :last ORDER BY id"
+                    ),
+                    {"last": self._last_id},
+                )
+            ).all()
+            await db.execute(
+                text("DELETE FROM cache_invalidation WHERE created_at < :cutoff"),
+                {"cutoff": time.time() - INVALIDATION_RETENTION},
+            )
+            await db.commit()
+        for row in rows:
+            self._last_id = row.id
+            self._deliver(row.payload)
+        return len(rows)
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[invalidation] poll failed: %s", e)
+            await asyncio.sleep(INVALIDATION_POLL_INTERVAL)
+
+    def start(self) -> None:
+        if self.enabled and (self._task is None or self._task.done()):
+            run = self._listen if self.uses_notify else self._poll
+            self._task = asyncio.create_task(run(), name="cache-invalidation")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+bus = InvalidationBus()
@@ -0,0 +1,381 @@
+"""
+Durable background jobs stored in the job_queue table.
+
+    python -m app.services.job_queue [--queues default,media]
+
+runs a worker as its own process; with JOB_WORKER=true (the default) every
+web worker also runs one from the lifespan.
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import random
+import signal
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session
+from app.models.queued_job import QueuedJob
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER = os.getenv("JOB_WORKER", "true").lower() == "true"
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", 10))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", 60 * 60))
+# A claimed job is retried by another worker if its runner dies mid-job.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_SHUTDOWN_GRACE = float(os.getenv("JOB_SHUTDOWN_GRACE", 10))
+# "queue=n,..." jobs run at once per queue, per worker
+JOB_QUEUE_CONCURRENCY = {
+    name.strip(): int(n)
+    for name, _, n in (
+        part.partition("=") for part in os.getenv("JOB_QUEUE_CONCURRENCY", "default=4,media=2").split(",")
+    )
+    if name.strip()
+}
+# Modules whose import registers handlers; the standalone worker imports them.
+HANDLER_MODULES: tuple[str, ...] = ("app.services.avatars",)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+JOB_RUNS = registry.counter(
+    "job_queue_runs_total", "Job attempts by queue, kind and outcome.", ("queue", "kind", "result")
+)
+JOB_DURATION = registry.histogram(
+    "job_queue_duration_seconds", "Job handler run time.", ("kind",)
+)
+JOB_LAG = registry.histogram(
+    "job_queue_lag_seconds", "Time from a job being due to it starting.", ("queue",)
+)
+
+
+@dataclass(frozen=True)
+class Handler:
+    kind: str
+    fn: object  # async fn(payload) -> None
+    payload: type[BaseModel]
+    queue: str
+    max_attempts: int
+    timeout: float | None
+
+
+handlers: dict[str, Handler] = {}
+
+
+def job_handler(
+    kind: str,
+    payload: type[BaseModel],
+    queue: str = "default",
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    timeout: float | None = None,
+):
+    """Register an async `fn(payload)` to run jobs of `kind`."""
+
+    def decorator(fn):
+        handlers[kind] = Handler(kind, fn, payload, queue, max_attempts, timeout)
+        return fn
+
+    return decorator
+
+
+def enqueue(db: AsyncSession, kind: str, payload, delay: float = 0) -> QueuedJob:
+    """
+    Add a job on the caller's session. It is committed together with the
+    handler's own writes; call job_worker.wake() after the commit.
+    """
+    handler = handlers.get(kind)
+    if handler is None:
+        raise ValueError(f"no job handler registered for {kind!r}")
+    if not isinstance(payload, handler.payload):
+        payload = handler.payload.model_validate(payload)
+    item = QueuedJob(
+        queue=handler.queue,
+        kind=kind,
+        payload=payload.model_dump(mode="json"),
+        status=PENDING,
+        attempts=0,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(item)
+    return item
+
+
+def backoff_delay(attempts: int) -> float:
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def _max_attempts(kind: str) -> int:
+    handler = handlers.get(kind)
+    return handler.max_attempts if handler else 1
+
+
+@dataclass
+class _Claimed:
+    job_id: int
+    queue: str
+    kind: str
+    payload: dict
+    attempts: int
+    due: datetime
+
+
+class JobWorker:
+    """
+    Runs queued jobs, up to a configured number at a time per queue.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED on Postgres;
+    every claim is also a conditional UPDATE on the status and due time
+    seen, which is what keeps two SQLite processes from taking the same
+    job. An attempt is counted when the job is claimed, so one whose runner
+    dies holding it uses up attempts too. A failed job is retried with
+    exponential backoff and dead-lettered after its handler's max_attempts;
+    an expired lease on the last attempt dead-letters it at the next claim.
+    """
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        concurrency: dict[str, int] | None = None,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = dict(concurrency or JOB_QUEUE_CONCURRENCY)
+        self.poll_interval = poll_interval
+        self.stats = {DONE: 0, "retried": 0, DEAD: 0}
+        self._wakeups = {queue: asyncio.Event() for queue in self.concurrency}
+        self._tasks: list[asyncio.Task] = []
+        self._running: set[asyncio.Task] = set()
+
+    def wake(self, queue: str = "default") -> None:
+        """Hint that a job was committed so the queue doesn't wait for the next poll."""
+        event = self._wakeups.get(queue)
+        if event is not None:
+            event.set()
+
+    async def _claim(self, queue: str, limit: int) -> list[_Claimed]:
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=JOB_LEASE_SECONDS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(QueuedJob)
+                .where(
+                    QueuedJob.queue == queue,
+                    QueuedJob.status.in_((PENDING, RUNNING)),
+                    QueuedJob.run_at <= now,
+                )
+                .order_by(QueuedJob.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            claimed, expired = [], []
+            for item in result.scalars().all():
+                if item.status == RUNNING and item.attempts >= _max_attempts(item.kind):
+                    # its last runner died holding it
+                    values = {
+                        "status": DEAD,
+                        "finished_at": now,
+                        "last_error": "lease expired on the last attempt",
+                    }
+                else:
+                    values = {"status": RUNNING, "run_at": lease, "attempts": item.attempts + 1}
+                taken = await db.execute(
+                    update(QueuedJob)
+                    .where(
+                        QueuedJob.job_id == item.job_id,
+                        QueuedJob.status == item.status,
+                        QueuedJob.run_at == item.run_at,
+                    )
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if taken.rowcount != 1:
+                    continue
+                if values["status"] == DEAD:
+                    expired.append(item)
+                else:
+                    claimed.append(
+                        _Claimed(item.job_id, queue, item.kind, item.payload, item.attempts + 1, item.run_at)
+                    )
+            await db.commit()
+        for item in expired:
+            logger.error(
+                "[jobs] %s job %s dead-lettered: lease expired after %s attempts",
+                item.kind, item.job_id, item.attempts,
+            )
+            self.stats[DEAD] += 1
+            JOB_RUNS.inc(queue, item.kind, DEAD)
+        return claimed
+
+    async def _execute(self, job: _Claimed) -> str | None:
+        """Run a job's handler; returns an error message, or None on success."""
+        handler = handlers.get(job.kind)
+        if handler is None:
+            return f"no handler registered for {job.kind!r}"
+        JOB_LAG.observe(max(0.0, (datetime.utcnow() - job.due).total_seconds()), job.queue)
+        start = time.perf_counter()
+        try:
+            payload = handler.payload.model_validate(job.payload)
+            await asyncio.wait_for(handler.fn(payload), handler.timeout)
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("[jobs] %s job %s failed: %s", job.kind, job.job_id, e)
+            return str(e) or e.__class__.__name__
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - start, job.kind)
+
+    async def _record(self, job: _Claimed, error: str | None) -> None:
+        attempts = job.attempts  # counted at claim time
+        now = datetime.utcnow()
+        if error is None:
+            values = {"status": DONE, "finished_at": now, "last_error": None}
+            result = DONE
+        elif attempts >= _max_attempts(job.kind):
+            values = {"status": DEAD, "finished_at": now, "last_error": error[:500]}
+            result = DEAD
+            logger.error(
+                "[jobs] %s job %s dead-lettered after %s attempts: %s",
+                job.kind, job.job_id, attempts, error,
+            )
+        else:
+            values = {
+                "status": PENDING,
+                "last_error": error[:500],
+                "run_at": now + timedelta(seconds=backoff_delay(attempts)),
+            }
+            result = "retried"
+        async with self.session_factory() as db:
+            await db.execute(
+                update(QueuedJob)
+                .where(QueuedJob.job_id == job.job_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        self.stats[result] += 1
+        JOB_RUNS.inc(job.queue, job.kind, result)
+
+    async def _process(self, job: _Claimed) -> None:
+        await self._record(job, await self._execute(job))
+
+    async def run_once(self, queue: str = "default") -> int:
+        """Claim and run one batch of due jobs; returns how many ran."""
+        jobs = await self._claim(queue, self.concurrency.get(queue, 1))
+        await asyncio.gather(*(self._process(job) for job in jobs))
+        return len(jobs)
+
+    async def drain(self, queue: str = "default") -> int:
+        """Run due jobs until none are left; for tests and scripts."""
+        total = 0
+        while processed := await self.run_once(queue):
+            total += processed
+        return total
+
+    async def _consume(self, queue: str, concurrency: int) -> None:
+        running: set[asyncio.Task] = set()
+        wakeup = self._wakeups[queue]
+        while True:
+            free = concurrency - len(running)
+            try:
+                jobs = await self._claim(queue, free) if free else []
+            except Exception:
+                logger.exception("[jobs] claiming from %s failed", queue)
+                jobs = []
+            for job in jobs:
+                task = asyncio.create_task(self._process(job), name=f"job-{job.job_id}")
+                for tracked in (running, self._running):
+                    tracked.add(task)
+                    task.add_done_callback(tracked.discard)
+            if jobs and len(running) < concurrency:
+                continue  # there may be more due right now
+
+            waiter = asyncio.create_task(wakeup.wait())
+            try:
+                await asyncio.wait(
+                    {waiter, *running},
+                    timeout=self.poll_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                waiter.cancel()
+            wakeup.clear()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        load_handlers()
+        for queue, concurrency in self.concurrency.items():
+            self._tasks.append(
+                asyncio.create_task(self._consume(queue, concurrency), name=f"jobs-{queue}")
+            )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # let running jobs finish; any cut off are re-run once their lease ends
+        if self._running:
+            _, pending = await asyncio.wait(self._running, timeout=JOB_SHUTDOWN_GRACE)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+job_worker = JobWorker()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the background job worker.")
+    parser.add_argument(
+        "--queues",
+        help="comma-separated queues to serve (default: all configured in JOB_QUEUE_CONCURRENCY)",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    concurrency = JOB_QUEUE_CONCURRENCY
+    if args.queues:
+        concurrency = {q: JOB_QUEUE_CONCURRENCY.get(q, 1) for q in args.queues.split(",")}
+
+    async def serve():
+        from app.database import dispose_engines
+
+        worker = JobWorker(concurrency=concurrency)
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+        worker.start()
+        logger.info("[jobs] worker serving %s", concurrency)
+        await stopping.wait()
+        await worker.stop()
+        await dispose_engines()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_read_session
+from app.models.user import User
+from app.services.avatars import avatar_url
+from app.services.cache import Cache, cached, create_shared_tier
+
+# Points change on every completed task, so the board is not invalidated
+# on writes; it is simply allowed to lag by up to the TTL.
+LEADERBOARD_TTL = float(os.getenv("LEADERBOARD_TTL", 30))
+LEADERBOARD_STALE_TTL = float(os.getenv("LEADERBOARD_STALE_TTL", 30))
+LEADERBOARD_SIZE = 5
+LEADERBOARD_AVATAR_SIZE = 64
+
+cache = Cache(
+    "leaderboard", LEADERBOARD_TTL, LEADERBOARD_STALE_TTL, shared=create_shared_tier()
+)
+
+
+@cached(
+    cache,
+    key=lambda: ("top_users",),
+    tags=lambda: ("leaderboard",),
+    session_factory=async_read_session,
+)
+async def top_users(db: AsyncSession) -> list[dict]:
+    """The highest-scoring non-admin users with their avatars."""
+    result = await db.execute(
+        select(User.username, User.points, User.avatar)
+        .where(User.is_admin == False)
+        .order_by(User.points.desc())
+        .limit(LEADERBOARD_SIZE)
+    )
+    return [
+        {
+            "username": user.username,
+            "points": user.points,
+            "avatar": avatar_url(user.avatar, LEADERBOARD_AVATAR_SIZE),
+        }
+        for user in result
+    ]
+
+
+async def refresh() -> list[dict]:
+    """Recompute the board into the cache, so no request waits for it."""
+    async with async_read_session() as db:
+        value = await top_users.__wrapped__(db)
+    await cache.set(("top_users",), value, tags=("leaderboard",))
+    return value
@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import aiosmtplib
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session
+from app.models.email_outbox import EmailOutbox
+
+if TYPE_CHECKING:
+    from fastapi_mail import ConnectionConfig
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 20))
+OUTBOX_POLL_INTERVAL = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", 5))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_BACKOFF_BASE = float(os.getenv("EMAIL_OUTBOX_BACKOFF_BASE", 30))
+OUTBOX_BACKOFF_MAX = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX", 60 * 60))
+# A claimed row is retried by another worker if its sender dies mid-batch.
+OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 120))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+@lru_cache(maxsize=1)
+def get_mail_config() -> "ConnectionConfig":
+    """
+    The one SMTP configuration for the app, built on first use.
+    """
+    from fastapi_mail import ConnectionConfig
+
+    return ConnectionConfig(
+        MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
+        MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
+        MAIL_FROM=os.getenv("MAIL_FROM"),
+        MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
+        MAIL_SERVER=os.getenv("MAIL_SERVER"),
+        MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "SignLearn"),
+        MAIL_STARTTLS=_env_flag("MAIL_STARTTLS", "True"),
+        MAIL_SSL_TLS=_env_flag("MAIL_SSL_TLS", "False"),
+        USE_CREDENTIALS=_env_flag("MAIL_USE_CREDENTIALS", "True"),
+        VALIDATE_CERTS=_env_flag("MAIL_VALIDATE_CERTS", "True"),
+    )
+
+
+def enqueue_email(
+    db: AsyncSession, recipient: str, subject: str, body: str, subtype: str = "html"
+) -> EmailOutbox:
+    """
+    Add an email to the outbox on the caller's session.
+    It is committed together with the handler's own writes and sent later
+    by the background worker.
+    """
+    item = EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        subtype=subtype,
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(item)
+    return item
+
+
+def build_message(item: EmailOutbox, conf: "ConnectionConfig") -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((conf.MAIL_FROM_NAME or "", conf.MAIL_FROM))
+    message["To"] = item.recipient
+    message["Subject"] = item.subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(item.body, subtype=item.subtype)
+    return message
+
+
+def backoff_delay(attempts: int) -> float:
+    delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SMTPSender:
+    """
+    Keeps one authenticated SMTP connection open and reuses it across messages,
+    reconnecting transparently if the server dropped it.
+    """
+
+    def __init__(self, config: "ConnectionConfig | None" = None):
+        self._config = config
+        self._smtp: aiosmtplib.SMTP | None = None
+        self.last_used = 0.0
+        self.connections_opened = 0
+
+    @property
+    def config(self) -> "ConnectionConfig":
+        if self._config is None:
+            self._config = get_mail_config()
+        return self._config
+
+    @property
+    def is_connected(self) -> bool:
+        return self._smtp is not None and self._smtp.is_connected
+
+    async def _connect(self) -> None:
+        await self.close()
+        conf = self.config
+        smtp = aiosmtplib.SMTP(
+            hostname=conf.MAIL_SERVER,
+            port=conf.MAIL_PORT,
+            use_tls=conf.MAIL_SSL_TLS,
+            start_tls=conf.MAIL_STARTTLS,
+            validate_certs=conf.VALIDATE_CERTS,
+            timeout=conf.TIMEOUT,
+        )
+        await smtp.connect()
+        if conf.USE_CREDENTIALS:
+            await smtp.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD.get_secret_value())
+        self._smtp = smtp
+        self.connections_opened += 1
+
+    async def send(self, message: EmailMessage) -> None:
+        if not self.is_connected:
+            await self._connect()
+        try:
+            await self._smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            await self._connect()
+            await self._smtp.send_message(message)
+        self.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            smtp.close()
+
+
+class OutboxWorker:
+    """
+    Drains the email outbox in batches over a reused SMTP connection.
+    Failed sends are retried with exponential backoff and moved to the
+    dead status after OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        sender: SMTPSender | None = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.session_factory = session_factory
+        self.sender = sender or SMTPSender()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stats = {SENT: 0, "retried": 0, DEAD: 0}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def wake(self) -> None:
+        """
+        Hint that new mail was committed so the worker doesn't wait for the next poll.
+        """
+        self._wakeup.set()
+
+    async def _claim(self) -> list[EmailOutbox]:
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(EmailOutbox)
+                .where(
+                    EmailOutbox.status.in_((PENDING, SENDING)),
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            items = result.scalars().all()
+            for item in items:
+                item.status = SENDING
+                item.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+            await db.commit()
+            return list(items)
+
+    async def _record(self, outcomes: dict[int, str | None]) -> None:
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(EmailOutbox).where(EmailOutbox.email_id.in_(outcomes))
+            )
+            for item in result.scalars():
+                error = outcomes[item.email_id]
+                item.attempts += 1
+                if error is None:
+                    item.status = SENT
+                    item.sent_at = now
+                    item.last_error = None
+                    self.stats[SENT] += 1
+                elif item.attempts >= self.max_attempts:
+                    item.status = DEAD
+                    item.last_error = error[:500]
+                    self.stats[DEAD] += 1
+                    logger.error(
+                        "[outbox] email %s dead-lettered after %s attempts: %s",
+                        item.email_id,
+                        item.attempts,
+                        error,
+                    )
+                else:
+                    item.status = PENDING
+                    item.last_error = error[:500]
+                    item.next_attempt_at = now + timedelta(
+                        seconds=backoff_delay(item.attempts)
+                    )
+                    self.stats["retried"] += 1
+            await db.commit()
+
+    async def drain_once(self) -> int:
+        """
+        Send one batch. Returns the number of outbox rows processed.
+        """
+        items = await self._claim()
+        if not items:
+            return 0
+
+        outcomes: dict[int, str | None] = {}
+        try:
+            for item in items:
+                try:
+                    await self.sender.send(build_message(item, self.sender.config))
+                    outcomes[item.email_id] = None
+                except asyncio.CancelledError:
+                    raise
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logger.warning("[outbox] send of email %s failed: %s", item.email_id, e)
+                    outcomes[item.email_id] = str(e) or e.__class__.__name__
+                    # the connection is in an unknown state, start fresh next time
+                    await self.sender.close()
+                except Exception as e:
+                    # e.g. a message that cannot be built; only this row is retried
+                    logger.exception("[outbox] email %s could not be sent", item.email_id)
+                    outcomes[item.email_id] = str(e) or e.__class__.__name__
+        finally:
+            # rows already handed to the server must not be sent again after
+            # the lease, even if the batch was cut short
+            if outcomes:
+                await asyncio.shield(self._record(outcomes))
+        return len(items)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                processed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[outbox] unexpected error while draining")
+                processed = 0
+
+            if processed >= self.batch_size:
+                continue
+
+            if (
+                self.sender.is_connected
+                and time.monotonic() - self.sender.last_used > SMTP_IDLE_TIMEOUT
+            ):
+                await self.sender.close()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="email-outbox")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sender.close()
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,302 @@
+import asyncio
+import glob
+import inspect
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# When set, every worker writes its metrics here and /metrics sums them all.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 10))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: dict[tuple, object] = {}
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """
+    Plain dict increments: the event loop runs one coroutine at a time, so
+    no lock is needed within a worker.
+    """
+
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, *labels, value: float) -> None:
+        """Mirror a total that is already counted elsewhere."""
+        self.values[labels] = value
+
+    def render(self, values) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, *labels) -> None:
+        state = self.values.get(labels)
+        if state is None:
+            # [per-bucket counts..., sum, count]
+            state = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def render(self, values) -> list[str]:
+        lines = []
+        for labels, state in sorted(values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{label_str} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self, multiproc_dir: str | None = METRICS_MULTIPROC_DIR):
+        self.metrics: dict[str, _Metric] = {}
+        self.collectors = []
+        self.multiproc_dir = multiproc_dir
+        self._flush_task: asyncio.Task | None = None
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector) -> None:
+        """
+        Register a (sync or async) callable that refreshes gauges right before
+        metrics are rendered, e.g. pool or cache sizes.
+        """
+        self.collectors.append(collector)
+
+    async def collect(self) -> None:
+        for collector in self.collectors:
+            try:
+                result = collector()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("[metrics] collector %r failed", collector)
+
+    # ----- multiprocess mode -----
+    def snapshot(self) -> dict:
+        return {
+            name: [[list(k), v] for k, v in metric.values.items()]
+            for name, metric in self.metrics.items()
+        }
+
+    def flush(self) -> None:
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, f"{os.getpid()}.json")
+        fd, tmp_path = tempfile.mkstemp(dir=self.multiproc_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, path)
+
+    def _merged_values(self) -> dict[str, dict]:
+        merged = {name: {} for name in self.metrics}
+        for path in glob.glob(os.path.join(self.multiproc_dir, "*.json")):
+            pid = int(os.path.basename(path).split(".")[0])
+            alive = pid == os.getpid() or _pid_alive(pid)
+            try:
+                with open(path) as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for name, items in snapshot.items():
+                metric = self.metrics.get(name)
+                # gauges of dead workers describe nothing anymore
+                if metric is None or (metric.kind == "gauge" and not alive):
+                    continue
+                target = merged[name]
+                for labels, value in items:
+                    key = tuple(labels)
+                    if metric.kind == "histogram":
+                        current = target.get(key)
+                        target[key] = (
+                            [a + b for a, b in zip(current, value)] if current else value
+                        )
+                    else:
+                        target[key] = target.get(key, 0.0) + value
+        return merged
+
+    async def render(self) -> str:
+        await self.collect()
+        if self.multiproc_dir:
+            self.flush()
+            values = self._merged_values()
+        else:
+            values = {name: m.values for name, m in self.metrics.items()}
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(metric.header())
+            lines.extend(metric.render(values[name]))
+        return "\n".join(lines) + "\n"
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                await self.collect()
+                self.flush()
+            except OSError as e:
+                logger.warning("[metrics] could not write snapshot: %s", e)
+
+    def start(self) -> None:
+        if self.multiproc_dir and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(
+                self._flush_periodically(), name="metrics-flush"
+            )
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self.multiproc_dir:
+            self.flush()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status.",
+    ("method", "route", "status"),
+)
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route"),
+)
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "Requests currently being served.")
+ERRORS = registry.counter(
+    "http_errors_total", "Responses with status >= 400, by status.", ("status",)
+)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, throughput, in-flight requests and error counts.
+    Routes are labelled by their template (/users/lessons/{lesson_id}/tasks),
+    never the raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+        async def send_and_capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_capture)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method, template)
+            REQUESTS.inc(method, template, str(status))
+            if status >= 400:
+                ERRORS.inc(str(status))
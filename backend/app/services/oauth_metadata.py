@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+OAUTH_METADATA_TTL = int(os.getenv("OAUTH_METADATA_TTL", 6 * 60 * 60))
+# A snapshot older than this is not trusted at all, even as a warm start.
+OAUTH_METADATA_MAX_STALE = int(os.getenv("OAUTH_METADATA_MAX_STALE", 7 * 24 * 60 * 60))
+OAUTH_SNAPSHOT_DIR = os.getenv("OAUTH_SNAPSHOT_DIR", tempfile.gettempdir())
+
+
+class ProviderMetadataCache:
+    """
+    Keeps an Authlib client's OpenID discovery document and JWKS warm.
+
+    The fetched documents are written to a snapshot file that new workers
+    load at startup, so the first login after a deploy does not pay for the
+    discovery and JWKS round trips. A background task refreshes them before
+    the TTL runs out; on failure the last good copy keeps being served.
+    """
+
+    def __init__(
+        self,
+        client,
+        metadata_url: str,
+        snapshot_path: str,
+        ttl: int = OAUTH_METADATA_TTL,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.client = client
+        self.metadata_url = metadata_url
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.transport = transport
+        self.fetched_at = 0.0
+        self.refreshes = 0
+        self.failures = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def _apply(self, metadata: dict, jwks: dict | None, fetched_at: float) -> None:
+        metadata = dict(metadata)
+        # Authlib only fetches discovery while "_loaded_at" is missing
+        metadata["_loaded_at"] = fetched_at
+        if jwks:
+            metadata["jwks"] = jwks
+        self.client.server_metadata.update(metadata)
+        self.fetched_at = fetched_at
+
+    def load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as fh:
+                snapshot = json.load(fh)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning("[oauth] unreadable metadata snapshot %s: %s", self.snapshot_path, e)
+            return False
+
+        if snapshot.get("metadata_url") != self.metadata_url:
+            return False
+        fetched_at = float(snapshot.get("fetched_at", 0))
+        if time.time() - fetched_at > OAUTH_METADATA_MAX_STALE:
+            return False
+        self._apply(snapshot["metadata"], snapshot.get("jwks"), fetched_at)
+        return True
+
+    def _write_snapshot(self, metadata: dict, jwks: dict | None) -> None:
+        snapshot = {
+            "metadata_url": self.metadata_url,
+            "fetched_at": self.fetched_at,
+            "metadata": metadata,
+            "jwks": jwks,
+        }
+        directory = os.path.dirname(self.snapshot_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(snapshot, fh)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("[oauth] could not write metadata snapshot: %s", e)
+
+    def is_stale(self) -> bool:
+        return time.time() - self.fetched_at > self.ttl
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            async with httpx.AsyncClient(transport=self.transport, timeout=10) as http:
+                resp = await http.get(self.metadata_url)
+                resp.raise_for_status()
+                metadata = resp.json()
+
+                jwks = None
+                if metadata.get("jwks_uri"):
+                    resp = await http.get(metadata["jwks_uri"])
+                    resp.raise_for_status()
+                    jwks = resp.json()
+
+            self._apply(metadata, jwks, time.time())
+            self._write_snapshot(metadata, jwks)
+            self.refreshes += 1
+
+    async def ensure_fresh(self) -> None:
+        if self.is_stale():
+            await self.refresh()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.ensure_fresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning("[oauth] metadata refresh from %s failed: %s", self.metadata_url, e)
+                await asyncio.sleep(min(60, self.ttl))
+                continue
+            # wake up before expiry; jitter keeps workers from refreshing in lockstep
+            remaining = self.ttl - (time.time() - self.fetched_at)
+            await asyncio.sleep(max(1.0, remaining * random.uniform(0.7, 0.9)))
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="oauth-metadata")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot_info(self) -> dict:
+        return {
+            "fetched_at": self.fetched_at,
+            "stale": self.is_stale(),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
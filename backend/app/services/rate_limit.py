@@ -0,0 +1,303 @@
+import logging
+import math
+import os
+import time
+from array import array
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+from sqlalchemy.sql import text
+from starlette.responses import JSONResponse
+
+from app.database import async_session
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_SLOTS = int(os.getenv("RATE_LIMIT_SLOTS", 65536))
+# Proxies whose X-Forwarded-For is believed, as addresses or CIDRs (uvicorn's
+# variable); see README. Render's load balancers connect from its private
+# network, so that is the default there.
+PRIVATE_NETWORKS = "10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7"
+FORWARDED_ALLOW_IPS = os.getenv(
+    "FORWARDED_ALLOW_IPS", PRIVATE_NETWORKS if os.getenv("RENDER") else "127.0.0.1"
+)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    capacity: float  # burst size
+    per_seconds: float  # time to refill the whole burst
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+def env_rule(name: str, capacity: float, per_seconds: float) -> Rule:
+    """
+    A rule, unless overridden as RATE_LIMIT_<NAME>="<capacity>/<seconds>",
+    e.g. RATE_LIMIT_LOGIN_IP=20/60.
+    """
+    value = os.getenv("RATE_LIMIT_" + name.upper().replace("-", "_"))
+    if value:
+        capacity, _, per_seconds = value.partition("/")
+    return Rule(name, float(capacity), float(per_seconds))
+
+
+# Per-IP rules are applied by RateLimitMiddleware to these paths.
+IP_RULES = {
+    "/auth/login": env_rule("login-ip", 20, 60),
+    "/auth/signup": env_rule("signup-ip", 5, 60 * 60),
+    "/auth/forgot-password": env_rule("forgot-ip", 5, 15 * 60),
+    "/auth/check-email": env_rule("check-email-ip", 30, 60),
+    "/auth/validate-email": env_rule("validate-email-ip", 20, 60),
+}
+
+# Per-account rules are applied inside the handlers, once the email is known.
+# Only failed logins are charged, so an account cannot be locked by logging in.
+LOGIN_ACCOUNT_RULE = env_rule("login-account", 5, 5 * 60)
+FORGOT_ACCOUNT_RULE = env_rule("forgot-account", 3, 60 * 60)
+
+
+class TokenBucketTable:
+    """
+    Fixed-size, 4-way set-associative table of token buckets.
+
+    Each slot is a 64-bit key hash, a token count and a last-refill stamp held
+    in flat arrays (24 bytes per slot), so memory never grows with the number
+    of clients. Buckets are refilled lazily when touched. When a set is full
+    the least recently touched bucket is reused; that bucket has had the
+    longest time to refill, so forgetting it loses the least information.
+    """
+
+    WAYS = 4
+
+    def __init__(self, slots: int = RATE_LIMIT_SLOTS):
+        slots = max(self.WAYS, 1 << (max(slots, 1) - 1).bit_length())
+        self._mask = slots - 1
+        self._keys = array("Q", bytes(8 * slots))
+        self._tokens = array("d", bytes(8 * slots))
+        self._stamps = array("d", bytes(8 * slots))
+
+    def __len__(self) -> int:
+        return sum(1 for k in self._keys if k)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return (hash(key) & 0xFFFFFFFFFFFFFFFF) or 1
+
+    def take(
+        self,
+        key: str,
+        capacity: float,
+        rate: float,
+        cost: float = 1.0,
+        now: float | None = None,
+    ) -> float:
+        """
+        Take cost tokens. Returns 0 if allowed, otherwise seconds until it would be.
+        """
+        now = time.monotonic() if now is None else now
+        h = self._hash(key)
+        base = h & self._mask & ~(self.WAYS - 1)
+        keys, stamps = self._keys, self._stamps
+
+        slot = -1
+        victim = base
+        for i in range(base, base + self.WAYS):
+            if keys[i] == h:
+                slot = i
+                break
+            # empty slots have a zero stamp, so they are reused first
+            if stamps[i] < stamps[victim]:
+                victim = i
+        if slot < 0:
+            slot = victim
+            keys[slot] = h
+            self._tokens[slot] = capacity
+            stamps[slot] = now
+
+        tokens = min(capacity, self._tokens[slot] + (now - stamps[slot]) * rate)
+        stamps[slot] = now
+        if tokens >= cost:
+            self._tokens[slot] = tokens - cost
+            return 0.0
+        self._tokens[slot] = tokens
+        return (cost - tokens) / rate
+
+    def peek(self, key: str, capacity: float, rate: float, now: float | None = None) -> float:
+        """Like take(), without taking anything or touching the bucket."""
+        now = time.monotonic() if now is None else now
+        h = self._hash(key)
+        base = h & self._mask & ~(self.WAYS - 1)
+        for i in range(base, base + self.WAYS):
+            if self._keys[i] == h:
+                tokens = min(capacity, self._tokens[i] + (now - self._stamps[i]) * rate)
+                return 0.0 if tokens >= 1 else (1 - tokens) / rate
+        return 0.0
+
+    def clear(self) -> None:
+        for arr in (self._keys, self._tokens, self._stamps):
+            arr[:] = array(arr.typecode, bytes(8 * len(arr)))
+
+
+class MemoryBackend:
+    def __init__(self, slots: int = RATE_LIMIT_SLOTS):
+        self.table = TokenBucketTable(slots)
+
+    async def take(self, rule: Rule, key: str) -> float:
+        return self.table.take(f"{rule.name}:{key}", rule.capacity, rule.rate)
+
+    async def peek(self, rule: Rule, key: str) -> float:
+        return self.table.peek(f"{rule.name}:{key}", rule.capacity, rule.rate)
+
+    async def reset(self) -> None:
+        self.table.clear()
+
+
+class DatabaseBackend:
+    """
+    Buckets in the rate_limit_bucket table, shared by all worker processes.
+    Refill and take happen in one upsert, so concurrent workers can't race.
+    """
+
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+
+    async def take(self, rule: Rule, key: str) -> float:
+        async with self.session_factory() as db:
+            least = "LEAST" if db.bind.dialect.name == "postgresql" else "MIN"
+            refilled = (
+                f"{least}(:capacity, rate_limit_bucket.tokens"
+                f" + (:now - rate_limit_bucket.updated_at) * :rate)"
+            )
+            result = await db.execute(
+                text(
+                    f"""
+                    INSERT INTO rate_limit_bucket (bucket_key, tokens, updated_at, allowed)
+                    VALUES (:key, :capacity - 1, :now, TRUE)
+                    ON CONFLICT (bucket_key) DO UPDATE SET
+                        tokens = CASE WHEN {refilled} >= 1
+                                      THEN {refilled} - 1 ELSE {refilled} END,
+                        allowed = {refilled} >= 1,
+                        updated_at = :now
+                    RETURNING tokens, allowed
+                    """
+                ),
+                {
+                    "key": f"{rule.name}:{key}",
+                    "capacity": rule.capacity,
+                    "rate": rule.rate,
+                    "now": time.time(),
+                },
+            )
+            tokens, allowed = result.one()
+            await db.commit()
+        return 0.0 if allowed else (1 - tokens) / rule.rate
+
+    async def peek(self, rule: Rule, key: str) -> float:
+        async with self.session_factory() as db:
+            row = (
+                await db.execute(
+                    text(
+                        "SELECT tokens, updated_at FROM rate_limit_bucket"
+                        " WHERE bucket_key = :key"
+                    ),
+                    {"key": f"{rule.name}:{key}"},
+                )
+            ).first()
+        if row is None:
+            return 0.0
+        tokens = min(rule.capacity, row.tokens + (time.time() - row.updated_at) * rule.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / rule.rate
+
+    async def reset(self) -> None:
+        async with self.session_factory() as db:
+            await db.execute(text("DELETE FROM rate_limit_bucket"))
+            await db.commit()
+
+
+class RateLimiter:
+    def __init__(self, backend, enabled: bool = RATE_LIMIT_ENABLED):
+        self.backend = backend
+        self.enabled = enabled
+        self.rejected = 0
+
+    async def check(self, rule: Rule, key: str, charge: bool = True) -> float:
+        """
+        Seconds until `key` may go on under `rule`, 0 if it may now. With
+        charge=False the bucket is only looked at; charge it separately for
+        requests that should count, e.g. failed logins.
+        """
+        if not self.enabled or not key:
+            return 0.0
+        try:
+            if charge:
+                retry_after = await self.backend.take(rule, key)
+            else:
+                retry_after = await self.backend.peek(rule, key)
+        except Exception:
+            # a broken shared backend must not lock everybody out
+            logger.exception("[rate-limit] backend failure for %s", rule.name)
+            return 0.0
+        if retry_after:
+            self.rejected += 1
+        return retry_after
+
+    async def enforce(self, rule: Rule, key: str, charge: bool = True) -> None:
+        retry_after = await self.check(rule, key, charge)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def reset(self) -> None:
+        self.rejected = 0
+        await self.backend.reset()
+
+
+def create_limiter(backend: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    if backend == "db":
+        return RateLimiter(DatabaseBackend())
+    if backend != "memory":
+        logger.warning("Unknown RATE_LIMIT_BACKEND %r; using in-memory buckets", backend)
+    return RateLimiter(MemoryBackend())
+
+
+limiter = create_limiter()
+
+
+class RateLimitMiddleware:
+    """
+    Per-client-IP limits for the auth endpoints in IP_RULES.
+
+    Must sit inside ProxyHeadersMiddleware so scope["client"] is the real
+    client address rather than the load balancer's; that is only as good
+    as the FORWARDED_ALLOW_IPS it is given.
+    """
+
+    def __init__(self, app, rate_limiter: RateLimiter = limiter, rules: dict = IP_RULES):
+        self.app = app
+        self.limiter = rate_limiter
+        self.rules = rules
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] != "OPTIONS":
+            rule = self.rules.get(scope["path"].rstrip("/") or "/")
+            if rule is not None:
+                client = scope.get("client")
+                retry_after = await self.limiter.check(rule, client[0] if client else "")
+                if retry_after:
+                    response = JSONResponse(
+                        {"detail": "Too many requests. Please try again later."},
+                        status_code=429,
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
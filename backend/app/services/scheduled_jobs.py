@@ -0,0 +1,72 @@
+"""
+Periodic jobs run by the in-app scheduler.
+
+    python -m app.services.scheduled_jobs list
+    python -m app.services.scheduled_jobs run sweep_handoff_codes
+"""
+
+import argparse
+import asyncio
+
+from app import auth_handoff
+from app.services import avatars, content_cache, leaderboard
+from app.services.scheduler import scheduler
+
+
+# The in-memory store is per worker; the table only needs one sweeper.
+@scheduler.job(interval=60, jitter=10, single_runner=auth_handoff.HANDOFF_BACKEND == "db")
+async def sweep_handoff_codes() -> int:
+    """Delete expired OAuth handoff codes."""
+    return await auth_handoff.store.sweep()
+
+
+# Every worker keeps its own copy of the board, so every worker refreshes it,
+# a little before the TTL runs out.
+@scheduler.job(interval=leaderboard.LEADERBOARD_TTL * 0.8, jitter=2, single_runner=False)
+async def refresh_leaderboard() -> int:
+    """Recompute the top-users board."""
+    return len(await leaderboard.refresh())
+
+
+@scheduler.job(cron="17 * * * *", jitter=60)
+async def sweep_cache_entries() -> int:
+    """Delete expired rows from the shared cache tier."""
+    shared = content_cache.cache.shared
+    return await shared.sweep() if shared is not None else 0
+
+
+@scheduler.job(cron="40 3 * * *", jitter=300)
+async def collect_avatar_garbage() -> int:
+    """Delete stored avatars no user references any more."""
+    return await avatars.collect_garbage()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run scheduled jobs by hand.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    run = commands.add_parser("run")
+    run.add_argument("job", choices=sorted(scheduler.jobs))
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for job in scheduler.jobs.values():
+            when = job.cron.expression if job.cron else f"every {job.interval:g}s"
+            runner = "leader" if job.single_runner else "all workers"
+            print(f"{job.name:24} {when:16} {runner:12} {(job.fn.__doc__ or '').strip()}")
+        return 0
+
+    async def run_once():
+        from app.database import dispose_engines
+
+        try:
+            print(await scheduler.run(args.job))
+        finally:
+            await dispose_engines()
+
+    asyncio.run(run_once())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
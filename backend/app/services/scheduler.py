@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql import text
+
+from app.database import create_engine, engine
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+# How often a follower retries the leader lock, and the leader pings it.
+SCHEDULER_LEADER_RETRY = float(os.getenv("SCHEDULER_LEADER_RETRY", 15))
+
+JOB_RUNS = registry.counter(
+    "scheduler_job_runs_total", "Scheduled job runs by outcome.", ("job", "status")
+)
+JOB_DURATION = registry.histogram(
+    "scheduler_job_duration_seconds", "Scheduled job run time.", ("job",)
+)
+SCHEDULER_LEADER = registry.gauge(
+    "scheduler_leader", "1 while this worker runs the single-runner jobs."
+)
+
+
+def _parse_field(spec: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in spec.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"cron field {spec!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class Cron:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week,
+    Sunday = 0) in UTC, supporting `*`, lists, ranges and `/step`.
+
+    As in standard cron, when both day-of-month and day-of-week are
+    restricted (neither starts with `*`) a day matching either one
+    matches: "0 0 1 * 1" runs on the 1st and on every Monday.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"expected 5 cron fields, got {expression!r}")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = _parse_field(fields[4], 0, 6)
+        self.either_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+
+    def matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        return (
+            moment.minute in self.minutes
+            and moment.hour in self.hours
+            and moment.month in self.months
+            and ((day or weekday) if self.either_day else (day and weekday))
+        )
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # a year of minutes covers every satisfiable expression
+        for _ in range(366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"cron {self.expression!r} never matches")
+
+
+@dataclass
+class Job:
+    name: str
+    fn: object  # async callable without arguments
+    interval: float | None = None
+    cron: Cron | None = None
+    jitter: float = 0.0  # random extra delay, so workers don't fire in lockstep
+    single_runner: bool = True  # False: runs in every worker (per-process state)
+    timeout: float | None = None
+    last_run: float | None = field(default=None, init=False)
+
+    def seconds_until_next(self) -> float:
+        if self.cron is not None:
+            now = datetime.now(timezone.utc)
+            return (self.cron.next_after(now) - now).total_seconds()
+        return self.interval
+
+
+class Scheduler:
+    """
+    Runs registered jobs on intervals or cron expressions from the app's
+    event loop.
+
+    Single-runner jobs only run in the worker holding a Postgres session
+    advisory lock; if that worker dies its connection closes, the lock is
+    released and another worker takes over within SCHEDULER_LEADER_RETRY.
+    Other databases have no cross-process lock, so every worker leads
+    (fine for SQLite in local development).
+    """
+
+    def __init__(self, engine=engine, lock_name: str = "app-scheduler"):
+        self.engine = engine
+        self.lock_key = zlib.crc32(lock_name.encode())
+        self.jobs: dict[str, Job] = {}
+        self.is_leader = engine.dialect.name != "postgresql"
+        self._tasks: list[asyncio.Task] = []
+
+    def add(self, job: Job) -> Job:
+        if (job.interval is None) == (job.cron is None):
+            raise ValueError(f"job {job.name} needs exactly one of interval or cron")
+        self.jobs[job.name] = job
+        return job
+
+    def job(self, name=None, interval=None, cron=None, **options):
+        """Decorator registering an async function as a job."""
+
+        def decorator(fn):
+            self.add(
+                Job(
+                    name or fn.__name__, fn, interval=interval,
+                    cron=Cron(cron) if cron else None, **options,
+                )
+            )
+            return fn
+
+        return decorator
+
+    async def run(self, job: Job | str):
+        """Run a job once now, recording its timing; returns its result."""
+        job = self.jobs[job] if isinstance(job, str) else job
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await asyncio.wait_for(job.fn(), job.timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            job.last_run = time.time()
+            JOB_DURATION.observe(elapsed, job.name)
+            JOB_RUNS.inc(job.name, status)
+            logger.info("[scheduler] %s finished in %.1f ms (%s)", job.name, elapsed * 1000, status)
+
+    async def _loop(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(job.seconds_until_next() + random.uniform(0, job.jitter))
+            if job.single_runner and not self.is_leader:
+                continue
+            try:
+                await self.run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[scheduler] job %s failed", job.name)
+
+    async def _lead(self) -> None:
+        # a connection of its own: the lock lives exactly as long as it does.
+        # Autocommit, so the lock and pings don't hold it idle in transaction.
+        lock_engine = create_engine(
+            self.engine.url.render_as_string(hide_password=False),
+            poolclass=NullPool,
+            isolation_level="AUTOCOMMIT",
+        )
+        try:
+            while True:
+                try:
+                    async with lock_engine.connect() as conn:
+                        while not self.is_leader:
+                            self.is_leader = await conn.scalar(
+                                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+                            )
+                            if not self.is_leader:
+                                await asyncio.sleep(SCHEDULER_LEADER_RETRY)
+                        SCHEDULER_LEADER.set(value=1)
+                        logger.info("[scheduler] this worker is the scheduler leader")
+                        while True:
+                            await asyncio.sleep(SCHEDULER_LEADER_RETRY)
+                            await conn.execute(text("SELECT 1"))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("[scheduler] leader lock connection lost: %s", e)
+                    self.is_leader = False
+                    SCHEDULER_LEADER.set(value=0)
+                    await asyncio.sleep(SCHEDULER_LEADER_RETRY)
+        finally:
+            self.is_leader = False
+            SCHEDULER_LEADER.set(value=0)
+            await lock_engine.dispose()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        if self.engine.dialect.name == "postgresql":
+            self._tasks.append(asyncio.create_task(self._lead(), name="scheduler-leader"))
+        else:
+            SCHEDULER_LEADER.set(value=1)
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job-{job.name}"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+scheduler = Scheduler()
@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+from app.services.metrics import registry
+
+COALESCED = registry.counter(
+    "singleflight_coalesced_total",
+    "Callers that shared another caller's in-flight computation.",
+    ("flight",),
+)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one computation: the first
+    caller starts it, the rest await its result (or its exception).
+
+    The computation runs as its own task, so a leader whose request is
+    cancelled does not cancel it for the callers waiting on it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable]) -> asyncio.Task:
+        """Start `fn` unless `key` is already in flight; does not wait for it."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        if key in self._calls:
+            self.coalesced += 1
+            COALESCED.inc(self.name)
+        return await asyncio.shield(self.start(key, fn))
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every caller went away
@@ -0,0 +1,260 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.services.metrics import registry
+from app.utils.aws_s3 import (
+    AWS_BUCKET_NAME,
+    AWS_REGION,
+    S3_ENDPOINT_URL,
+    S3_MAX_POOL_CONNECTIONS,
+    get_s3_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# "s3", or "local" to keep objects under MEDIA_ROOT, served by the /media
+# mount (local development, and the stand-in for S3 in tests).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3").lower()
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+MEDIA_URL = os.getenv("MEDIA_URL", "/media")
+
+# Content-addressed objects never change under their key.
+IMMUTABLE = "public, max-age=31536000, immutable"
+# The most keys S3 accepts in one DeleteObjects request.
+DELETE_BATCH = 1000
+# Objects at least this large are uploaded in parts of S3_PART_SIZE.
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", 16 * 1024 * 1024))
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024))
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3's limit for all but the last part
+
+STORAGE_LATENCY = registry.histogram(
+    "storage_operation_seconds", "Object storage call latency.", ("backend", "operation")
+)
+STORAGE_ERRORS = registry.counter(
+    "storage_errors_total", "Failed object storage calls.", ("backend", "operation")
+)
+
+
+class S3Storage:
+    """
+    Async access to the app's bucket.
+
+    Blocking boto3 calls run on a thread pool of the storage's own, sized
+    to the client's connection pool, so S3 never waits on (or starves) the
+    default executor. Large objects are uploaded in parts, several at once.
+    """
+
+    def __init__(
+        self,
+        bucket: str | None = AWS_BUCKET_NAME,
+        region: str | None = AWS_REGION,
+        client_factory=get_s3_client,
+        max_workers: int = S3_MAX_POOL_CONNECTIONS,
+        multipart_threshold: int = S3_MULTIPART_THRESHOLD,
+        part_size: int = S3_PART_SIZE,
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="s3")
+        return self._executor
+
+    async def _call(self, operation: str, fn, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(fn, **kwargs)
+            )
+        except Exception:
+            STORAGE_ERRORS.inc("s3", operation)
+            raise
+        finally:
+            STORAGE_LATENCY.observe(time.perf_counter() - start, "s3", operation)
+
+    async def put(self, key: str, data: bytes, content_type: str, cache_control: str = IMMUTABLE) -> None:
+        if len(data) >= self.multipart_threshold:
+            await self._put_multipart(key, data, content_type, cache_control)
+            return
+        await self._call(
+            "put_object",
+            self.client_factory().put_object,
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            CacheControl=cache_control,
+        )
+
+    async def _put_multipart(self, key: str, data: bytes, content_type: str, cache_control: str) -> None:
+        client = self.client_factory()
+        upload_id = (
+            await self._call(
+                "create_multipart_upload",
+                client.create_multipart_upload,
+                Bucket=self.bucket,
+                Key=key,
+                ContentType=content_type,
+                CacheControl=cache_control,
+            )
+        )["UploadId"]
+
+        async def upload_part(number: int, offset: int) -> dict:
+            response = await self._call(
+                "upload_part",
+                client.upload_part,
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=data[offset : offset + self.part_size],
+            )
+            return {"PartNumber": number, "ETag": response["ETag"]}
+
+        try:
+            parts = await asyncio.gather(
+                *(
+                    upload_part(number, offset)
+                    for number, offset in enumerate(range(0, len(data), self.part_size), start=1)
+                )
+            )
+            await self._call(
+                "complete_multipart_upload",
+                client.complete_multipart_upload,
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            # uploaded parts are billed until the upload is aborted
+            await asyncio.shield(
+                self._call(
+                    "abort_multipart_upload",
+                    client.abort_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                )
+            )
+            raise
+
+    async def get(self, key: str) -> bytes:
+        def read(**kwargs) -> bytes:
+            return self.client_factory().get_object(**kwargs)["Body"].read()
+
+        return await self._call("get_object", read, Bucket=self.bucket, Key=key)
+
+    async def delete(self, keys: list[str]) -> None:
+        """Delete objects, DELETE_BATCH keys per request; missing keys are not an error."""
+        keys = list(keys)
+        responses = await asyncio.gather(
+            *(
+                self._call(
+                    "delete_objects",
+                    self.client_factory().delete_objects,
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in keys[i : i + DELETE_BATCH]], "Quiet": True},
+                )
+                for i in range(0, len(keys), DELETE_BATCH)
+            )
+        )
+        errors = [error for response in responses for error in response.get("Errors", ())]
+        if errors:
+            raise RuntimeError(f"S3 refused to delete {len(errors)} objects, e.g. {errors[0]}")
+
+    def presign(self, key: str, expires_in: int, method: str = "get_object") -> str:
+        """
+        A presigned URL for `key`. Signing is local HMAC work with no
+        network call, so it runs inline rather than on the thread pool.
+        """
+        start = time.perf_counter()
+        try:
+            return self.client_factory().generate_presigned_url(
+                method, Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires_in
+            )
+        finally:
+            STORAGE_LATENCY.observe(time.perf_counter() - start, "s3", "presign")
+
+    def url(self, key: str) -> str:
+        if S3_ENDPOINT_URL:
+            return f"{S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class LocalStorage:
+    """Objects as files under `root`, published at `base_url`."""
+
+    def __init__(self, root: str | Path = MEDIA_ROOT, base_url: str = MEDIA_URL):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"key {key!r} escapes the storage root")
+        return path
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+    async def put(self, key: str, data: bytes, content_type: str, cache_control: str = IMMUTABLE) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+    def _delete(self, keys: list[str]) -> None:
+        for key in keys:
+            path = self._path(key)
+            path.unlink(missing_ok=True)
+            if path.parent != self.root.resolve():
+                try:
+                    path.parent.rmdir()
+                except OSError:
+                    pass  # not empty
+
+    async def delete(self, keys: list[str]) -> None:
+        await asyncio.to_thread(self._delete, list(keys))
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._path(key).read_bytes)
+
+    def presign(self, key: str, expires_in: int, method: str = "get_object") -> str:
+        """Local files are public; the plain URL."""
+        return self.url(key)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def close(self) -> None:
+        pass
+
+
+def create_storage(backend: str = STORAGE_BACKEND):
+    if backend == "local":
+        return LocalStorage()
+    if backend != "s3":
+        logger.warning("Unknown STORAGE_BACKEND %r; using s3", backend)
+    return S3Storage()
+
+
+storage = create_storage()
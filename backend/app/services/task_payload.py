@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import Task
+from app.models.task_video import TaskVideo
+from app.models.video_reference import VideoReference
+from app.services.url_signing import url_signer
+
+TASK_COLUMNS = (
+    Task.task_id,
+    Task.task_type,
+    Task.content,
+    Task.correct_answer,
+    Task.version,
+    Task.points,
+)
+VIDEO_COLUMNS = (
+    VideoReference.video_id,
+    VideoReference.gloss,
+    VideoReference.signer_id,
+    VideoReference.video_url,
+)
+
+
+def video_payload(video, include_metadata: bool = False, signed: dict | None = None) -> dict:
+    """
+    A VideoReferenceResponse-shaped dict from an ORM object or a row, with
+    its URL looked up in `signed` (from url_signer.sign_many) if given.
+    """
+    payload = {
+        "video_id": video.video_id,
+        "gloss": video.gloss,
+        "signer_id": video.signer_id,
+        "video_url": signed.get(video.video_url, video.video_url) if signed else video.video_url,
+    }
+    if include_metadata:
+        payload["video_metadata"] = video.video_metadata
+    return payload
+
+
+def task_payload(task, videos, include_metadata: bool = False, signed: dict | None = None) -> dict:
+    """
+    A TaskResponse-shaped dict in one pass, from an ORM Task or a row of
+    TASK_COLUMNS. Routes return it as an ORJSONResponse, so it is not
+    validated again.
+    """
+    return {
+        "task_id": task.task_id,
+        "task_type": task.task_type,
+        "content": dict(task.content) if isinstance(task.content, dict) else {},
+        "correct_answer": task.correct_answer
+        if isinstance(task.correct_answer, dict)
+        else {},
+        "version": task.version,
+        "points": task.points,
+        "videos": [video_payload(video, include_metadata, signed) for video in videos],
+    }
+
+
+async def load_tasks(
+    db: AsyncSession,
+    *criteria,
+    include_metadata: bool = False,
+    inline_presentation_video: bool = False,
+) -> list[dict]:
+    """
+    Task payloads matching `criteria`, ordered by task_id, in two column
+    queries. video_metadata is not even selected unless asked for. Video
+    URLs are presigned in one batch; callers caching the result key it
+    by url_signer.window_start().
+
+    With inline_presentation_video, a sign_presentation task carries its
+    first video's id in content["video_id"] instead of a videos list.
+    """
+    tasks = (
+        await db.execute(select(*TASK_COLUMNS).where(*criteria).order_by(Task.task_id))
+    ).all()
+    if not tasks:
+        return []
+
+    columns = [TaskVideo.task_id.label("task_id"), *VIDEO_COLUMNS]
+    if include_metadata:
+        columns.append(VideoReference.video_metadata)
+    video_rows = await db.execute(
+        select(*columns)
+        .join(VideoReference, VideoReference.video_id == TaskVideo.video_id)
+        .where(TaskVideo.task_id.in_([task.task_id for task in tasks]))
+    )
+    videos = defaultdict(list)
+    for video in video_rows:
+        videos[video.task_id].append(video)
+    signed = url_signer.sign_many(
+        video.video_url for rows in videos.values() for video in rows if video.video_url
+    )
+
+    payloads = []
+    for task in tasks:
+        payload = task_payload(task, videos.get(task.task_id, ()), include_metadata, signed)
+        if (
+            inline_presentation_video
+            and task.task_type == "sign_presentation"
+            and payload["videos"]
+        ):
+            payload["content"]["video_id"] = payload["videos"][0]["video_id"]
+            payload["videos"] = []
+        payloads.append(payload)
+    return payloads
@@ -0,0 +1,172 @@
+"""
+Presigned GET URLs for objects in private S3 buckets.
+
+Signing is done in aligned windows of URL_SIGNING_WINDOW seconds: a URL
+signed at any time within a window is signed as of the window's start,
+so an object has the same URL for every user and in every worker, and a
+rendered response holding signed URLs can be cached for the rest of the
+window. Every URL stays valid for URL_SIGNING_MIN_VALIDITY after its
+window ends.
+
+URLs are signed with SigV4 here rather than through boto3, whose
+presigner always signs as of "now" and derives the signing key on every
+call; the derived key is reused for the whole day.
+"""
+
+import hashlib
+import hmac
+import os
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import quote, unquote, urlsplit
+
+from app.services.metrics import registry
+from app.utils.aws_s3 import AWS_ACCESS_KEY_ID, AWS_REGION, AWS_SECRET_ACCESS_KEY
+
+# Off until the video bucket is private; URLs are passed through as stored.
+URL_SIGNING = os.getenv("URL_SIGNING", "false").lower() == "true"
+URL_SIGNING_WINDOW = int(os.getenv("URL_SIGNING_WINDOW", 60 * 60))
+URL_SIGNING_MIN_VALIDITY = int(os.getenv("URL_SIGNING_MIN_VALIDITY", 60 * 60))
+URL_SIGNING_CACHE_SIZE = int(os.getenv("URL_SIGNING_CACHE_SIZE", 50_000))
+MAX_EXPIRES = 7 * 24 * 60 * 60  # SigV4's limit
+
+SIGNED_URLS = registry.counter(
+    "signed_urls_total", "Presigned URL lookups by result: hit or signed.", ("result",)
+)
+
+# virtual-hosted S3 URLs: <bucket>.s3[.-<region>].amazonaws.com
+_S3_HOST = re.compile(r"^(?P<bucket>[a-z0-9][a-z0-9.-]*)\.s3(?:[.-](?P<region>[a-z0-9-]+))?\.amazonaws\.com$")
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _encode(value: str, safe: str = "") -> str:
+    return quote(value, safe="-_.~" + safe)
+
+
+class UrlSigner:
+    """
+    Turns public S3 object URLs into presigned ones, keeping an LRU of
+    URL -> signature for the current window. Anything that is not an S3
+    object URL is returned unchanged.
+    """
+
+    def __init__(
+        self,
+        access_key: str | None = AWS_ACCESS_KEY_ID,
+        secret_key: str | None = AWS_SECRET_ACCESS_KEY,
+        default_region: str | None = AWS_REGION,
+        enabled: bool = URL_SIGNING,
+        window: int = URL_SIGNING_WINDOW,
+        min_validity: int = URL_SIGNING_MIN_VALIDITY,
+        max_entries: int = URL_SIGNING_CACHE_SIZE,
+    ):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.default_region = default_region or "us-east-1"
+        self.enabled = enabled and bool(access_key and secret_key)
+        self.window = window
+        self.expires = min(window + min_validity, MAX_EXPIRES)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.signed = 0
+        self._urls: OrderedDict[str, tuple[int, str]] = OrderedDict()
+        self._keys: dict[tuple[str, str], bytes] = {}
+
+    def window_start(self, now: float | None = None) -> int:
+        """
+        Start of the current signing window; 0 while signing is off. Part
+        of the cache key of anything that holds signed URLs.
+        """
+        if not self.enabled:
+            return 0
+        now = time.time() if now is None else now
+        return int(now // self.window * self.window)
+
+    def sign_many(self, urls, now: float | None = None) -> dict[str, str]:
+        """Public URL -> presigned URL for a batch, e.g. every video in a response."""
+        if not self.enabled:
+            return {url: url for url in urls}
+        start = self.window_start(now)
+        signed = {}
+        for url in urls:
+            if url in signed:
+                continue
+            cached = self._urls.get(url)
+            if cached is not None and cached[0] == start:
+                self._urls.move_to_end(url)
+                self.hits += 1
+                SIGNED_URLS.inc("hit")
+                signed[url] = cached[1]
+                continue
+            signed[url] = self._presign(url, start)
+            self._urls[url] = (start, signed[url])
+            self._urls.move_to_end(url)
+            if len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+            self.signed += 1
+            SIGNED_URLS.inc("signed")
+        return signed
+
+    def sign(self, url: str) -> str:
+        return self.sign_many((url,))[url]
+
+    def sign_rows(self, rows: list[dict], field: str = "video_url") -> list[dict]:
+        """Copies of `rows` with `field` signed; the rows themselves as is when off."""
+        if not self.enabled:
+            return rows
+        signed = self.sign_many(row[field] for row in rows if row.get(field))
+        return [{**row, field: signed.get(row.get(field), row.get(field))} for row in rows]
+
+    def _signing_key(self, date: str, region: str) -> bytes:
+        key = self._keys.get((date, region))
+        if key is None:
+            if len(self._keys) > 16:
+                self._keys.clear()  # earlier days
+            key = _hmac(f"AWS4{self.secret_key}".encode(), date)
+            for part in (region, "s3", "aws4_request"):
+                key = _hmac(key, part)
+            self._keys[(date, region)] = key
+        return key
+
+    def _presign(self, url: str, start: int) -> str:
+        parts = urlsplit(url)
+        match = _S3_HOST.match(parts.netloc)
+        if parts.scheme != "https" or match is None or parts.query or len(parts.path) < 2:
+            return url
+        region = match["region"] or self.default_region
+        path = _encode(unquote(parts.path), safe="/")
+        timestamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(start))
+        date = timestamp[:8]
+        scope = f"{date}/{region}/s3/aws4_request"
+        query = "&".join(
+            f"{name}={_encode(value)}"
+            for name, value in (
+                ("X-Amz-Algorithm", "AWS4-HMAC-SHA256"),
+                ("X-Amz-Credential", f"{self.access_key}/{scope}"),
+                ("X-Amz-Date", timestamp),
+                ("X-Amz-Expires", str(self.expires)),
+                ("X-Amz-SignedHeaders", "host"),
+            )
+        )
+        canonical_request = "\n".join(
+            ("GET", path, query, f"host:{parts.netloc}\n", "host", "UNSIGNED-PAYLOAD")
+        )
+        string_to_sign = "\n".join(
+            (
+                "AWS4-HMAC-SHA256",
+                timestamp,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            )
+        )
+        signature = hmac.new(
+            self._signing_key(date, region), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return f"https://{parts.netloc}{path}?{query}&X-Amz-Signature={signature}"
+
+
+url_signer = UrlSigner()
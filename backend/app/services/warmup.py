@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import AsyncExitStack
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database import DB_POOL_SIZE, async_read_session, async_session, engine, read_engine
+from app.models.progress import Progress
+from app.models.task import Task
+from app.models.user import User
+from app.services import content_cache
+from app.services.task_payload import TASK_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", DB_POOL_SIZE))
+OAUTH_WARMUP_TIMEOUT = float(os.getenv("OAUTH_WARMUP_TIMEOUT", 5))
+
+# Statements on the login and lesson paths; running them once with ids that
+# match nothing fills SQLAlchemy's compiled-statement cache.
+HOT_STATEMENTS = [
+    select(User).where(User.user_id == -1),
+    select(User).where(User.email == ""),
+    select(*TASK_COLUMNS).where(Task.lesson_id == -1).order_by(Task.task_id),
+    select(*TASK_COLUMNS).where(Task.task_id == -1).order_by(Task.task_id),
+    select(Progress).where(Progress.user_id == -1, Progress.lesson_id == -1),
+]
+
+
+async def prewarm_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open up to `connections` pooled connections at once and hand them back,
+    so the first requests do not pay for connection setup.
+    """
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        connections = min(connections, size())
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+        )
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+    return connections
+
+
+async def warm_statements(session_factory) -> int:
+    async with session_factory() as session:
+        for statement in HOT_STATEMENTS:
+            await session.execute(statement)
+    return len(HOT_STATEMENTS)
+
+
+async def prime_caches(session_factory) -> int:
+    async with session_factory() as session:
+        return await content_cache.prime(session)
+
+
+async def warm_up(app, oauth_metadata=None) -> dict:
+    """
+    Run every warm-up step, logging (not raising) failures so a slow or
+    missing dependency never keeps the app from starting. Returns
+    per-step timings in ms.
+    """
+    steps = [
+        ("pool", lambda: prewarm_pool(engine, DB_WARM_CONNECTIONS)),
+        ("statements", lambda: warm_statements(async_session)),
+        ("caches", lambda: prime_caches(async_read_session)),
+    ]
+    if read_engine is not engine:
+        steps.insert(1, ("replica_pool", lambda: prewarm_pool(read_engine, DB_WARM_CONNECTIONS)))
+    if oauth_metadata is not None and oauth_metadata.is_stale():
+        steps.append(
+            ("oauth", lambda: asyncio.wait_for(oauth_metadata.refresh(), OAUTH_WARMUP_TIMEOUT))
+        )
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    # builds every request/response schema once
+    start = time.perf_counter()
+    app.openapi()
+    timings["schemas"] = round((time.perf_counter() - start) * 1000, 1)
+
+    logger.info("Warm-up finished: %s", timings)
+    return timings
@@ -12,6 +12,8 @@ from sqlalchemy import delete
 # minimal env for app import
 os.environ.setdefault("ENV", "test")
 os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+# a separate database, so code reading the replica can be told apart
+os.environ.setdefault("DATABASE_REPLICA_URL", "sqlite+aiosqlite:///:memory:")
 os.environ.setdefault("SECRET_KEY", "test-secret")
 os.environ.setdefault("MAIL_USERNAME", "test@example.com")
 os.environ.setdefault("MAIL_PASSWORD", "pass")
@@ -22,10 +24,12 @@ os.environ.setdefault("GOOGLE_CLIENT_ID", "test-google-client-id")
 os.environ.setdefault("GOOGLE_CLIENT_SECRET", "test-google-client-secret")
 os.environ.setdefault("GOOGLE_REDIRECT_URI", "http://test/auth/google/callback")
 os.environ.setdefault("FRONTEND_URL", "http://test")
+os.environ.setdefault("INVALIDATION_BUS", "false")
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from app.database import get_db as real_get_db
+from app.database import get_read_db as real_get_read_db
 from app.models.user import Base, User
 from app.utils.auth import hash_password
 from main import app
@@ -42,6 +46,30 @@ async def async_engine():
         await engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def cached_loaders_use_test_engine(async_engine, monkeypatch):
+    """
+    Cache fills run on their own sessions; point them at the test database.
+    Returns the stand-in for the replica, which a test may rebind to make it lag.
+    """
+    from app.database import async_read_session
+    from app.services import content_cache, leaderboard
+
+    primary = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    replica = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    for loader in (
+        content_cache.languages,
+        content_cache.dictionary,
+        content_cache.dictionary_snapshot,
+        content_cache.catalog,
+        content_cache.lesson_tasks,
+        leaderboard.top_users,
+    ):
+        factory = replica if loader.session_factory is async_read_session else primary
+        monkeypatch.setattr(loader, "session_factory", factory)
+    return replica
+
+
 @pytest.fixture()
 async def db_session(async_engine):
     async_session = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
@@ -84,6 +112,7 @@ async def client(db_session):
         yield db_session
 
     app.dependency_overrides[real_get_db] = _get_db_override
+    app.dependency_overrides[real_get_read_db] = _get_db_override
 
     # httpx >= 0.28: no 'app=' kwarg to AsyncClient, use ASGITransport.
     # IMPORTANT: use HTTPS base_url so Secure cookies are sent.
@@ -0,0 +1,54 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app import auth_handoff
+from app.auth_handoff import DatabaseHandoffStore, MemoryHandoffStore
+from app.utils.auth import create_refresh_token
+
+
+async def test_memory_store_sweeps_expired_codes():
+    store = MemoryHandoffStore(capacity=100)
+    for i in range(10):
+        await store.put(f"old{i}", "r", ttl_seconds=-1)
+    await store.put("fresh", "refresh", ttl_seconds=60)
+
+    assert await store.outstanding() == 1
+    assert await store.pop("old0") is None
+    assert await store.pop("fresh") == "refresh"
+    assert await store.pop("fresh") is None
+    metrics = await store.metrics()
+    assert metrics["expired"] == 10 and metrics["redeemed"] == 1
+
+
+async def test_memory_store_is_bounded():
+    store = MemoryHandoffStore(capacity=3)
+    for i in range(5):
+        await store.put(f"c{i}", "r", ttl_seconds=60 + i)
+    assert await store.outstanding() == 3
+    assert await store.pop("c0") is None
+    assert await store.pop("c4") == "r"
+    assert store.counters["evicted"] == 2
+
+
+async def test_database_store_is_single_use(async_engine):
+    store = DatabaseHandoffStore(
+        sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    )
+    await store.put("abc", "refresh", ttl_seconds=60)
+    await store.put("gone", "refresh", ttl_seconds=-1)
+    assert await store.sweep() == 1
+    assert await store.pop("abc") == "refresh"
+    assert await store.pop("abc") is None
+    assert await store.outstanding() == 0
+
+
+async def test_handoff_exchange_sets_cookies(client):
+    refresh = create_refresh_token({"sub": "alice@example.com", "is_admin": False})
+    code = await auth_handoff.make_code(refresh)
+
+    r = await client.post("/auth/handoff", json={"code": code})
+    assert r.status_code == 200
+    assert await auth_handoff.store.pop(code) is None
+
+    r = await client.post("/auth/handoff", json={"code": code})
+    assert r.status_code == 400
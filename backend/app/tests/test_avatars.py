@@ -0,0 +1,157 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.avatar_blob import AvatarBlob
+from app.models.user import User
+from app.services import avatars, storage
+from app.services.job_queue import JobWorker
+from app.services.storage import LocalStorage
+
+
+def _image(fmt: str, size=(300, 200), orientation: int | None = None) -> bytes:
+    image = Image.new("RGB", size, "red")
+    image.paste("blue", (0, 0, size[0] // 2, size[1]))
+    out = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(out, fmt, exif=exif.tobytes())
+    return out.getvalue()
+
+
+def test_variants_are_square_rotated_and_stripped():
+    variants = avatars.render_variants(_image("JPEG", orientation=6))
+    assert sorted(variants) == [64, 128, 256]
+    with Image.open(io.BytesIO(variants[64])) as variant:
+        assert variant.format == "WEBP"
+        assert variant.size == (64, 64)
+        assert "exif" not in variant.info and "icc_profile" not in variant.info
+        # rotated a quarter turn: the blue left half is now the top half
+        top, bottom = variant.convert("RGB").getpixel((32, 4)), variant.convert("RGB").getpixel((32, 60))
+        assert top[2] > 200 and bottom[0] > 200
+
+
+def test_avatar_url_switches_size():
+    url = "/media/avatars/" + "a" * 64 + "/128.webp"
+    assert avatars.avatar_url(url, 64) == "/media/avatars/" + "a" * 64 + "/64.webp"
+    assert avatars.avatar_url(url, 100) == url
+    assert avatars.avatar_url("https://example.com/1_old.png", 64) == "https://example.com/1_old.png"
+    assert avatars.avatar_url(None) is None
+
+
+async def test_upload_is_processed_by_the_media_queue(client, async_engine, monkeypatch, tmp_path):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    monkeypatch.setattr(storage, "storage", LocalStorage(tmp_path, "/media"))
+    monkeypatch.setattr(avatars, "async_session", factory)
+    await client.post("/auth/login", json={"email": "alice@example.com", "password": "secret123"})
+
+    bad = await client.put(
+        "/users/update-avatar", files={"avatar": ("a.png", b"not an image", "image/png")}
+    )
+    assert bad.status_code == 400
+
+    data = _image("PNG")
+    r = await client.put("/users/update-avatar", files={"avatar": ("a.png", data, "image/png")})
+    assert r.status_code == 202
+    expected = f"/media/avatars/{avatars.digest(data)}/128.webp"
+    assert r.json()["avatar"] == expected
+
+    assert await JobWorker(factory, concurrency={"media": 1}).drain("media") == 1
+    for size in avatars.AVATAR_SIZES:
+        assert (tmp_path / "avatars" / avatars.digest(data) / f"{size}.webp").is_file()
+    async with factory() as db:
+        user = (await db.execute(select(User).where(User.username == "alice"))).scalar_one()
+    assert user.avatar == expected
+
+    r = await client.get(f"/users/{user.user_id}/avatar", params={"size": 64})
+    assert r.status_code == 307
+    assert r.headers["location"] == expected.replace("/128.", "/64.")
+
+
+async def test_identical_uploads_are_stored_once_and_collected(client, async_engine, monkeypatch, tmp_path):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    local = LocalStorage(tmp_path, "/media")
+    monkeypatch.setattr(storage, "storage", local)
+    monkeypatch.setattr(avatars, "async_session", factory)
+    worker = JobWorker(factory, concurrency={"media": 1})
+    shared, own = _image("PNG"), _image("PNG", size=(50, 80))
+
+    # log in once per account; the login rate limit is shared with other tests
+    tokens = {}
+    for email, password in (("alice@example.com", "secret123"), ("admin@example.com", "adminpass")):
+        await client.post("/auth/login", json={"email": email, "password": password})
+        tokens[email] = client.cookies["sl_access"]
+
+    async def upload(email, data):
+        client.cookies.set("sl_access", tokens[email])
+        r = await client.put("/users/update-avatar", files={"avatar": ("a.png", data, "image/png")})
+        await worker.drain("media")
+        return r
+
+    assert (await upload("alice@example.com", shared)).status_code == 202
+    r = await upload("admin@example.com", shared)
+    assert (r.status_code, r.json()["status"]) == (200, "ready")
+    assert (await upload("admin@example.com", shared)).json()["status"] == "ready"
+
+    async def refcounts():
+        async with factory() as db:
+            rows = await db.execute(select(AvatarBlob.digest, AvatarBlob.refcount))
+            return {digest: refcount for digest, refcount in rows}
+
+    assert await refcounts() == {avatars.digest(shared): 2}
+    await upload("alice@example.com", own)
+    await upload("admin@example.com", own)
+    assert await refcounts() == {avatars.digest(shared): 0, avatars.digest(own): 2}
+
+    assert await avatars.collect_garbage(local) == 0  # still within the grace period
+    monkeypatch.setattr(avatars, "AVATAR_GC_GRACE", -1)
+    assert await avatars.collect_garbage(local, batch_size=1) == 1
+    assert not (tmp_path / "avatars" / avatars.digest(shared)).exists()
+    assert (tmp_path / "avatars" / avatars.digest(own) / "64.webp").is_file()
+    assert await refcounts() == {avatars.digest(own): 2}
+
+
+async def test_upload_being_collected_is_processed_again(db_session):
+    user = (await db_session.execute(select(User).where(User.username == "alice"))).scalar_one()
+    data = _image("PNG")
+    # collect_garbage() has marked the row and is deleting its variants
+    db_session.add(AvatarBlob(digest=avatars.digest(data), refcount=0, stored=False, unreferenced_since=0))
+    await db_session.flush()
+
+    url, processing = await avatars.submit(db_session, user, data)
+    assert processing
+    blob = await db_session.get(AvatarBlob, avatars.digest(data))
+    await db_session.refresh(blob)
+    assert blob.refcount == 0 and user.avatar is None
+
+
+async def test_job_waits_for_a_collection_in_progress(db_session, async_engine, monkeypatch, tmp_path):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    monkeypatch.setattr(storage, "storage", LocalStorage(tmp_path, "/media"))
+    monkeypatch.setattr(avatars, "async_session", factory)
+    user = (await db_session.execute(select(User).where(User.username == "alice"))).scalar_one()
+    data = _image("PNG")
+    source = avatars.digest(data)
+    payload = avatars.AvatarUpload(user_id=user.user_id, data=base64.b64encode(data))
+    db_session.add(AvatarBlob(digest=source, refcount=0, stored=False, unreferenced_since=0))
+    await db_session.commit()
+
+    # variants stored now could be deleted by the collector right after
+    with pytest.raises(RuntimeError):
+        await avatars.process_upload(payload)
+    assert not (tmp_path / "avatars" / source).exists()
+
+    await db_session.delete(await db_session.get(AvatarBlob, source))  # collection finished
+    await db_session.commit()
+    await avatars.process_upload(payload)
+    assert (tmp_path / "avatars" / source / "64.webp").is_file()
+    async with factory() as db:
+        blob = await db.get(AvatarBlob, source)
+        assert (blob.refcount, blob.stored, blob.unreferenced_since) == (1, True, None)
+        assert (await db.get(User, user.user_id)).avatar == avatars.variant_url(source)
@@ -0,0 +1,116 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.services.cache import Cache, DatabaseTier, cached
+
+
+async def test_lru_is_bounded_by_entries_and_bytes():
+    cache = Cache("t", ttl=60, max_entries=3, max_bytes=100)
+    for i in range(3):
+        await cache.set(("k", i), "x" * 10)
+    await cache.get(("k", 0))  # most recently used now
+    await cache.set(("k", 3), "x" * 10)
+    assert await cache.get(("k", 1)) is None
+    assert await cache.get(("k", 0)) is not None
+
+    await cache.set(("big",), "x" * 90)
+    assert cache.memory.nbytes <= 100 and await cache.get(("big",)) is not None
+
+
+async def test_tags_and_generation():
+    cache = Cache("t", ttl=60)
+    await cache.set(("a",), 1, tags=("language:1",))
+    await cache.set(("b",), 2, tags=("language:2",))
+    await cache.invalidate_tags("language:1")
+    assert await cache.get(("a",)) is None and await cache.get(("b",)) == 2
+
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "old"
+
+    fill = asyncio.create_task(cache.get_or_load(("c",), slow))
+    await asyncio.sleep(0)
+    await cache.invalidate_tags("anything")
+    release.set()
+    assert await fill == "old"
+    assert await cache.get(("c",)) is None
+
+
+async def test_stale_while_revalidate():
+    cache = Cache("t", ttl=0, stale_ttl=60)
+    calls = []
+
+    @cached(cache, key=lambda n: ("n", n), session_factory=lambda: _FakeSession())
+    async def load(db, n):
+        calls.append(db)
+        return len(calls)
+
+    assert await load("request-db", 1) == 1
+    # stale: served at once, refreshed in the background on its own session
+    assert await load("request-db", 1) == 1
+    await asyncio.sleep(0.01)
+    assert isinstance(calls[-1], _FakeSession)
+    assert await load("request-db", 1) == 2
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def test_cancelled_first_caller_does_not_break_a_shared_fill():
+    cache = Cache("t", ttl=60)
+    started, release = asyncio.Event(), asyncio.Event()
+    used = []
+
+    class Session(_FakeSession):
+        closed = False
+
+        async def __aexit__(self, *exc):
+            self.closed = True
+            return False
+
+    @cached(cache, key=lambda: ("k",), session_factory=Session)
+    async def load(db):
+        used.append(db)
+        started.set()
+        await release.wait()
+        assert not db.closed
+        return "value"
+
+    async def request():
+        # like get_db: the request's session is closed when it is cancelled
+        async with Session() as db:
+            return await load(db)
+
+    first = asyncio.create_task(request())
+    await started.wait()
+    second = asyncio.create_task(request())
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "value"
+    assert first.cancelled()
+    (fill_session,) = used
+    assert fill_session.closed  # its own session, closed once the fill is done
+
+
+async def test_database_tier_is_shared(async_engine):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    worker_a = Cache("content", ttl=60, shared=DatabaseTier(factory))
+    worker_b = Cache("content", ttl=60, shared=DatabaseTier(factory))
+
+    await worker_a.set(("catalog", 1), [{"id": 1}], tags=("language:1",))
+    assert await worker_b.get(("catalog", 1)) == [{"id": 1}]
+
+    await worker_a.invalidate_tags("language:1")
+    worker_b.memory.clear()
+    assert await worker_b.get(("catalog", 1)) is None
@@ -0,0 +1,86 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.models import Language
+from app.models.video_reference import VideoReference
+from app.services import content_cache
+from app.services.compression import CompressionMiddleware, Snapshot, negotiate
+
+
+def test_negotiate():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("identity") is None
+    assert negotiate("*") in {"gzip", "br"}
+
+
+@pytest.fixture
+async def compressing_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse("x" * 1000)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("x" * 10)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"y" * 500 for _ in range(4)), media_type="text/plain")
+
+    @app.get("/snapshot")
+    def snapshot():
+        return Snapshot.of({"data": "z" * 2000}).response("gzip")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test",
+                           headers={"Accept-Encoding": "gzip"}) as client:
+        yield client
+
+
+async def test_middleware(compressing_client):
+    r = await compressing_client.get("/big")
+    assert r.headers["content-encoding"] == "gzip" and r.text == "x" * 1000
+    assert "accept-encoding" in r.headers["vary"].lower()
+
+    r = await compressing_client.get("/small")
+    assert "content-encoding" not in r.headers
+
+    r = await compressing_client.get("/stream")
+    assert r.headers["content-encoding"] == "gzip" and r.text == "y" * 2000
+
+    # precompressed once, not compressed a second time
+    r = await compressing_client.get("/snapshot")
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json() == {"data": "z" * 2000}
+
+
+async def test_dictionary_is_served_precompressed(client, db_session):
+    await content_cache.invalidate()
+    db_session.add(Language(id=1, code="asl", name="ASL"))
+    db_session.add_all(
+        VideoReference(video_id=f"v{i}", gloss=f"gloss {i:03d}", video_url=f"u{i}", language_id=1)
+        for i in range(100)
+    )
+    await db_session.commit()
+
+    r = await client.get("/dictionary/", params={"language": "ASL"},
+                         headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json()[0] == {"gloss": "gloss 000", "video_url": "u0"}
+    snapshot = await content_cache.snapshots.get(
+        ("dictionary", "ASL", content_cache.url_signer.window_start())
+    )
+    assert gzip.decompress(snapshot.variants["gzip"]) == snapshot.body
+
+    r = await client.get("/dictionary/", params={"language": "ASL"},
+                         headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers and len(r.json()) == 100
+    await content_cache.invalidate()
@@ -9,5 +9,18 @@ async def test_connection():
         print("Database connected successfully:", result.scalar())
 
 
+def test_engine_options_for_postgres():
+    from app.database import engine_options
+
+    options = engine_options("postgresql+asyncpg://u:p@db/app")
+    assert options["echo"] is False
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] > 0 and options["max_overflow"] >= 0
+    assert "prepared_statement_cache_size" in options["connect_args"]
+    assert options["connect_args"]["server_settings"]["statement_timeout"]
+
+    assert "pool_size" not in engine_options("sqlite+aiosqlite:///:memory:")
+
+
 if __name__ == "__main__":
     asyncio.run(test_connection())
@@ -0,0 +1,92 @@
+import pytest
+
+from app.utils import email_validation
+from app.utils.email_validation import (
+    VALID,
+    MXCache,
+    classify_locally,
+    edit_distance,
+    is_disposable,
+    suggest_domain,
+)
+
+# real providers that are within typo distance of a popular one
+CLOSE_PROVIDERS = (
+    "ymail.com", "gmx.net", "gmx.at", "gmx.ch", "live.ca",
+    "mac.com", "email.com", "msn.cn", "me.de",
+)
+
+
+@pytest.fixture()
+def mail_hosts(monkeypatch):
+    """Answer MX lookups from a dict instead of DNS."""
+    hosts = {}
+
+    async def lookup(domain):
+        return hosts.get(domain, True)
+
+    email_validation.mx_cache.clear()
+    monkeypatch.setattr(email_validation, "_lookup_mail_host", lookup)
+    yield hosts
+    email_validation.mx_cache.clear()
+
+
+def test_disposable_domains_match_subdomains():
+    assert is_disposable("mailinator.com")
+    assert is_disposable("foo.mailinator.com")
+    assert not is_disposable("example.com")
+
+
+def test_typo_suggestions():
+    assert edit_distance("gmial.com", "gmail.com") == 1
+    assert suggest_domain("gmial.com") == "gmail.com"
+    assert suggest_domain("hotmal.com") == "hotmail.com"
+    assert suggest_domain("gmail.com") is None
+    assert suggest_domain("university.edu") is None
+    for domain in CLOSE_PROVIDERS:
+        assert suggest_domain(domain) is None, domain
+
+
+async def test_known_providers_are_valid(mail_hosts):
+    mail_hosts.update({domain: False for domain in CLOSE_PROVIDERS})  # never asked
+    for domain in CLOSE_PROVIDERS:
+        result = await classify_locally(f"bob@{domain}")
+        assert result == {"status": VALID, "format_valid": True}, domain
+
+
+async def test_typos_are_only_a_hint(mail_hosts):
+    result = await classify_locally("bob@gmial.com")
+    assert result["status"] == VALID and result["did_you_mean"] == "bob@gmail.com"
+
+    mail_hosts["hotmal.com"] = False
+    result = await classify_locally("bob@hotmal.com")
+    assert result["status"] == "invalid" and result["mx_found"] is False
+    assert result["did_you_mean"] == "bob@hotmail.com"
+
+
+def test_mx_cache_is_bounded():
+    cache = MXCache(maxsize=2)
+    cache.set("a.com", True)
+    cache.set("b.com", False)
+    cache.set("c.com", True)
+    assert len(cache) == 2
+    assert cache.get("a.com") is None
+    assert cache.get("b.com") is False
+
+
+# the local tier answers these without DNS or the external validator
+async def test_validate_email_rejects_locally(client, mail_hosts):
+    r = await client.post("/auth/validate-email", json={"email": "x@yopmail.com"})
+    assert r.status_code == 200
+    assert r.json()["valid"] is False
+    assert r.json()["source"] == "local"
+
+    r = await client.post("/auth/validate-email", json={"email": "bob@gmial.com"})
+    assert r.json()["valid"] is True
+    assert r.json()["did_you_mean"] == "bob@gmail.com"
+
+    r = await client.post("/auth/validate-email", json={"email": "bob@gmx.net"})
+    assert r.json() == {"valid": True, "source": "local", "format_valid": True}
+
+    r = await client.post("/auth/validate-email", json={"email": "not-an-email"})
+    assert r.json()["valid"] is False
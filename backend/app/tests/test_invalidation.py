@@ -0,0 +1,60 @@
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.language import Language
+from app.services import content_cache
+from app.services.invalidation import InvalidationBus, bus
+
+
+async def test_polling_bus_reaches_other_workers(async_engine):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    worker_a = InvalidationBus(async_engine, factory, enabled=True)
+    worker_b = InvalidationBus(async_engine, factory, enabled=True)
+    assert not worker_a.uses_notify
+    seen_a, seen_b = [], []
+    worker_a.subscribe(seen_a.append)
+    worker_b.subscribe(seen_b.append)
+    await worker_a.poll_once()
+    await worker_b.poll_once()
+
+    await worker_a.publish("catalog", "lesson:42")
+    await worker_a.publish()
+    assert await worker_b.poll_once() == 2
+    assert seen_b == [("catalog", "lesson:42"), ()]
+    # the sender skips its own messages
+    await worker_a.poll_once()
+    assert seen_a == []
+
+
+async def test_remote_message_evicts_content_cache():
+    await content_cache.invalidate()
+    await content_cache.cache.set(("catalog", 3), [], tags=("catalog", "language:3"))
+    await content_cache.cache.set(("languages",), [], tags=("languages",))
+
+    bus._deliver(orjson.dumps({"origin": "other-worker", "tags": ["language:3"]}).decode())
+    assert await content_cache.cache.get(("catalog", 3)) is None
+    assert await content_cache.cache.get(("languages",)) == []
+    await content_cache.invalidate()
+
+
+async def test_refill_after_invalidation_ignores_a_lagging_replica(
+    db_session, monkeypatch, cached_loaders_use_test_engine
+):
+    # a replica that has not replayed anything yet
+    lagging = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with lagging.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setitem(cached_loaders_use_test_engine.kw, "bind", lagging)
+
+    await content_cache.invalidate()
+    assert await content_cache.languages(db_session) == []
+
+    db_session.add(Language(id=7, code="bsl", name="BSL"))
+    await db_session.commit()
+    await content_cache.invalidate("languages")
+    assert await content_cache.languages(db_session) == [{"id": 7, "name": "BSL", "code": "bsl"}]
+
+    await content_cache.invalidate()
+    await lagging.dispose()
@@ -0,0 +1,82 @@
+import asyncio
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.queued_job import QueuedJob
+from app.services import job_queue
+from app.services.job_queue import JobWorker, enqueue, job_handler
+
+
+class Greeting(BaseModel):
+    name: str
+
+
+seen = []
+
+
+@job_handler("test_greet", payload=Greeting, max_attempts=2)
+async def greet(payload: Greeting):
+    if payload.name == "fail":
+        raise RuntimeError("boom")
+    seen.append(payload.name)
+
+
+async def test_jobs_run_retry_and_dead_letter(async_engine, monkeypatch):
+    monkeypatch.setattr(job_queue, "backoff_delay", lambda attempts: 0)
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    worker = JobWorker(factory, concurrency={"default": 2})
+    async with factory() as db:
+        enqueue(db, "test_greet", {"name": "ada"})
+        enqueue(db, "test_greet", Greeting(name="fail"))
+        enqueue(db, "test_greet", {"name": "later"}, delay=3600)
+        await db.commit()
+
+    assert await worker.drain() == 3  # ada, fail, fail again
+    assert seen == ["ada"]
+    assert worker.stats == {"done": 1, "retried": 1, "dead": 1}
+    async with factory() as db:
+        statuses = (await db.execute(select(QueuedJob.status).order_by(QueuedJob.job_id))).scalars().all()
+    assert statuses == ["done", "dead", "pending"]
+
+
+async def test_jobs_whose_runner_died_use_up_attempts(async_engine):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    worker = JobWorker(factory, concurrency={"default": 2})
+    async with factory() as db:
+        crashed_once = enqueue(db, "test_greet", {"name": "crashed once"})
+        crashed_twice = enqueue(db, "test_greet", {"name": "crashed twice"})
+        await db.commit()
+    # as if claimed by a process that died: RUNNING with an expired lease
+    async with factory() as db:
+        for job, attempts in ((crashed_once, 1), (crashed_twice, 2)):
+            job = await db.get(QueuedJob, job.job_id)
+            job.status, job.attempts = "running", attempts
+        await db.commit()
+
+    assert await worker.drain() == 1
+    assert "crashed twice" not in seen
+    async with factory() as db:
+        rows = (await db.execute(select(QueuedJob.status, QueuedJob.attempts).order_by(QueuedJob.job_id))).all()
+    assert [tuple(row) for row in rows] == [("done", 2), ("dead", 2)]
+    assert worker.stats == {"done": 1, "retried": 0, "dead": 1}
+
+
+async def test_background_worker_picks_up_woken_jobs(async_engine):
+    factory = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    worker = JobWorker(factory, concurrency={"default": 1}, poll_interval=60)
+    worker.start()
+    try:
+        async with factory() as db:
+            enqueue(db, "test_greet", {"name": "bob"})
+            await db.commit()
+        worker.wake()
+        for _ in range(100):
+            if "bob" in seen:
+                break
+            await asyncio.sleep(0.01)
+        assert "bob" in seen
+    finally:
+        await worker.stop()
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from fastapi_mail import ConnectionConfig
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.email_outbox import EmailOutbox
+from app.services.mailer import OutboxWorker, SMTPSender, enqueue_email
+
+
+class SMTPSink:
+    """Just enough of an SMTP server to receive messages on localhost."""
+
+    def __init__(self, reject_recipients=False):
+        self.reject_recipients = reject_recipients
+        self.messages = []
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 sink ESMTP\r\n")
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            cmd = line.decode().strip().upper()
+            if cmd.startswith(("EHLO", "HELO")):
+                writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+            elif cmd.startswith("RCPT") and self.reject_recipients:
+                writer.write(b"550 mailbox unavailable\r\n")
+            elif cmd == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                data = b""
+                while not data.endswith(b"\r\n.\r\n"):
+                    data += await reader.readline()
+                self.messages.append(data)
+                writer.write(b"250 queued\r\n")
+            elif cmd == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def _config(port):
+    return ConnectionConfig(
+        MAIL_USERNAME="sink",
+        MAIL_PASSWORD="sink",
+        MAIL_FROM="noreply@example.com",
+        MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+    )
+
+
+@pytest.fixture()
+def session_factory(async_engine):
+    return sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+
+
+async def _statuses(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(EmailOutbox).order_by(EmailOutbox.email_id))
+        return [(row.status, row.attempts) for row in result.scalars()]
+
+
+async def test_outbox_drains_over_one_connection(session_factory):
+    async with session_factory() as db:
+        for i in range(3):
+            enqueue_email(db, f"user{i}@example.com", "Hello", "<p>hi</p>")
+        await db.commit()
+
+    async with SMTPSink() as sink:
+        worker = OutboxWorker(session_factory, SMTPSender(_config(sink.port)))
+        assert await worker.drain_once() == 3
+        assert await worker.drain_once() == 0
+        await worker.sender.close()
+
+    assert len(sink.messages) == 3
+    assert sink.connections == 1
+    assert await _statuses(session_factory) == [("sent", 1)] * 3
+
+
+async def test_outbox_retries_then_dead_letters(session_factory):
+    async with session_factory() as db:
+        enqueue_email(db, "nobody@example.com", "Hello", "<p>hi</p>")
+        await db.commit()
+
+    async with SMTPSink(reject_recipients=True) as sink:
+        worker = OutboxWorker(
+            session_factory, SMTPSender(_config(sink.port)), max_attempts=2
+        )
+        assert await worker.drain_once() == 1
+        assert await _statuses(session_factory) == [("pending", 1)]
+
+        # backoff pushed it into the future; make it due again
+        async with session_factory() as db:
+            item = (await db.execute(select(EmailOutbox))).scalar_one()
+            item.next_attempt_at = item.created_at
+            await db.commit()
+
+        assert await worker.drain_once() == 1
+        await worker.sender.close()
+
+    assert await _statuses(session_factory) == [("dead", 2)]
+    assert worker.stats["dead"] == 1
+
+
+async def test_unexpected_failure_does_not_lose_the_batch(session_factory, monkeypatch):
+    from app.services import mailer
+
+    async with session_factory() as db:
+        for i in range(3):
+            enqueue_email(db, f"user{i}@example.com", "Hello", "<p>hi</p>")
+        await db.commit()
+
+    build = mailer.build_message
+
+    def flaky_build(item, conf):
+        if item.recipient == "user1@example.com":
+            raise ValueError("cannot encode")
+        return build(item, conf)
+
+    monkeypatch.setattr(mailer, "build_message", flaky_build)
+    async with SMTPSink() as sink:
+        worker = OutboxWorker(
+            session_factory, SMTPSender(_config(sink.port)), max_attempts=1
+        )
+        assert await worker.drain_once() == 3
+        await worker.sender.close()
+
+    assert len(sink.messages) == 2
+    assert await _statuses(session_factory) == [("sent", 1), ("dead", 1), ("sent", 1)]
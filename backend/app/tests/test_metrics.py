@@ -0,0 +1,64 @@
+import json
+import os
+
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.services.metrics import MetricsMiddleware, Registry, REQUESTS, registry
+
+
+async def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/lessons/{lesson_id}")
+    async def lesson(lesson_id: int):
+        if lesson_id == 0:
+            raise HTTPException(status_code=404)
+        return {"id": lesson_id}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="https://test") as ac:
+        for lesson_id in (1, 2, 0):
+            await ac.get(f"/lessons/{lesson_id}")
+
+    assert REQUESTS.values[("GET", "/lessons/{lesson_id}", "200")] >= 2
+    text = await registry.render()
+    assert 'http_errors_total{status="404"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/lessons/{lesson_id}",le="+Inf"}' in text
+    assert "/lessons/1" not in text
+
+
+async def test_multiprocess_mode_sums_worker_snapshots(tmp_path):
+    worker = Registry(multiproc_dir=str(tmp_path))
+    hits = worker.counter("hits_total", "Hits.", ("route",))
+    latency = worker.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    hits.inc("/a", amount=3)
+    latency.observe(0.05)
+
+    # a second worker's snapshot, as it would have flushed it
+    other = Registry(multiproc_dir=str(tmp_path))
+    other.counter("hits_total", "Hits.", ("route",)).inc("/a", amount=4)
+    other.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)).observe(0.5)
+    snapshot = other.snapshot()
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(snapshot))
+
+    text = await worker.render()
+    assert 'hits_total{route="/a"} 7' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert "latency_seconds_count 2" in text
+
+
+async def test_metrics_need_a_token_in_production(client, monkeypatch):
+    from app.routers import metrics
+
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", None)
+    assert (await client.get("/metrics")).status_code == 200
+    monkeypatch.setattr(metrics, "METRICS_REQUIRE_TOKEN", True)
+    assert (await client.get("/metrics")).status_code == 404
+
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scraper")
+    assert (await client.get("/metrics")).status_code == 401
+    r = await client.get("/metrics", headers={"Authorization": "Bearer scraper"})
+    assert r.status_code == 200
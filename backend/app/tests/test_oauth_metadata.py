@@ -0,0 +1,82 @@
+import httpx
+from authlib.integrations.starlette_client import OAuth
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.services.oauth_metadata import ProviderMetadataCache
+
+DISCOVERY_URL = "https://idp.test/.well-known/openid-configuration"
+JWKS = {"keys": [{"kty": "oct", "kid": "k1", "k": "c2VjcmV0"}]}
+
+
+def _stand_in_idp():
+    hits = {"discovery": 0, "jwks": 0}
+
+    async def discovery(request):
+        hits["discovery"] += 1
+        return JSONResponse(
+            {
+                "issuer": "https://idp.test",
+                "authorization_endpoint": "https://idp.test/authorize",
+                "token_endpoint": "https://idp.test/token",
+                "jwks_uri": "https://idp.test/jwks",
+            }
+        )
+
+    async def jwks(request):
+        hits["jwks"] += 1
+        return JSONResponse(JWKS)
+
+    app = Starlette(
+        routes=[
+            Route("/.well-known/openid-configuration", discovery),
+            Route("/jwks", jwks),
+        ]
+    )
+    return httpx.ASGITransport(app=app), hits
+
+
+def _register():
+    oauth = OAuth()
+    oauth.register(
+        name="idp",
+        client_id="cid",
+        client_secret="secret",
+        server_metadata_url=DISCOVERY_URL,
+    )
+    return oauth.idp
+
+
+async def test_refresh_writes_snapshot_that_warm_starts_new_workers(tmp_path):
+    transport, hits = _stand_in_idp()
+    snapshot = str(tmp_path / "idp.json")
+
+    first = ProviderMetadataCache(_register(), DISCOVERY_URL, snapshot, transport=transport)
+    assert first.load_snapshot() is False
+    await first.refresh()
+    assert hits == {"discovery": 1, "jwks": 1}
+    await first.ensure_fresh()
+    assert hits["discovery"] == 1
+
+    client = _register()
+    second = ProviderMetadataCache(client, DISCOVERY_URL, snapshot)
+    assert second.load_snapshot() is True
+    assert not second.is_stale()
+
+    # Authlib must not go to the network for either document now
+    metadata = await client.load_server_metadata()
+    assert metadata["token_endpoint"] == "https://idp.test/token"
+    assert await client.fetch_jwk_set() == JWKS
+    assert hits == {"discovery": 1, "jwks": 1}
+
+
+async def test_snapshot_for_other_provider_is_ignored(tmp_path):
+    transport, _ = _stand_in_idp()
+    snapshot = str(tmp_path / "idp.json")
+    await ProviderMetadataCache(
+        _register(), DISCOVERY_URL, snapshot, transport=transport
+    ).refresh()
+
+    other = ProviderMetadataCache(_register(), "https://other.test/discovery", snapshot)
+    assert other.load_snapshot() is False
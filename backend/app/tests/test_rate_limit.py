@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.services.rate_limit import (
+    DatabaseBackend,
+    Rule,
+    TokenBucketTable,
+    env_rule,
+    limiter,
+)
+
+
+@pytest.fixture(autouse=True)
+async def fresh_limiter():
+    await limiter.reset()
+    yield
+    await limiter.reset()
+
+
+def test_bucket_refills_lazily():
+    table = TokenBucketTable(slots=16)
+    for _ in range(3):
+        assert table.take("k", capacity=3, rate=1.0, now=100.0) == 0
+    assert table.take("k", capacity=3, rate=1.0, now=100.0) == pytest.approx(1.0)
+    assert table.take("k", capacity=3, rate=1.0, now=101.5) == 0
+
+
+def test_bucket_table_is_bounded():
+    table = TokenBucketTable(slots=16)
+    for i in range(1000):
+        table.take(f"client{i}", capacity=1, rate=1.0, now=float(i))
+    assert len(table) <= 16
+
+
+async def test_database_backend(async_engine):
+    backend = DatabaseBackend(
+        sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    )
+    rule = Rule("test", 2, 60)
+    assert await backend.take(rule, "1.2.3.4") == 0
+    assert await backend.take(rule, "1.2.3.4") == 0
+    assert await backend.take(rule, "1.2.3.4") > 0
+    assert await backend.take(rule, "5.6.7.8") == 0
+
+
+async def test_ip_limit_returns_429_with_retry_after(client):
+    for _ in range(30):
+        r = await client.post("/auth/check-email", json={"email": "a@example.com"})
+        assert r.status_code == 200
+    r = await client.post("/auth/check-email", json={"email": "a@example.com"})
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+async def test_login_is_limited_per_account(client):
+    for _ in range(5):
+        r = await client.post(
+            "/auth/login", json={"email": "alice@example.com", "password": "wrong"}
+        )
+        assert r.status_code == 401
+    r = await client.post(
+        "/auth/login", json={"email": "alice@example.com", "password": "secret123"}
+    )
+    assert r.status_code == 429
+    assert "Retry-After" in r.headers
+
+
+async def test_spoofed_forwarded_for_shares_one_bucket(client):
+    # the test client connects from 127.0.0.1, the trusted proxy, which
+    # appends the address it saw; whatever the caller put before it is ignored
+    for i in range(30):
+        r = await client.post(
+            "/auth/check-email",
+            json={"email": "a@example.com"},
+            headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"},
+        )
+        assert r.status_code == 200
+    r = await client.post(
+        "/auth/check-email",
+        json={"email": "a@example.com"},
+        headers={"X-Forwarded-For": "10.0.0.99, 203.0.113.7"},
+    )
+    assert r.status_code == 429
+    r = await client.post(
+        "/auth/check-email",
+        json={"email": "a@example.com"},
+        headers={"X-Forwarded-For": "198.51.100.1"},
+    )
+    assert r.status_code == 200
+
+
+async def test_successful_logins_do_not_use_up_the_account_limit(client):
+    for _ in range(7):
+        r = await client.post(
+            "/auth/login", json={"email": "alice@example.com", "password": "secret123"}
+        )
+        assert r.status_code == 200
+
+
+def test_rules_can_be_set_from_env(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_SIGNUP_IP", "50/3600")
+    assert env_rule("signup-ip", 5, 60 * 60) == Rule("signup-ip", 50, 3600)
+    assert env_rule("forgot-ip", 5, 15 * 60) == Rule("forgot-ip", 5, 900)
@@ -0,0 +1,66 @@
+import time
+
+from fastapi import Depends, FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text
+
+from app.utils.read_routing import (
+    PIN_COOKIE_NAME,
+    ReadRouter,
+    ReadYourWritesMiddleware,
+)
+
+
+async def _database(path, name):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE whoami (name TEXT)"))
+        await conn.execute(text("INSERT INTO whoami VALUES (:n)"), {"n": name})
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def test_reads_use_replica_until_client_writes(tmp_path):
+    primary_engine, primary = await _database(tmp_path / "primary.db", "primary")
+    replica_engine, replica = await _database(tmp_path / "replica.db", "replica")
+    router = ReadRouter(primary, replica)
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, pin_seconds=30)
+
+    async def read_db(request: Request):
+        async with router.session_factory(request)() as session:
+            yield session
+
+    @app.get("/whoami")
+    async def whoami(db: AsyncSession = Depends(read_db)):
+        return (await db.execute(text("SELECT name FROM whoami"))).scalar()
+
+    @app.post("/progress")
+    async def progress():
+        return {"ok": True}
+
+    @app.post("/auth/check-email")
+    async def check_email():
+        return {"ok": True}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="https://test") as ac:
+        assert (await ac.get("/whoami")).json() == "replica"
+
+        r = await ac.post("/auth/check-email")
+        assert PIN_COOKIE_NAME not in r.cookies
+
+        r = await ac.post("/progress")
+        assert PIN_COOKIE_NAME in r.cookies
+        assert "Partitioned" in r.headers["set-cookie"]
+        assert (await ac.get("/whoami")).json() == "primary"
+
+        ac.cookies.set(PIN_COOKIE_NAME, str(int(time.time()) - 1))
+        assert (await ac.get("/whoami")).json() == "replica"
+
+    assert router.replica_reads == 2 and router.primary_reads == 1
+    await primary_engine.dispose()
+    await replica_engine.dispose()
+
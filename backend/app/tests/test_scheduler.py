@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.scheduled_jobs import main, scheduler as app_scheduler
+from app.services.scheduler import Cron, Job, Scheduler
+
+
+def test_cron_next_after():
+    every_15 = Cron("*/15 * * * *")
+    assert every_15.next_after(datetime(2026, 1, 1, 10, 7)) == datetime(2026, 1, 1, 10, 15)
+    weekdays_9am = Cron("0 9 * * 1-5")
+    # Saturday 2026-01-03 -> Monday 2026-01-05
+    assert weekdays_9am.next_after(datetime(2026, 1, 3, 12, 0)) == datetime(2026, 1, 5, 9, 0)
+    # day-of-month or day-of-week once both are restricted, as in cron
+    first_or_monday = Cron("0 0 1 * 1")
+    assert first_or_monday.next_after(datetime(2026, 1, 1, 12, 0)) == datetime(2026, 1, 5, 0, 0)
+    assert first_or_monday.next_after(datetime(2026, 1, 27, 12, 0)) == datetime(2026, 2, 1, 0, 0)
+    assert Cron("0 0 1 * *").next_after(datetime(2026, 1, 1, 12, 0)) == datetime(2026, 2, 1, 0, 0)
+    with pytest.raises(ValueError):
+        Cron("61 * * * *")
+
+
+async def test_run_records_outcome_and_loop_runs_jobs():
+    scheduler = Scheduler()
+    calls = []
+
+    @scheduler.job(interval=0.01)
+    async def tick():
+        calls.append(1)
+        return len(calls)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    scheduler.add(Job("slow", slow, interval=60, timeout=0.01))
+    assert await scheduler.run("tick") == 1
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.run("slow")
+
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+    assert len(calls) > 2
+
+
+def test_app_jobs_are_registered(capsys):
+    assert {"sweep_handoff_codes", "refresh_leaderboard", "sweep_cache_entries"} <= set(
+        app_scheduler.jobs
+    )
+    assert main(["list"]) == 0
+    assert "sweep_cache_entries" in capsys.readouterr().out
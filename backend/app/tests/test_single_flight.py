@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.create_task(flight.do("k", load)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*waiters) == [1] * 10
+    assert calls == 1 and flight.coalesced == 9 and len(flight) == 0
+
+    # a finished flight is not reused
+    assert await flight.do("k", load) == 2
+
+
+async def test_errors_reach_every_caller_and_leader_cancel_is_isolated():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def fail():
+        await release.wait()
+        raise ValueError("boom")
+
+    leader = asyncio.create_task(flight.do("k", fail))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", fail))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    with pytest.raises(ValueError):
+        await follower
@@ -0,0 +1,56 @@
+import json
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import text
+
+from app.utils.slow_query_log import SlowQueryLog, _is_explainable, fingerprint
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint("SELECT * FROM task WHERE lesson_id = 3") == fingerprint(
+        "SELECT * FROM task  WHERE lesson_id = 17"
+    )
+
+
+async def test_slow_queries_are_logged_once_per_fingerprint(tmp_path):
+    path = tmp_path / "slow.log"
+    log = SlowQueryLog(path=str(path), threshold_ms=0, dedupe_seconds=3600)
+    engine = create_async_engine("sqlite+aiosqlite://")
+    log.install(engine)
+
+    async with engine.connect() as conn:
+        for n in range(3):
+            await conn.execute(text("SELECT :n AS n"), {"n": n})
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    slow = [e for e in entries if e.get("statement") == "SELECT ? AS n"]
+    assert len(slow) == 1
+    assert slow[0]["params"] == "('int',)"
+    assert log.seen[slow[0]["fingerprint"]][1] == 2
+    await engine.dispose()
+
+
+async def test_parameter_values_are_only_logged_when_enabled(tmp_path):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    for log_params, expected in ((False, "{'token': 'str[6]'}"), (True, "{'token': 'secret'}")):
+        path = tmp_path / f"slow-{log_params}.log"
+        log = SlowQueryLog(path=str(path), threshold_ms=0, log_params=log_params)
+        log.record(engine, "SELECT :token", {"token": "secret"}, 1.0)
+        (entry,) = [json.loads(line) for line in path.read_text().splitlines()]
+        assert entry["params"] == expected
+    await engine.dispose()
+
+
+def test_only_side_effect_free_reads_are_explained():
+    assert _is_explainable("SELECT * FROM task WHERE lesson_id = $1")
+    assert _is_explainable("WITH t AS (SELECT 1) SELECT * FROM t")
+    for statement in (
+        "SELECT * FROM job_queue FOR UPDATE SKIP LOCKED",
+        "SELECT * FROM users FOR NO KEY UPDATE",
+        "SELECT * FROM users FOR SHARE",
+        "WITH gone AS (DELETE FROM cache_entry RETURNING *) SELECT count(*) FROM gone",
+        "SELECT * INTO backup FROM users",
+        "SELECT pg_try_advisory_lock(1)",
+        "UPDATE users SET points = 0",
+    ):
+        assert not _is_explainable(statement), statement
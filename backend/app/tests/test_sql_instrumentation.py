@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import text
+
+from app.utils.sql_instrumentation import (
+    SQLStatsMiddleware,
+    install_sql_instrumentation,
+    normalize_statement,
+)
+
+
+def test_normalize_statement_groups_by_shape():
+    a = normalize_statement("SELECT * FROM lesson WHERE module_id = 3 AND title = 'x'")
+    b = normalize_statement("SELECT *  FROM lesson\n WHERE module_id = 41 AND title = 'y'")
+    assert a == b == "SELECT * FROM lesson WHERE module_id = ? AND title = ?"
+    assert normalize_statement("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == (
+        "SELECT ? FROM t WHERE id IN (?)"
+    )
+
+
+async def test_middleware_reports_queries_and_flags_n_plus_one(async_engine, caplog):
+    install_sql_instrumentation()
+    app = FastAPI()
+    app.add_middleware(SQLStatsMiddleware, expose_headers=True, threshold=3)
+
+    @app.get("/lessons")
+    async def lessons():
+        async with async_engine.connect() as conn:
+            for module_id in range(5):
+                await conn.execute(
+                    text("SELECT COUNT(*) FROM lesson WHERE module_id = :m"),
+                    {"m": module_id},
+                )
+        return []
+
+    transport = ASGITransport(app=app)
+    with caplog.at_level(logging.INFO, logger="app.utils.sql_instrumentation"):
+        async with AsyncClient(transport=transport, base_url="https://test") as ac:
+            r = await ac.get("/lessons")
+
+    assert r.headers["x-db-queries"] == "5"
+    assert float(r.headers["x-db-time-ms"]) > 0
+    warnings = [rec for rec in caplog.records if rec.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert warnings[0].repeat_count == 5
+    assert warnings[0].path == "/lessons"
+
+
+async def test_failed_statements_do_not_leak_start_times(async_engine):
+    install_sql_instrumentation()
+    app = FastAPI()
+    app.add_middleware(SQLStatsMiddleware, expose_headers=True)
+    infos = []
+
+    @app.get("/broken")
+    async def broken():
+        async with async_engine.connect() as conn:
+            infos.append(conn.sync_connection.info)
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+            await conn.execute(text("SELECT 1"))
+        return []
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="https://test") as ac:
+        r = await ac.get("/broken")
+
+    assert r.headers["x-db-queries"] == "2"
+    assert infos[0].get("sql_stats_start") == []
@@ -0,0 +1,58 @@
+import boto3
+import pytest
+from botocore.config import Config
+from moto import mock_aws
+
+from app.services.storage import STORAGE_LATENCY, S3Storage
+
+
+@pytest.fixture()
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client(
+            "s3", region_name="us-east-1", config=Config(signature_version="s3v4")
+        )
+        client.create_bucket(Bucket="media-test")
+        yield client
+
+
+@pytest.fixture()
+def store(s3):
+    storage = S3Storage(
+        "media-test",
+        "us-east-1",
+        client_factory=lambda: s3,
+        max_workers=4,
+        multipart_threshold=6 * 1024 * 1024,
+        part_size=5 * 1024 * 1024,
+    )
+    yield storage
+    storage.close()
+
+
+async def test_put_get_and_multipart(store, s3):
+    await store.put("small.txt", b"hello", "text/plain")
+    assert await store.get("small.txt") == b"hello"
+
+    big = bytes(range(256)) * (11 * 1024 * 1024 // 256)  # three parts
+    await store.put("big.bin", big, "application/octet-stream")
+    assert await store.get("big.bin") == big
+    head = s3.head_object(Bucket="media-test", Key="big.bin")
+    assert head["ETag"].endswith('-3"')  # multipart ETags end in the part count
+    assert head["CacheControl"] == "public, max-age=31536000, immutable"
+    assert STORAGE_LATENCY.values[("s3", "upload_part")][-1] >= 3
+
+
+async def test_batched_delete_and_presign(store, s3, monkeypatch):
+    monkeypatch.setattr("app.services.storage.DELETE_BATCH", 2)
+    keys = [f"k/{i}" for i in range(5)]
+    for key in keys:
+        await store.put(key, b"x", "text/plain")
+    await store.delete(keys + ["missing"])
+    assert s3.list_objects_v2(Bucket="media-test").get("KeyCount") == 0
+
+    url = store.presign("k/0", expires_in=600)
+    assert "X-Amz-Signature=" in url
+    assert "k/0" in url
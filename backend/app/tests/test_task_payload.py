@@ -0,0 +1,48 @@
+from sqlalchemy import select
+
+from app.models import Language, Lesson, Module, Task, TaskVideo, User
+from app.models.video_reference import VideoReference
+
+
+async def _seed_tasks(db):
+    admin = (await db.execute(select(User).where(User.is_admin))).scalar_one()
+    db.add(Language(id=1, code="asl", name="ASL"))
+    db.add_all([
+        Module(module_id=1, title="Basics", created_by=admin.user_id, version=1, language_id=1),
+        Lesson(lesson_id=1, title="Hello", module_id=1, version=1),
+        VideoReference(video_id="v1", gloss="hello", video_url="u1", language_id=1,
+                       video_metadata={"fps": 25}),
+        VideoReference(video_id="v2", gloss="bye", video_url="u2", language_id=1),
+        Task(task_id=1, task_type="sign_presentation", content={"text": "hi"},
+             correct_answer=None, lesson_id=1, version=1, points=5),
+        Task(task_id=2, task_type="multiple_choice", content="bad",
+             correct_answer={"answer": "v2"}, lesson_id=1, version=1, points=3),
+    ])
+    await db.flush()
+    db.add_all([
+        TaskVideo(task_id=1, video_id="v1"),
+        TaskVideo(task_id=2, video_id="v1"),
+        TaskVideo(task_id=2, video_id="v2"),
+    ])
+    await db.commit()
+
+
+async def test_lesson_tasks(client, db_session):
+    await _seed_tasks(db_session)
+    await client.post("/auth/login", json={"email": "alice@example.com", "password": "secret123"})
+
+    r = await client.get("/users/lessons/1/tasks")
+    assert r.status_code == 200
+    presentation, choice = r.json()
+    assert presentation["content"] == {"text": "hi", "video_id": "v1"}
+    assert presentation["videos"] == [] and presentation["correct_answer"] == {}
+    assert choice["content"] == {}
+    assert choice["videos"] == [
+        {"video_id": "v1", "gloss": "hello", "signer_id": None, "video_url": "u1"},
+        {"video_id": "v2", "gloss": "bye", "signer_id": None, "video_url": "u2"},
+    ]
+
+    r = await client.get("/users/tasks/2", params={"include_metadata": "true"})
+    assert [v["video_metadata"] for v in r.json()["videos"]] == [{"fps": 25}, None]
+
+    assert (await client.get("/users/tasks/99")).status_code == 404
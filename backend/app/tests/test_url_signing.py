@@ -0,0 +1,72 @@
+import datetime
+import types
+
+import boto3
+import botocore.auth
+from botocore.config import Config
+
+from app.models import Task, TaskVideo
+from app.models.video_reference import VideoReference
+from app.services import task_payload
+from app.services.task_payload import load_tasks
+from app.services.url_signing import UrlSigner
+
+START = 1_790_000_000 // 3600 * 3600
+URL = "https://asl-video-dataset.s3.eu-west-1.amazonaws.com/videos/a%20b%2Bc.mp4"
+
+
+def _signer(**options) -> UrlSigner:
+    return UrlSigner("AKIDEXAMPLE", "secret", "eu-west-1", enabled=True, **options)
+
+
+def test_signatures_match_botocore(monkeypatch):
+    class Frozen(datetime.datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.datetime(2026, 9, 21, 14, 0, 0)
+
+    assert Frozen.utcnow().replace(tzinfo=datetime.timezone.utc).timestamp() == START
+    monkeypatch.setattr(botocore.auth, "datetime", types.SimpleNamespace(datetime=Frozen))
+    client = boto3.client(
+        "s3",
+        region_name="eu-west-1",
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="secret",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}),
+    )
+    expected = client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": "asl-video-dataset", "Key": "videos/a b+c.mp4"},
+        ExpiresIn=7200,
+    )
+    assert _signer().sign_many([URL], now=START + 1234)[URL] == expected
+
+
+def test_signatures_are_reused_within_a_window():
+    signer = _signer(max_entries=1)
+    first = signer.sign_many([URL, URL], now=START + 10)[URL]
+    assert signer.sign_many([URL], now=START + 3599)[URL] == first
+    assert (signer.signed, signer.hits) == (1, 1)
+
+    later = signer.sign_many([URL], now=START + 3600)[URL]
+    assert later != first and "X-Amz-Date=20260921T150000Z" in later
+
+    other = "https://example.com/video.mp4"
+    assert signer.sign_many([other])[other] == other
+    assert UrlSigner("AKIDEXAMPLE", "secret", enabled=False).sign(URL) == URL
+
+
+async def test_task_payloads_carry_signed_urls(db_session, monkeypatch):
+    db_session.add_all([
+        VideoReference(video_id="v1", gloss="hello", video_url=URL, language_id=1),
+        Task(task_id=1, task_type="multiple_choice", content={}, correct_answer={},
+             lesson_id=1, version=1, points=1),
+    ])
+    await db_session.flush()
+    db_session.add(TaskVideo(task_id=1, video_id="v1"))
+    await db_session.commit()
+    monkeypatch.setattr(task_payload, "url_signer", _signer())
+
+    (payload,) = await load_tasks(db_session, Task.task_id == 1)
+    (video,) = payload["videos"]
+    assert video["video_url"].startswith(URL + "?X-Amz-Algorithm=AWS4-HMAC-SHA256")
@@ -0,0 +1,66 @@
+from sqlalchemy import select
+
+from app.models import Language, Lesson, Module, Progress, Task, User
+from app.services import content_cache
+from app.services.warmup import prewarm_pool
+from main import app
+
+
+async def _seed_catalog(db):
+    admin = (await db.execute(select(User).where(User.is_admin))).scalar_one()
+    alice = (await db.execute(select(User).where(User.username == "alice"))).scalar_one()
+    db.add(Language(id=1, code="asl", name="ASL"))
+    db.add_all([
+        Module(module_id=1, title="Basics", created_by=admin.user_id, version=1, language_id=1),
+        Module(
+            module_id=2, title="Next", created_by=admin.user_id, version=1,
+            language_id=1, prerequisite_mod=1,
+        ),
+        Lesson(lesson_id=1, title="Hello", module_id=1, version=1),
+        Lesson(lesson_id=2, title="Bye", module_id=1, version=1),
+        Lesson(lesson_id=3, title="Numbers", module_id=2, version=1),
+        Task(task_id=1, task_type="t", content={}, correct_answer={}, lesson_id=1, version=1, points=5),
+        Task(task_id=2, task_type="t", content={}, correct_answer={}, lesson_id=1, version=1, points=7),
+        Progress(user_id=alice.user_id, lesson_id=1, is_completed=True, score=9),
+    ])
+    await db.commit()
+
+
+async def test_modules_are_built_from_the_cached_catalog(client, db_session):
+    await content_cache.invalidate()
+    await _seed_catalog(db_session)
+    await client.post("/auth/login", json={"email": "alice@example.com", "password": "secret123"})
+
+    r = await client.get("/users/modules", params={"language_id": 1})
+    assert r.status_code == 200
+    basics, nxt = r.json()
+    assert basics["lessons"] == [
+        {"id": 1, "title": "Hello", "status": "completed", "earned_points": 9, "total_points": 12},
+        {"id": 2, "title": "Bye", "status": "in-progress", "earned_points": None, "total_points": 0},
+    ]
+    assert basics["status"] == "in-progress" and basics["lessons_completed"] == 1
+    assert nxt["status"] == "locked"
+
+    hits = content_cache.cache.hits
+    await client.get("/users/modules", params={"language_id": 1})
+    assert content_cache.cache.hits == hits + 1
+    await content_cache.invalidate()
+
+
+async def test_prime_and_prewarm(async_engine, db_session):
+    await content_cache.invalidate()
+    await _seed_catalog(db_session)
+    # languages, plus catalog, dictionary and its snapshot for the one language
+    assert await content_cache.prime(db_session) == 4
+    assert await prewarm_pool(async_engine, 3) >= 1
+    await content_cache.invalidate()
+
+
+async def test_readiness_waits_for_warm_up(client):
+    state = app.state
+    assert (await client.get("/health/ready")).status_code == 503
+    state.ready = True
+    try:
+        assert (await client.get("/health/ready")).json() == {"status": "ready"}
+    finally:
+        state.ready = False
@@ -1,20 +1,48 @@
-import boto3
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
 
-load_dotenv()
+from app.utils.env import load_env
+
+load_env()
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_BUCKET_NAME = os.getenv("AWS_BUCKET_NAME")
 AWS_REGION = os.getenv("AWS_REGION")
+# A local S3 stand-in (MinIO, moto server) instead of AWS, e.g. http://localhost:9000
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+# Connections the client keeps open; also the size of the storage thread pool.
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))
+S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", 5))
+S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", 30))
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", 5))
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """
+    The shared S3 client, built on first use: importing boto3 and building
+    the client is the most expensive step of importing the app. Clients are
+    thread-safe, so every storage thread uses this one and its pool.
+    """
+    if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_BUCKET_NAME, AWS_REGION]):
+        raise RuntimeError("Missing AWS configuration in environment variables.")
 
-if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_BUCKET_NAME, AWS_REGION]):
-    raise RuntimeError("Missing AWS configuration in environment variables.")
+    import boto3
+    from botocore.config import Config
 
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
-)
+    return boto3.client(
+        "s3",
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION,
+        endpoint_url=S3_ENDPOINT_URL,
+        config=Config(
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            connect_timeout=S3_CONNECT_TIMEOUT,
+            read_timeout=S3_READ_TIMEOUT,
+            retries={"mode": "standard", "max_attempts": S3_MAX_ATTEMPTS},
+            # presigned URLs default to SigV2, which newer regions reject
+            signature_version="s3v4",
+        ),
+    )
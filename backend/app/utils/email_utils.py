@@ -1,19 +1,12 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-import os
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# Email configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME", "SignLearn"),
-    USE_CREDENTIALS=True,
-)
+from app.services.mailer import enqueue_email
 
 
-async def send_verification_email(email: str, token: str) -> bool:
+def queue_verification_email(db: AsyncSession, email: str, token: str) -> None:
+    """
+    Queue the change-of-email verification message; it is sent after db commits.
+    """
     verification_url = f"https://signlearn.onrender.com/verify-email?token={token}"
     html_content = f"""
     <html>
@@ -25,13 +18,4 @@ async def send_verification_email(email: str, token: str) -> bool:
     </body>
     </html>
     """
-    message = MessageSchema(
-        subject="Email Verification",
-        recipients=[email],
-        body=html_content,
-        subtype="html",
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
-    return True
+    enqueue_email(db, email, "Email Verification", html_content)
@@ -0,0 +1,294 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from email_validator import EmailNotValidError, validate_email as check_syntax
+
+logger = logging.getLogger(__name__)
+
+DISPOSABLE_DOMAINS_FILE = Path(__file__).parent / "data" / "disposable_domains.txt"
+
+MX_CACHE_TTL = int(os.getenv("EMAIL_MX_CACHE_TTL", 6 * 60 * 60))
+MX_NEGATIVE_TTL = int(os.getenv("EMAIL_MX_NEGATIVE_TTL", 10 * 60))
+MX_CACHE_SIZE = int(os.getenv("EMAIL_MX_CACHE_SIZE", 4096))
+DNS_TIMEOUT = float(os.getenv("EMAIL_DNS_TIMEOUT", 2.0))
+
+# Providers whose addresses we accept without paying for an SMTP probe.
+# They are also the targets for typo suggestions.
+POPULAR_PROVIDERS = (
+    "gmail.com",
+    "googlemail.com",
+    "yahoo.com",
+    "hotmail.com",
+    "outlook.com",
+    "live.com",
+    "msn.com",
+    "icloud.com",
+    "me.com",
+    "aol.com",
+    "proton.me",
+    "protonmail.com",
+    "gmx.com",
+    "gmx.de",
+    "mail.com",
+    "yandex.com",
+    "zoho.com",
+)
+# Real providers within typo distance of a popular one: accepted as they
+# are and never "corrected".
+KNOWN_PROVIDERS = frozenset(
+    POPULAR_PROVIDERS
+    + (
+        "ymail.com",
+        "rocketmail.com",
+        "gmx.net",
+        "gmx.at",
+        "gmx.ch",
+        "gmx.us",
+        "live.ca",
+        "live.co.uk",
+        "live.de",
+        "live.fr",
+        "hotmail.co.uk",
+        "hotmail.de",
+        "hotmail.fr",
+        "outlook.de",
+        "msn.cn",
+        "mac.com",
+        "me.de",
+        "email.com",
+        "mail.ru",
+        "yahoo.de",
+        "yahoo.fr",
+        "yahoo.co.uk",
+        "web.de",
+        "aim.com",
+        "pm.me",
+        "yandex.ru",
+        "zoho.eu",
+    )
+)
+MAX_TYPO_DISTANCE = 2
+
+VALID = "valid"
+INVALID = "invalid"
+UNKNOWN = "unknown"
+
+_disposable_domains: frozenset[str] | None = None
+
+
+def load_disposable_domains(path: Path = DISPOSABLE_DOMAINS_FILE) -> frozenset[str]:
+    domains = set()
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip().lower()
+            if line and not line.startswith("#"):
+                domains.add(line)
+    return frozenset(domains)
+
+
+def _disposable() -> frozenset[str]:
+    global _disposable_domains
+    if _disposable_domains is None:
+        _disposable_domains = load_disposable_domains()
+    return _disposable_domains
+
+
+def is_disposable(domain: str) -> bool:
+    """
+    True if the domain or any parent domain is on the bundled disposable list.
+    """
+    domains = _disposable()
+    labels = domain.lower().split(".")
+    return any(".".join(labels[i:]) in domains for i in range(len(labels) - 1))
+
+
+def edit_distance(a: str, b: str, limit: int = MAX_TYPO_DISTANCE) -> int:
+    """
+    Damerau-Levenshtein (optimal string alignment) distance.
+    Stops early and returns limit + 1 once the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (
+                prev2 is not None
+                and i > 1
+                and j > 1
+                and ca == b[j - 2]
+                and a[i - 2] == cb
+            ):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def suggest_domain(domain: str) -> str | None:
+    """
+    Return the closest popular provider if the domain looks like a typo of
+    it. Only a hint for the UI: known providers are never suggested away.
+    """
+    domain = domain.lower()
+    if domain in KNOWN_PROVIDERS:
+        return None
+    best, best_distance = None, MAX_TYPO_DISTANCE + 1
+    for candidate in POPULAR_PROVIDERS:
+        distance = edit_distance(domain, candidate)
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+    return best
+
+
+class MXCache:
+    """
+    Bounded LRU of domain -> (has_mail_host, expires_at).
+    Negative answers are kept for a shorter time than positive ones.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = MX_CACHE_SIZE,
+        ttl: int = MX_CACHE_TTL,
+        negative_ttl: int = MX_NEGATIVE_TTL,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+
+    def get(self, domain: str) -> bool | None:
+        item = self._entries.get(domain)
+        if item is None:
+            return None
+        value, expires = item
+        if time.monotonic() > expires:
+            del self._entries[domain]
+            return None
+        self._entries.move_to_end(domain)
+        return value
+
+    def set(self, domain: str, value: bool) -> None:
+        ttl = self.ttl if value else self.negative_ttl
+        self._entries[domain] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+mx_cache = MXCache()
+
+
+async def _lookup_mail_host(domain: str) -> bool | None:
+    """
+    True if the domain accepts mail (MX, or an implicit MX via A/AAAA),
+    False if it definitely does not, None if DNS could not tell us.
+    """
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = DNS_TIMEOUT
+    try:
+        answer = await resolver.resolve(domain, "MX")
+        # RFC 7505 null MX: "0 ." means the domain accepts no mail.
+        return any(str(r.exchange) not in ("", ".") for r in answer)
+    except dns.resolver.NXDOMAIN:
+        return False
+    except dns.resolver.NoAnswer:
+        pass
+    except (dns.exception.Timeout, dns.resolver.NoNameservers):
+        return None
+    except dns.exception.DNSException as e:
+        logger.warning("[validate-email] MX lookup failed for %s: %s", domain, e)
+        return None
+
+    for rdtype in ("A", "AAAA"):
+        try:
+            await resolver.resolve(domain, rdtype)
+            return True
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            continue
+        except dns.exception.DNSException:
+            return None
+    return False
+
+
+async def has_mail_host(domain: str) -> bool | None:
+    domain = domain.lower()
+    cached = mx_cache.get(domain)
+    if cached is not None:
+        return cached
+    result = await _lookup_mail_host(domain)
+    if result is not None:
+        mx_cache.set(domain, result)
+    return result
+
+
+async def classify_locally(email: str) -> dict:
+    """
+    Offline validation tier for /auth/validate-email.
+
+    Returns a dict with "status" set to VALID, INVALID or UNKNOWN plus the
+    response fields for the UI. INVALID is only for bad syntax, disposable
+    domains and domains without a mail host; a likely typo comes back
+    VALID with "did_you_mean". Only UNKNOWN results need the external
+    validator.
+    """
+    try:
+        parsed = check_syntax(email, check_deliverability=False)
+    except EmailNotValidError:
+        return {
+            "status": INVALID,
+            "format_valid": False,
+            "reason": "Invalid email address.",
+        }
+
+    local_part, domain = parsed.local_part, parsed.ascii_domain.lower()
+
+    if is_disposable(domain):
+        return {
+            "status": INVALID,
+            "format_valid": True,
+            "disposable": True,
+            "reason": "Disposable email addresses are not allowed.",
+        }
+
+    if domain in KNOWN_PROVIDERS:
+        return {"status": VALID, "format_valid": True}
+
+    # a likely typo is a hint, not a rejection: close names are often real
+    hint = {}
+    suggestion = suggest_domain(domain)
+    if suggestion:
+        did_you_mean = f"{local_part}@{suggestion}"
+        hint = {"did_you_mean": did_you_mean, "reason": f"Did you mean {did_you_mean}?"}
+
+    mail_host = await has_mail_host(domain)
+    if mail_host is False:
+        return {
+            "status": INVALID,
+            "format_valid": True,
+            "mx_found": False,
+            "reason": "This email domain cannot receive mail.",
+            **({"did_you_mean": hint["did_you_mean"]} if hint else {}),
+        }
+
+    if hint:
+        return {"status": VALID, "format_valid": True, "mx_found": mail_host, **hint}
+    return {"status": UNKNOWN, "format_valid": True, "mx_found": mail_host}
@@ -0,0 +1,42 @@
+import logging
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+REQUIRED_ENV_VARS = [
+    "MAIL_USERNAME",
+    "MAIL_PASSWORD",
+    "MAIL_FROM",
+    "MAIL_PORT",
+    "MAIL_SERVER",
+    "SECRET_KEY",
+    "GOOGLE_CLIENT_ID",
+    "GOOGLE_CLIENT_SECRET",
+    "GOOGLE_REDIRECT_URI",
+    "FRONTEND_URL",
+]
+
+
+@lru_cache(maxsize=1)
+def load_env() -> None:
+    """
+    Read .env once per process. On Render the variables are injected
+    directly and there is no file to read.
+    """
+    if os.getenv("RENDER") is None:
+        load_dotenv()
+
+
+@lru_cache(maxsize=1)
+def validate_env_variables() -> None:
+    """Fail fast at startup (not import) when critical settings are missing."""
+    load_env()
+    missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
+    if missing_vars:
+        logging.error(
+            f"Missing required environment variables: {', '.join(missing_vars)}"
+        )
+        raise RuntimeError(
+            "Critical environment variables are missing. Check your .env file."
+        )
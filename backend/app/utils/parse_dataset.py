@@ -1,22 +1,17 @@
 import os
 import json
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from app.database import async_session as SessionLocal
 from app.models.video_reference import VideoReference
 
-from dotenv import load_dotenv
+from app.utils.env import load_env
 
-load_dotenv()
+load_env()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 AWS_BUCKET_NAME = os.getenv("AWS_BUCKET_NAME")
 AWS_REGION = os.getenv("AWS_REGION")
 
 S3_BUCKET_URL = f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/videos/"
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-
 
 async def parse_and_populate_reference(file_path: str):
     """
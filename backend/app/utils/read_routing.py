@@ -0,0 +1,92 @@
+import os
+import time
+
+from starlette.requests import HTTPConnection
+
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+PIN_COOKIE_NAME = "sl_rw"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# POST only to carry a body; they write nothing, so they don't pin.
+READ_ONLY_PATHS = frozenset({"/auth/check-email", "/auth/validate-email"})
+
+
+class ReadRouter:
+    """
+    Chooses primary or replica sessions for read-only routes.
+
+    A client that made a successful write in the last READ_YOUR_WRITES_SECONDS
+    carries a pin cookie (set by ReadYourWritesMiddleware) and keeps reading
+    from the primary until the replica has had time to catch up.
+    """
+
+    def __init__(self, primary_factory, replica_factory):
+        self.primary_factory = primary_factory
+        self.replica_factory = replica_factory
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    @property
+    def has_replica(self) -> bool:
+        return self.replica_factory is not self.primary_factory
+
+    def session_factory(self, request: HTTPConnection):
+        if self.has_replica and not is_pinned_to_primary(request):
+            self.replica_reads += 1
+            return self.replica_factory
+        self.primary_reads += 1
+        return self.primary_factory
+
+
+def is_pinned_to_primary(request: HTTPConnection) -> bool:
+    value = request.cookies.get(PIN_COOKIE_NAME)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pins a client to the primary for READ_YOUR_WRITES_SECONDS after any
+    successful POST/PUT/PATCH/DELETE outside `read_only_paths` by setting
+    a short-lived cookie. A cookie works across worker processes without
+    shared state; it has the auth cookies' attributes, Partitioned
+    included, so browsers blocking third-party cookies still keep it.
+    """
+
+    def __init__(
+        self,
+        app,
+        pin_seconds: int = READ_YOUR_WRITES_SECONDS,
+        read_only_paths=READ_ONLY_PATHS,
+    ):
+        self.app = app
+        self.pin_seconds = pin_seconds
+        self.read_only_paths = read_only_paths
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or self.pin_seconds <= 0
+            or scope["path"].rstrip("/") in self.read_only_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + self.pin_seconds
+                cookie = (
+                    f"{PIN_COOKIE_NAME}={until}; Path=/; Secure; HttpOnly; "
+                    f"SameSite=None; Partitioned; Max-Age={self.pin_seconds}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
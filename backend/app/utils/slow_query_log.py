@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.sql_instrumentation import normalize_statement
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))
+# Fraction of slow SELECTs that get an EXPLAIN (ANALYZE, BUFFERS) on Postgres.
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", 0.1))
+# A fingerprint is written in full once per window; repeats are only counted.
+SLOW_QUERY_DEDUPE_SECONDS = float(os.getenv("SLOW_QUERY_DEDUPE_SECONDS", 300))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
+# Bound values include tokens, password hashes and emails, so only their
+# types and lengths are logged unless this is turned on (e.g. locally).
+SLOW_QUERY_LOG_PARAMS = os.getenv("SLOW_QUERY_LOG_PARAMS", "false").lower() == "true"
+
+MAX_PARAMS_CHARS = 500
+MAX_TRACKED_FINGERPRINTS = 1000
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode()).hexdigest()[:16]
+
+
+# Anything that writes or locks when run: DML (also inside a WITH), SELECT
+# INTO, row locks (FOR UPDATE / NO KEY UPDATE / SHARE / KEY SHARE) and
+# advisory locks.
+_WRITES_OR_LOCKS = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|INTO|SHARE|PG_(TRY_)?ADVISORY_\w*|NEXTVAL|SETVAL)\b"
+)
+
+
+def _is_explainable(statement: str) -> bool:
+    # EXPLAIN ANALYZE executes the statement, so never replay writes or locks,
+    # even though the replay is rolled back.
+    head = statement.lstrip().upper()
+    return head.startswith(("SELECT", "WITH")) and _WRITES_OR_LOCKS.search(head) is None
+
+
+def _redact(value) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bytes, bytearray)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def redact_parameters(parameters):
+    """Bound parameters with each value replaced by its type (and length)."""
+    if isinstance(parameters, dict):
+        return {key: _redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return type(parameters)(
+            redact_parameters(p) if isinstance(p, (dict, list, tuple)) else _redact(p)
+            for p in parameters
+        )
+    return _redact(parameters)
+
+
+class SlowQueryLog:
+    """
+    Writes statements slower than threshold_ms, with the types of their
+    bound parameters (the values with log_params), as JSON lines to a
+    rotating file. Each fingerprint (statement shape) is
+    written in full once per dedupe window; later hits in the window are
+    counted and reported when the window closes. On Postgres a sample of
+    slow SELECTs is replayed with EXPLAIN (ANALYZE, BUFFERS) on a separate
+    connection, so a failing EXPLAIN never touches the caller's transaction.
+    """
+
+    def __init__(
+        self,
+        path: str = SLOW_QUERY_LOG_PATH,
+        threshold_ms: float = SLOW_QUERY_MS,
+        explain_sample: float = SLOW_QUERY_EXPLAIN_SAMPLE,
+        dedupe_seconds: float = SLOW_QUERY_DEDUPE_SECONDS,
+        max_bytes: int = SLOW_QUERY_LOG_MAX_BYTES,
+        backups: int = SLOW_QUERY_LOG_BACKUPS,
+        log_params: bool = SLOW_QUERY_LOG_PARAMS,
+    ):
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.explain_sample = explain_sample
+        self.dedupe_seconds = dedupe_seconds
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.log_params = log_params
+        # fingerprint -> [window_start, suppressed, max_seconds]
+        self.seen: OrderedDict[str, list] = OrderedDict()
+        self._handler: RotatingFileHandler | None = None
+        self._explains: set[asyncio.Task] = set()
+
+    def _write(self, entry: dict) -> None:
+        if self._handler is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._handler = RotatingFileHandler(
+                self.path, maxBytes=self.max_bytes, backupCount=self.backups
+            )
+        entry = {"ts": datetime.now(timezone.utc).isoformat(), **entry}
+        record = logging.makeLogRecord({"msg": json.dumps(entry, default=str)})
+        self._handler.emit(record)
+
+    def record(self, engine: AsyncEngine | None, statement, parameters, elapsed) -> None:
+        key = fingerprint(statement)
+        now = time.monotonic()
+        seen = self.seen.get(key)
+        if seen is not None and now - seen[0] < self.dedupe_seconds:
+            seen[1] += 1
+            seen[2] = max(seen[2], elapsed)
+            return
+
+        if seen is not None and seen[1]:
+            self._write({
+                "event": "repeated",
+                "fingerprint": key,
+                "occurrences": seen[1],
+                "max_ms": round(seen[2] * 1000, 2),
+            })
+        self.seen[key] = [now, 0, elapsed]
+        self.seen.move_to_end(key)
+        while len(self.seen) > MAX_TRACKED_FINGERPRINTS:
+            self.seen.popitem(last=False)
+
+        self._write({
+            "event": "slow_query",
+            "fingerprint": key,
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "params": repr(
+                parameters if self.log_params else redact_parameters(parameters)
+            )[:MAX_PARAMS_CHARS],
+        })
+        logger.warning(
+            "Slow query %s took %.0f ms: %s",
+            key,
+            elapsed * 1000,
+            normalize_statement(statement)[:200],
+        )
+
+        if (
+            engine is not None
+            and engine.dialect.name == "postgresql"
+            and _is_explainable(statement)
+            and random.random() < self.explain_sample
+        ):
+            task = asyncio.get_running_loop().create_task(
+                self.explain(engine, key, statement, parameters)
+            )
+            self._explains.add(task)
+            task.add_done_callback(self._explains.discard)
+
+    async def explain(self, engine: AsyncEngine, key, statement, parameters) -> None:
+        try:
+            async with engine.connect() as conn:
+                conn.sync_connection.info["slow_query_skip"] = True
+                try:
+                    result = await conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                    )
+                    plan = "\n".join(row[0] for row in result)
+                finally:
+                    conn.sync_connection.info.pop("slow_query_skip", None)
+                    await conn.rollback()
+        except Exception as e:
+            logger.info("EXPLAIN for slow query %s failed: %s", key, e)
+            return
+        self._write({"event": "explain", "fingerprint": key, "plan": plan})
+
+    def install(self, engine: AsyncEngine) -> None:
+        target = engine.sync_engine
+        if event.contains(target, "before_cursor_execute", _before_cursor_execute):
+            return
+
+        def after(conn, cursor, statement, parameters, context, executemany):
+            start = getattr(context, "_slow_query_start", None)
+            if start is None or conn.info.get("slow_query_skip"):
+                return
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self.record(engine, statement, parameters, elapsed)
+
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", after)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_start = time.perf_counter()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install_slow_query_log(*engines: AsyncEngine) -> None:
+    """
+    Hook the slow-query log into the given engines. Works at cursor level,
+    so ORM queries and raw text() SQL are covered alike.
+    """
+    if slow_query_log.threshold <= 0:
+        return
+    for engine in dict.fromkeys(engines):
+        slow_query_log.install(engine)
@@ -0,0 +1,178 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 10))
+
+_current_stats: ContextVar["RequestSQLStats | None"] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce a statement to its shape: literals and bind markers become '?',
+    IN lists collapse to '(?)' and whitespace is squashed.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestSQLStats:
+    __slots__ = ("count", "total_time", "slowest_time", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        self.shapes[normalize_statement(statement)] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+    def log_fields(self) -> dict:
+        return {
+            "db_queries": self.count,
+            "db_time_ms": round(self.total_time * 1000, 2),
+            "db_slowest_ms": round(self.slowest_time * 1000, 2),
+            "db_distinct_statements": len(self.shapes),
+        }
+
+
+def current_stats() -> RequestSQLStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("sql_stats_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("sql_stats_start")
+    if not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def _handle_error(context):
+    # after_cursor_execute does not fire for a failed statement; take its
+    # start off the pooled connection so later timings stay paired
+    stats = _current_stats.get()
+    if stats is None or context.connection is None:
+        return
+    starts = context.connection.info.get("sql_stats_start")
+    if not starts:
+        return
+    stats.record(context.statement or "", time.perf_counter() - starts.pop())
+
+
+_installed = False
+
+
+def install_sql_instrumentation() -> None:
+    """
+    Listen on every Engine; statements outside a request cost one ContextVar lookup.
+    """
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
+
+
+class SQLStatsMiddleware:
+    """
+    Collects per-request statement count, DB time, slowest statement and
+    repeated statement shapes. Logs them as structured fields, warns about
+    likely N+1 patterns and, when expose_headers is on (debug), returns them
+    as X-DB-* response headers.
+    """
+
+    def __init__(
+        self,
+        app,
+        expose_headers: bool = False,
+        threshold: int = N_PLUS_ONE_THRESHOLD,
+    ):
+        self.app = app
+        self.expose_headers = expose_headers
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.total_time * 1000:.2f}".encode()),
+                    (b"x-db-slowest-ms", f"{stats.slowest_time * 1000:.2f}".encode()),
+                ]
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: RequestSQLStats) -> None:
+        if not stats.count:
+            return
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        fields = {"method": scope["method"], "path": path, **stats.log_fields()}
+        if stats.slowest_statement:
+            fields["db_slowest_statement"] = normalize_statement(
+                stats.slowest_statement
+            )[:300]
+        logger.info("sql stats %s %s", scope["method"], path, extra=fields)
+
+        for shape, n in stats.repeated(self.threshold):
+            logger.warning(
+                "Possible N+1 in %s %s: statement ran %s times: %s",
+                scope["method"],
+                path,
+                n,
+                shape[:300],
+                extra={**fields, "repeated_statement": shape, "repeat_count": n},
+            )
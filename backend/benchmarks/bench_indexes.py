@@ -0,0 +1,288 @@
+"""
+Before/after benchmark for the hot-path indexes (migration e7c3b81f4a90).
+
+Seeds a synthetic dataset, then runs the queries the routers issue with the
+indexes dropped and again with them created, printing the plan and the
+median time of each.
+
+    python -m benchmarks.bench_indexes                    # temporary SQLite file
+    python -m benchmarks.bench_indexes --url postgresql+asyncpg://.../bench_db
+
+Use a throwaway database: all tables are dropped and recreated.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp_db = os.path.join(tempfile.gettempdir(), "sl_bench_indexes.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp_db}")
+
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.database import Base  # noqa: E402
+
+INDEX_NAMES = {
+    "ix_lesson_module_id",
+    "ix_task_lesson_id",
+    "ix_module_language_id_module_id",
+    "ix_module_created_by",
+    "ix_progress_user_id_is_completed",
+    "ix_user_activity_log_user_id_timestamp",
+    "ix_user_achievement_user_id",
+    "ix_dictionary_usage_user_id_accessed_at",
+    "ix_task_video_video_id",
+}
+
+# (label, statement, params) mirroring what the routers run
+QUERIES = [
+    (
+        "lessons of a module",
+        "SELECT * FROM lesson WHERE module_id = :module_id",
+        {"module_id": 17},
+    ),
+    (
+        "points of a lesson",
+        "SELECT COALESCE(SUM(points), 0) FROM task WHERE lesson_id = :lesson_id",
+        {"lesson_id": 321},
+    ),
+    (
+        "modules of a language",
+        "SELECT * FROM module WHERE language_id = :language_id ORDER BY module_id",
+        {"language_id": 2},
+    ),
+    (
+        "modules created by admin",
+        "SELECT * FROM module WHERE created_by = :user_id",
+        {"user_id": 1},
+    ),
+    (
+        "lessons completed",
+        """SELECT COUNT(*) FROM lesson WHERE EXISTS (
+               SELECT 1 FROM progress WHERE progress.lesson_id = lesson.lesson_id
+               AND progress.user_id = :user_id AND progress.is_completed = TRUE)""",
+        {"user_id": 42},
+    ),
+    (
+        "time spent",
+        "SELECT SUM(duration) FROM user_activity_log WHERE user_id = :user_id",
+        {"user_id": 42},
+    ),
+    (
+        "recent activity",
+        """SELECT * FROM user_activity_log WHERE user_id = :user_id
+           ORDER BY timestamp DESC LIMIT 20""",
+        {"user_id": 42},
+    ),
+    (
+        "user achievements",
+        "SELECT * FROM user_achievement WHERE user_id = :user_id",
+        {"user_id": 42},
+    ),
+    (
+        "dictionary history",
+        """SELECT * FROM dictionary_usage WHERE user_id = :user_id
+           ORDER BY accessed_at DESC LIMIT 20""",
+        {"user_id": 42},
+    ),
+    (
+        "tasks using a video",
+        "SELECT task_id FROM task_video WHERE video_id = :video_id",
+        {"video_id": "v00123"},
+    ),
+]
+
+
+def _chunks(rows, size=5000):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+async def seed(conn, scale: int) -> None:
+    rnd = random.Random(1234)
+    t = Base.metadata.tables
+    now = datetime(2026, 1, 1)
+    users, modules, lessons = 200 * scale, 60, 600
+    tasks, videos = 6000 * scale, 2000
+
+    data = {
+        "languages": [{"id": i, "code": f"l{i}", "name": f"Lang {i}"} for i in (1, 2, 3)],
+        "user": [
+            {
+                "user_id": i,
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password": "x",
+                "is_admin": i <= 3,
+                "points": rnd.randint(0, 5000),
+            }
+            for i in range(1, users + 1)
+        ],
+        "module": [
+            {
+                "module_id": i,
+                "title": f"Module {i}",
+                "created_by": rnd.randint(1, 3),
+                "version": 1,
+                "language_id": rnd.randint(1, 3),
+            }
+            for i in range(1, modules + 1)
+        ],
+        "lesson": [
+            {
+                "lesson_id": i,
+                "title": f"Lesson {i}",
+                "module_id": rnd.randint(1, modules),
+                "version": 1,
+            }
+            for i in range(1, lessons + 1)
+        ],
+        "task": [
+            {
+                "task_id": i,
+                "task_type": "match",
+                "content": {},
+                "correct_answer": {},
+                "lesson_id": rnd.randint(1, lessons),
+                "version": 1,
+                "points": rnd.randint(1, 20),
+            }
+            for i in range(1, tasks + 1)
+        ],
+        "video_reference": [
+            {
+                "video_id": f"v{i:05d}",
+                "gloss": f"gloss{i}",
+                "video_url": f"https://example.com/v{i:05d}.mp4",
+                "language_id": rnd.randint(1, 3),
+            }
+            for i in range(videos)
+        ],
+        "task_video": [
+            {"task_id": i, "video_id": f"v{rnd.randrange(videos):05d}"}
+            for i in range(1, tasks + 1)
+        ],
+        "progress": [
+            {
+                "user_id": u,
+                "lesson_id": lesson_id,
+                "is_completed": rnd.random() < 0.7,
+                "score": rnd.randint(0, 100),
+            }
+            for u in range(1, users + 1)
+            for lesson_id in rnd.sample(range(1, lessons + 1), 40)
+        ],
+        "user_activity_log": [
+            {
+                "action": "lesson",
+                "timestamp": now - timedelta(minutes=rnd.randint(0, 500000)),
+                "user_id": rnd.randint(1, users),
+                "duration": rnd.randint(10, 900),
+            }
+            for _ in range(100 * users)
+        ],
+        "achievement": [{"achievement_id": i, "name": f"A{i}"} for i in range(1, 31)],
+        "user_achievement": [
+            {
+                "user_id": rnd.randint(1, users),
+                "achievement_id": rnd.randint(1, 30),
+                "awarded_at": now,
+            }
+            for _ in range(10 * users)
+        ],
+        "dictionary_category": [{"category_id": 1, "name": "General"}],
+        "dictionary": [
+            {"sign_id": i, "word": f"word{i}", "video_file": f"{i}.mp4", "category_id": 1}
+            for i in range(1, 5001)
+        ],
+        "dictionary_usage": [
+            {
+                "accessed_at": now - timedelta(minutes=rnd.randint(0, 500000)),
+                "user_id": rnd.randint(1, users),
+                "sign_id": rnd.randint(1, 5000),
+            }
+            for _ in range(50 * users)
+        ],
+    }
+    for table_name, rows in data.items():
+        for chunk in _chunks(rows):
+            await conn.execute(insert(t[table_name]), chunk)
+
+
+def _indexes():
+    return [
+        index
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+        if index.name in INDEX_NAMES
+    ]
+
+
+async def explain(conn, statement: str, params: dict) -> str:
+    if conn.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    result = await conn.execute(text(prefix + statement), params)
+    return "\n".join("    " + " ".join(str(c) for c in row) for row in result)
+
+
+async def measure(conn, repeat: int) -> dict:
+    results = {}
+    for label, statement, params in QUERIES:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await conn.execute(text(statement), params)
+            timings.append(time.perf_counter() - start)
+        results[label] = (statistics.median(timings), await explain(conn, statement, params))
+    return results
+
+
+async def main(url: str, scale: int, repeat: int) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        print(f"Seeding ({engine.dialect.name}, scale={scale}) ...")
+        await seed(conn, scale)
+
+    async with engine.begin() as conn:
+        for index in _indexes():
+            await conn.run_sync(index.drop)
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("ANALYZE"))
+    async with engine.connect() as conn:
+        before = await measure(conn, repeat)
+
+    async with engine.begin() as conn:
+        for index in _indexes():
+            await conn.run_sync(index.create)
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("ANALYZE"))
+    async with engine.connect() as conn:
+        after = await measure(conn, repeat)
+    await engine.dispose()
+
+    print(f"\n{'query':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for label, *_ in QUERIES:
+        b, a = before[label][0] * 1000, after[label][0] * 1000
+        print(f"{label:<28}{b:>12.3f}{a:>12.3f}{b / a if a else 0:>9.1f}x")
+    for label, *_ in QUERIES:
+        print(f"\n== {label}\n  before:\n{before[label][1]}\n  after:\n{after[label][1]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=os.environ["DATABASE_URL"])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.scale, args.repeat))
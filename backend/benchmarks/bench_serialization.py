@@ -0,0 +1,110 @@
+"""
+Response rendering cost for a 5k-item /dictionary/ payload.
+
+    python -m benchmarks.bench_serialization [--items 5000] [--repeat 50]
+
+Compares, end to end through a FastAPI app:
+  - the old path: untyped list[dict] response model, stdlib json;
+  - a typed DictionaryItem model validated by FastAPI, rendered by orjson;
+  - the route's own ORJSONResponse, which FastAPI passes through untouched
+    (what /dictionary/ does for its already-shaped cached payload);
+and the final encoding step alone.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import orjson
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.schemas.dictionary import DictionaryItem
+
+
+def payload(items: int) -> list[dict]:
+    return [
+        {
+            "gloss": f"gloss-{i:05d}",
+            "video_url": f"https://asl-video-dataset.s3.eu-central-1.amazonaws.com/videos/{i:05d}.mp4",
+        }
+        for i in range(items)
+    ]
+
+
+def build_app(items: list[dict], variant: str) -> FastAPI:
+    if variant == "old":
+        app = FastAPI(default_response_class=JSONResponse)
+
+        @app.get("/dictionary/", response_model=list[dict])
+        async def dictionary():
+            return items
+
+    elif variant == "typed":
+        app = FastAPI(default_response_class=ORJSONResponse)
+
+        @app.get("/dictionary/", response_model=list[DictionaryItem])
+        async def dictionary():
+            return items
+
+    else:
+        app = FastAPI(default_response_class=ORJSONResponse)
+
+        @app.get("/dictionary/", response_model=list[DictionaryItem])
+        async def dictionary():
+            return ORJSONResponse(items)
+
+    return app
+
+
+async def time_requests(app: FastAPI, repeat: int) -> float:
+    timings = []
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/dictionary/")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            r = await client.get("/dictionary/")
+            timings.append(time.perf_counter() - start)
+            assert r.status_code == 200
+    return statistics.median(timings)
+
+
+def time_encoding(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+async def main(items: int, repeat: int) -> None:
+    data = payload(items)
+    old = await time_requests(build_app(data, "old"), repeat)
+    typed = await time_requests(build_app(data, "typed"), repeat)
+    direct = await time_requests(build_app(data, "direct"), repeat)
+
+    stdlib = time_encoding(
+        lambda: json.dumps(jsonable_encoder(data), separators=(",", ":")).encode(), repeat
+    )
+    fast = time_encoding(lambda: orjson.dumps(data), repeat)
+
+    print(f"{items} dictionary items, median of {repeat}")
+    print(f"  request  list[dict] + JSONResponse      {old * 1000:8.2f} ms")
+    print(f"  request  validated DictionaryItem        {typed * 1000:8.2f} ms  ({old / typed:.1f}x)")
+    print(f"  request  ORJSONResponse returned as is   {direct * 1000:8.2f} ms  ({old / direct:.1f}x)")
+    print(f"  encode   jsonable_encoder + json.dumps   {stdlib * 1000:8.2f} ms")
+    print(f"  encode   orjson.dumps                    {fast * 1000:8.2f} ms  ({stdlib / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.repeat))
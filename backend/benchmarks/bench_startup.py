@@ -0,0 +1,139 @@
+"""
+Cold-start budget: import time of app.main and time to first response.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --importtime-out importtime.txt --budget-import-ms 1500
+
+Import time is measured in a fresh interpreter with `python -X importtime`;
+the slowest modules (cumulative) are listed and the raw output can be saved
+to compare runs. Time to first response starts uvicorn and polls
+/health/ready, so it includes the lifespan warm-up. Exits non-zero when a
+budget is exceeded.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Enough configuration for the app to import and start on its own.
+DEFAULT_ENV = {
+    "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'sl_bench_startup.db')}",
+    "SECRET_KEY": "bench",
+    "MAIL_USERNAME": "bench@example.com",
+    "MAIL_PASSWORD": "bench",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_PORT": "587",
+    "MAIL_SERVER": "localhost",
+    "GOOGLE_CLIENT_ID": "bench",
+    "GOOGLE_CLIENT_SECRET": "bench",
+    "GOOGLE_REDIRECT_URI": "http://localhost/auth/google/callback",
+    "FRONTEND_URL": "http://localhost",
+    "OAUTH_METADATA_REFRESH": "false",
+    "EMAIL_OUTBOX_WORKER": "false",
+}
+
+
+def _env() -> dict:
+    env = {**DEFAULT_ENV, **os.environ}
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def measure_import(runs: int) -> tuple[float, str]:
+    """Best-of-N wall time for `import app.main`, plus one -X importtime trace."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import app.main"],
+            cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True,
+        )
+        best = min(best, time.perf_counter() - start)
+
+    trace = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True,
+    ).stderr
+    return best, trace
+
+
+def slowest_imports(trace: str, top: int) -> list[tuple[int, str]]:
+    rows = []
+    for line in trace.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_response(timeout: float) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.02)
+        raise TimeoutError(f"no ready response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--importtime-out", help="write the raw -X importtime trace here")
+    parser.add_argument("--budget-import-ms", type=float)
+    parser.add_argument("--budget-first-response-ms", type=float)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    import_s, trace = measure_import(args.runs)
+    if args.importtime_out:
+        with open(args.importtime_out, "w") as fh:
+            fh.write(trace)
+
+    print(f"import app.main (best of {args.runs}, incl. interpreter): {import_s * 1000:.0f} ms")
+    print("slowest imports (cumulative us):")
+    for cumulative, name in slowest_imports(trace, args.top):
+        print(f"  {cumulative:>9} {name}")
+
+    first_s = measure_first_response(args.timeout)
+    print(f"time to first ready response: {first_s * 1000:.0f} ms")
+
+    failed = False
+    if args.budget_import_ms and import_s * 1000 > args.budget_import_ms:
+        print(f"FAIL import budget {args.budget_import_ms:.0f} ms exceeded")
+        failed = True
+    if args.budget_first_response_ms and first_s * 1000 > args.budget_first_response_ms:
+        print(f"FAIL first response budget {args.budget_first_response_ms:.0f} ms exceeded")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
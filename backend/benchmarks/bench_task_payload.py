@@ -0,0 +1,130 @@
+"""
+Lesson task serialization: ORM + TaskResponse versus the column serializer.
+
+    python -m benchmarks.bench_task_payload [--tasks 50] [--videos 3] [--repeat 200]
+
+Seeds one lesson in an in-memory SQLite database, with each video carrying
+a bbox/fps style metadata blob, and times end to end through a FastAPI app:
+  - the old path: selectinload(Task.videos), validated by TaskResponse;
+  - load_tasks returned as an ORJSONResponse, with and without metadata.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.database import Base
+from app.models import Language, Lesson, Module, Task, TaskVideo, User
+from app.models.video_reference import VideoReference
+from app.schemas.task import TaskResponse
+from app.services.task_payload import load_tasks
+
+
+async def seed(session_factory, tasks: int, videos: int) -> None:
+    async with session_factory() as db:
+        db.add(User(user_id=1, username="bench", email="bench@example.com", password="x"))
+        db.add(Language(id=1, code="asl", name="ASL"))
+        db.add(Module(module_id=1, title="m", created_by=1, version=1, language_id=1))
+        db.add(Lesson(lesson_id=1, title="l", module_id=1, version=1))
+        db.add_all(
+            VideoReference(
+                video_id=f"v{i}", gloss=f"gloss {i}", signer_id=i % 9, language_id=1,
+                video_url=f"https://asl-video-dataset.s3.eu-central-1.amazonaws.com/videos/v{i}.mp4",
+                video_metadata={"fps": 25, "bbox": [12, 40, 310, 255], "frame_start": 1, "frame_end": 90},
+            )
+            for i in range(tasks * videos)
+        )
+        db.add_all(
+            Task(
+                task_id=t, task_type="multiple_choice", lesson_id=1, version=1, points=5,
+                content={"question": f"Which sign is {t}?", "options": [f"v{t * videos + k}" for k in range(videos)]},
+                correct_answer={"answer": f"v{t * videos}"},
+            )
+            for t in range(tasks)
+        )
+        await db.flush()
+        db.add_all(
+            TaskVideo(task_id=t, video_id=f"v{t * videos + k}")
+            for t in range(tasks) for k in range(videos)
+        )
+        await db.commit()
+
+
+def build_app(session_factory, variant: str) -> FastAPI:
+    async def get_db():
+        async with session_factory() as db:
+            yield db
+
+    if variant == "old":
+        app = FastAPI(default_response_class=JSONResponse)
+
+        @app.get("/tasks", response_model=List[TaskResponse])
+        async def tasks(db: AsyncSession = Depends(get_db)):
+            result = await db.execute(
+                select(Task).options(selectinload(Task.videos)).where(Task.lesson_id == 1)
+            )
+            return result.scalars().all()
+
+    else:
+        app = FastAPI(default_response_class=ORJSONResponse)
+        include_metadata = variant == "metadata"
+
+        @app.get("/tasks", response_model=List[TaskResponse])
+        async def tasks(db: AsyncSession = Depends(get_db)):
+            return ORJSONResponse(
+                await load_tasks(db, Task.lesson_id == 1, include_metadata=include_metadata)
+            )
+
+    return app
+
+
+async def time_requests(app: FastAPI, repeat: int) -> tuple[float, int]:
+    timings = []
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/tasks")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            r = await client.get("/tasks")
+            timings.append(time.perf_counter() - start)
+            assert r.status_code == 200
+    return statistics.median(timings), len(r.content)
+
+
+async def main(tasks: int, videos: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await seed(session_factory, tasks, videos)
+
+    old, old_size = await time_requests(build_app(session_factory, "old"), repeat)
+    meta, meta_size = await time_requests(build_app(session_factory, "metadata"), repeat)
+    lean, lean_size = await time_requests(build_app(session_factory, "lean"), repeat)
+    await engine.dispose()
+
+    print(f"{tasks} tasks x {videos} videos, median of {repeat}")
+    print(f"  ORM + TaskResponse                {old * 1000:7.2f} ms  {old_size:>7} B  {1 / old:7.0f} req/s")
+    print(f"  load_tasks, include_metadata      {meta * 1000:7.2f} ms  {meta_size:>7} B  {1 / meta:7.0f} req/s  ({old / meta:.1f}x)")
+    print(f"  load_tasks                        {lean * 1000:7.2f} ms  {lean_size:>7} B  {1 / lean:7.0f} req/s  ({old / lean:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--videos", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.videos, args.repeat))
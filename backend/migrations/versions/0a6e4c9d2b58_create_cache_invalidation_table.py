@@ -0,0 +1,40 @@
+"""Create cache_invalidation table
+
+Revision ID: 0a6e4c9d2b58
+Revises: f3b8d2c61a07
+Create Date: 2026-10-19 17:14:09.730412
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6e4c9d2b58"
+down_revision: Union[str, None] = "f3b8d2c61a07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cache_invalidation",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_cache_invalidation_created_at"),
+        "cache_invalidation",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_cache_invalidation_created_at"), table_name="cache_invalidation")
+    op.drop_table("cache_invalidation")
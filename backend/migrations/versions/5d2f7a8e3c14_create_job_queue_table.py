@@ -0,0 +1,49 @@
+"""Create job_queue table
+
+Revision ID: 5d2f7a8e3c14
+Revises: 0a6e4c9d2b58
+Create Date: 2026-10-19 18:40:26.204719
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2f7a8e3c14"
+down_revision: Union[str, None] = "0a6e4c9d2b58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_queue",
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("queue", sa.String(length=50), nullable=False),
+        sa.Column("kind", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("job_id"),
+    )
+    op.create_index(op.f("ix_job_queue_job_id"), "job_queue", ["job_id"], unique=False)
+    op.create_index(
+        "ix_job_queue_queue_status_run_at",
+        "job_queue",
+        ["queue", "status", "run_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_queue_queue_status_run_at", table_name="job_queue")
+    op.drop_index(op.f("ix_job_queue_job_id"), table_name="job_queue")
+    op.drop_table("job_queue")
@@ -0,0 +1,41 @@
+"""Create avatar_blob table
+
+Revision ID: 8b1e4f6a9c27
+Revises: 5d2f7a8e3c14
+Create Date: 2026-10-19 20:12:48.513092
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b1e4f6a9c27"
+down_revision: Union[str, None] = "5d2f7a8e3c14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "avatar_blob",
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("refcount", sa.Integer(), nullable=False),
+        sa.Column("stored", sa.Boolean(), nullable=False),
+        sa.Column("unreferenced_since", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("digest"),
+    )
+    op.create_index(
+        op.f("ix_avatar_blob_unreferenced_since"),
+        "avatar_blob",
+        ["unreferenced_since"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_avatar_blob_unreferenced_since"), table_name="avatar_blob")
+    op.drop_table("avatar_blob")
@@ -0,0 +1,40 @@
+"""Create oauth_handoff table
+
+Revision ID: 8b7e4d0c51a2
+Revises: 3f1c2a9d7e54
+Create Date: 2026-10-19 10:03:17.550921
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b7e4d0c51a2"
+down_revision: Union[str, None] = "3f1c2a9d7e54"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "oauth_handoff",
+        sa.Column("code", sa.String(length=64), nullable=False),
+        sa.Column("refresh_token", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("code"),
+    )
+    op.create_index(
+        op.f("ix_oauth_handoff_expires_at"),
+        "oauth_handoff",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_oauth_handoff_expires_at"), table_name="oauth_handoff")
+    op.drop_table("oauth_handoff")
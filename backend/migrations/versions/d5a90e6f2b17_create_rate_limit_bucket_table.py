@@ -0,0 +1,34 @@
+"""Create rate_limit_bucket table
+
+Revision ID: d5a90e6f2b17
+Revises: 8b7e4d0c51a2
+Create Date: 2026-10-19 11:26:02.318840
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a90e6f2b17"
+down_revision: Union[str, None] = "8b7e4d0c51a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limit_bucket",
+        sa.Column("bucket_key", sa.String(length=300), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.Column("allowed", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limit_bucket")
@@ -0,0 +1,68 @@
+"""Add indexes for hot foreign-key and filter paths
+
+Revision ID: e7c3b81f4a90
+Revises: d5a90e6f2b17
+Create Date: 2026-10-19 13:02:47.551209
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7c3b81f4a90"
+down_revision: Union[str, None] = "d5a90e6f2b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_lesson_module_id", "lesson", ["module_id"]),
+    ("ix_task_lesson_id", "task", ["lesson_id"]),
+    ("ix_module_language_id_module_id", "module", ["language_id", "module_id"]),
+    ("ix_module_created_by", "module", ["created_by"]),
+    ("ix_progress_user_id_is_completed", "progress", ["user_id", "is_completed"]),
+    ("ix_user_activity_log_user_id_timestamp", "user_activity_log", ["user_id", "timestamp"]),
+    ("ix_user_achievement_user_id", "user_achievement", ["user_id"]),
+    ("ix_dictionary_usage_user_id_accessed_at", "dictionary_usage", ["user_id", "accessed_at"]),
+    ("ix_task_video_video_id", "task_video", ["video_id"]),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if not _is_postgres():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False)
+        return
+
+    # CREATE INDEX CONCURRENTLY does not lock out writes but cannot run in a
+    # transaction. If a build fails it leaves an INVALID index behind, so
+    # drop any leftover first and the migration can simply be re-run.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    if not _is_postgres():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,39 @@
+"""Create cache_entry table
+
+Revision ID: f3b8d2c61a07
+Revises: e7c3b81f4a90
+Create Date: 2026-10-19 16:02:41.518203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b8d2c61a07"
+down_revision: Union[str, None] = "e7c3b81f4a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cache_entry",
+        sa.Column("cache_key", sa.String(length=500), nullable=False),
+        sa.Column("value", sa.LargeBinary(), nullable=False),
+        sa.Column("tags", sa.Text(), nullable=False),
+        sa.Column("fresh_until", sa.Float(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(
+        op.f("ix_cache_entry_expires_at"), "cache_entry", ["expires_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_cache_entry_expires_at"), table_name="cache_entry")
+    op.drop_table("cache_entry")
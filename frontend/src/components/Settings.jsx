@@ -1,9 +1,12 @@
-import React, { useEffect, useState, useCallback } from 'react';
+import React, { useEffect, useState, useCallback, useRef } from 'react';
 import { Avatar, Box, Button, TextField, Typography } from '@mui/material';
 import { useNavigate } from 'react-router-dom';
 import api from '../services/api';
 import Sidebar from './Sidebar';
 
+const AVATAR_POLL_INTERVAL_MS = 2000;
+const AVATAR_POLL_ATTEMPTS = 30;
+
 const Settings = () => {
   const [userData, setUserData] = useState({
     username: '',
@@ -15,6 +18,8 @@ const Settings = () => {
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
   const [error, setError] = useState(null);
+  const [avatarProcessing, setAvatarProcessing] = useState(false);
+  const avatarPoll = useRef(null);
   const navigate = useNavigate();
 
   const resolveRole = (me) => (me?.role === 'admin' || me?.is_admin ? 'admin' : 'user');
@@ -53,6 +58,30 @@ const Settings = () => {
     loadProfile();
   }, [loadProfile]);
 
+  useEffect(() => () => clearTimeout(avatarPoll.current), []);
+
+  // A new upload is resized in the background; the old avatar stays until
+  // the profile points at the new one.
+  const waitForAvatar = useCallback((url, attempt = 0) => {
+    clearTimeout(avatarPoll.current);
+    if (attempt >= AVATAR_POLL_ATTEMPTS) {
+      setAvatarProcessing(false);
+      setError('Your new avatar is taking a while to process. It will appear once it is ready.');
+      return;
+    }
+    avatarPoll.current = setTimeout(async () => {
+      try {
+        const { data } = await api.get('/users/profile');
+        if (data?.avatar === url) {
+          setUserData((prev) => ({ ...prev, avatar: url }));
+          setAvatarProcessing(false);
+          return;
+        }
+      } catch {}
+      waitForAvatar(url, attempt + 1);
+    }, AVATAR_POLL_INTERVAL_MS);
+  }, []);
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setSaving(true);
@@ -89,7 +118,12 @@ const Settings = () => {
       const { data } = await api.put(endpoint, formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
       });
-      setUserData((prev) => ({ ...prev, avatar: data?.avatar || prev.avatar }));
+      if (data?.status === 'processing') {
+        setAvatarProcessing(true);
+        waitForAvatar(data.avatar);
+      } else {
+        setUserData((prev) => ({ ...prev, avatar: data?.avatar || prev.avatar }));
+      }
     } catch (err) {
       setError(
         err?.response?.data?.detail || err?.response?.data?.message || 'Failed to update avatar.',
@@ -150,12 +184,13 @@ const Settings = () => {
             <Button
               variant="outlined"
               component="label"
+              disabled={avatarProcessing}
               sx={{
                 marginBottom: '20px',
                 textTransform: 'none',
               }}
             >
-              Change Avatar
+              {avatarProcessing ? 'Processing avatar…' : 'Change Avatar'}
               <input type="file" accept="image/*" hidden onChange={handleAvatarChange} />
             </Button>
           </>
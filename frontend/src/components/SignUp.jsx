@@ -47,7 +47,8 @@ const SignUp = () => {
             setEmailHint('Email already exists.');
           } else {
             setEmailStatus('valid');
-            setEmailHint('');
+            // a likely typo is only a hint; signup stays allowed
+            setEmailHint(v.did_you_mean ? v.reason : '');
           }
         } else {
           setEmailStatus('invalid');
@@ -126,6 +127,7 @@ const SignUp = () => {
           required
         />
         {emailStatus === 'checking' && <Info>Checking…</Info>}
+        {emailStatus === 'valid' && emailHint && <Info>{emailHint}</Info>}
         {emailStatus === 'invalid' && <ErrorMessage>{emailHint}</ErrorMessage>}
         {emailStatus === 'exists' && <ErrorMessage>{emailHint}</ErrorMessage>}
 